@@ -6,10 +6,18 @@ Graph-RAG powered Fantasy Premier League assistant.
 import streamlit as st
 import time
 
-from backend.config import Config, get_available_llms
+from backend.config import Config, get_available_llms, get_provider_name
 from backend.intent_parser import parse_user_intent
-from backend.knowledge_graph import query_knowledge_graph
+from backend.knowledge_graph import query_knowledge_graph, warm_query_plans
+from backend.cypher_templates import PLAN_CACHE
+from backend.rate_limits import SCHEDULER
+from backend.profiling import profile_request
 from backend.response_generator import generate_natural_language_answer, get_model_display_name
+from backend.tracing import span, METRICS
+from backend.embedding_cache import get_embedding_cache
+from backend.service_client import remote_ask, remote_health, BackendError
+from backend.conversation import ConversationMemory, apply_context, format_context
+from backend.seasons import DEFAULT_SEASONS, get_season_registry
 
 
 # Page config
@@ -19,6 +27,19 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_resource
+def warm_plans_once():
+    """Plans the Cypher catalogue once per Streamlit process (in-process mode only)."""
+    try:
+        return warm_query_plans()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+if not Config.BACKEND_URL:
+    warm_plans_once()
+
 # Sidebar
 with st.sidebar:
     st.header("⚙️ Configuration")
@@ -27,8 +48,12 @@ with st.sidebar:
     st.subheader("1. Retrieval Strategy")
     retrieval_mode = st.radio(
         "Search Mode:",
-        ["baseline", "semantic"],
-        captions=["Exact Text Match (typos fail)", "AI Vector Search (handles typos)"],
+        ["baseline", "semantic", "columnar"],
+        captions=[
+            "Exact Text Match (typos fail)",
+            "AI Vector Search (handles typos)",
+            "In-Memory NumPy Aggregates (fastest for stats)"
+        ],
         index=1
     )
     
@@ -56,18 +81,70 @@ with st.sidebar:
     
     st.divider()
     
+    if Config.BACKEND_URL:
+        health = remote_health()
+        if health and health.get("ready"):
+            st.success(f"Backend: {Config.BACKEND_URL}")
+        else:
+            st.warning(f"Backend not ready: {Config.BACKEND_URL}")
+
+    # 4. Observability
+    with st.expander("📈 Latency by Stage (p95)"):
+        latency_rows = METRICS.summary()
+        if latency_rows:
+            st.dataframe(latency_rows, hide_index=True)
+        else:
+            st.caption("No traced requests yet.")
+        cache = get_embedding_cache()
+        cache_rows = cache.stats() if cache else []
+        if cache_rows:
+            st.caption("Name-resolution cache (per embedding model)")
+            st.dataframe(cache_rows, hide_index=True)
+        plan_rows = PLAN_CACHE.stats()
+        if plan_rows:
+            confirmed = PLAN_CACHE.confirmed_hit_rate()
+            st.caption(f"Cypher plan cache (assumed hit rate {PLAN_CACHE.hit_rate():.0%}, "
+                       f"confirmed {confirmed:.0%} - runs faster than the template's planning cost)")
+            st.dataframe(plan_rows, hide_index=True)
+        limit_rows = [{"provider": name, **stats} for name, stats in SCHEDULER.stats().items()]
+        if limit_rows:
+            st.caption("LLM rate limits (client-side buckets)")
+            st.dataframe(limit_rows, hide_index=True)
+        st.download_button(
+            "Download Prometheus Metrics",
+            METRICS.render_prometheus(),
+            file_name="metrics.prom"
+        )
+    
+    profile_on = st.toggle(
+        "🔬 Profile requests",
+        value=Config.PROFILE_ENABLED,
+        help="Wrap each question in a profiler; call tree under 'Under the Hood', files in " + Config.PROFILE_DIR
+    )
+
     if st.button("🗑️ Clear Chat"):
         st.session_state.messages = []
+        st.session_state.memory = ConversationMemory()
         st.rerun()
 
 # Main interface
 st.title("⚽ FPL Intelligent Assistant")
-st.caption("Seasons: 2021-22 & 2022-23 | Baseline vs Semantic Retrieval")
+if Config.BACKEND_URL:
+    season_names = ((health or {}).get("seasons") or {}).get("seasons") or list(DEFAULT_SEASONS)
+else:
+    season_names = get_season_registry().names
+season_label = " & ".join(season_names) if len(season_names) <= 2 else f"{season_names[0]} to {season_names[-1]}"
+st.caption(f"Seasons: {season_label} | Baseline vs Semantic Retrieval")
 
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Entities, canonical names and recent rows carried between turns
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+memory = st.session_state.memory
+
 # Display chat history
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -83,40 +160,85 @@ if prompt := st.chat_input("Ask about FPL (e.g., 'Salah stats', 'Top scorers')")
 
     start_total = time.time()
     
-    with st.status("🧠 Processing...", expanded=False) as status:
-        
-        # 1. Intent Parsing
-        t0 = time.time()
-        intent_data = parse_user_intent(prompt)
-        t_intent = time.time() - t0
-        status.write(f"Intent detected: {intent_data['intent']}")
-        
-        # 2. Graph Retrieval
-        status.update(label=f"🔍 Searching Graph ({retrieval_mode})...", state="running")
-        t0 = time.time()
-        kg_result = query_knowledge_graph(
-            intent_data, 
-            retrieval_mode=retrieval_mode, 
-            model_choice=model_choice
-        )
-        t_graph = time.time() - t0
-        
-        raw_data = kg_result.get("data", "[]")
-        cypher_query = kg_result.get("cypher", "No query")
-        
-        # 3. Answer Generation
-        status.update(label="📝 Generating Answer...", state="running")
-        t0 = time.time()
-        final_answer = generate_natural_language_answer(
-            prompt, 
-            intent_data, 
-            raw_data, 
-            model_name=selected_model
-        )
-        t_llm = time.time() - t0
+    # In remote mode the backend profiles its own pipeline and returns the summary
+    with span("chat_turn", retrieval_mode=retrieval_mode,
+              provider=get_provider_name(selected_model)) as turn_span, \
+            st.status("🧠 Processing...", expanded=False) as status, \
+            profile_request(prompt, enabled=profile_on and not Config.BACKEND_URL) as profile:
+
+        if Config.BACKEND_URL:
+            # Remote backend: one round trip runs the whole pipeline
+            status.update(label=f"🔍 Asking backend ({retrieval_mode})...", state="running")
+            try:
+                result = remote_ask(prompt, retrieval_mode, model_choice, selected_model, context=memory.context(),
+                                    profile=profile_on)
+            except BackendError as e:
+                result = {
+                    "intent_data": {"intent": "General_Chat", "entities": {}},
+                    "data": "[]", "cypher": "N/A - Backend unavailable",
+                    "answer": f"⚠️ Backend Error: {e}",
+                    "timings": {"intent": 0.0, "graph": 0.0, "llm": 0.0}, "trace": None
+                }
+            intent_data = result["intent_data"]
+            raw_data = result["data"]
+            cypher_query = result["cypher"]
+            final_answer = result["answer"]
+            t_intent = result["timings"]["intent"]
+            t_graph = result["timings"]["graph"]
+            t_llm = result["timings"]["llm"]
+            memory.remember_turn(prompt, intent_data, retrieval_mode, model_choice, result)
+            turn_span.set("intent", intent_data["intent"])
+            turn_span.set("backend_trace", result["trace"])
+            profile_summary = result.get("profile")
+        else:
+            # 1. Intent Parsing (the same question in the same context is not re-parsed)
+            t0 = time.time()
+            intent_data = memory.cached_intent(prompt)
+            if intent_data is None:
+                context = memory.context()
+                intent_data = apply_context(parse_user_intent(prompt, format_context(context)), context)
+                memory.store_intent(prompt, intent_data)
+            t_intent = time.time() - t0
+            if intent_data.get("carried"):
+                status.write(f"Carried from previous turn: {', '.join(intent_data['carried'])}")
+            sub_intents = intent_data.get("sub_intents") or []
+            if len(sub_intents) > 1:
+                status.write(f"Intents detected: {', '.join(sub['intent'] for sub in sub_intents)}")
+            else:
+                status.write(f"Intent detected: {intent_data['intent']}")
+            turn_span.set("intent", intent_data["intent"])
+
+            # 2. Graph Retrieval
+            status.update(label=f"🔍 Searching Graph ({retrieval_mode})...", state="running")
+            t0 = time.time()
+            kg_result = query_knowledge_graph(
+                intent_data, 
+                retrieval_mode=retrieval_mode, 
+                model_choice=model_choice,
+                memory=memory
+            )
+            t_graph = time.time() - t0
+
+            raw_data = kg_result.get("data", "[]")
+            cypher_query = kg_result.get("cypher", "No query")
+            memory.remember_turn(prompt, intent_data, retrieval_mode, model_choice, kg_result)
+
+            # 3. Answer Generation
+            status.update(label="📝 Generating Answer...", state="running")
+            t0 = time.time()
+            final_answer = generate_natural_language_answer(
+                prompt, 
+                intent_data, 
+                raw_data, 
+                model_name=selected_model
+            )
+            t_llm = time.time() - t0
         
         status.update(label="✅ Complete!", state="complete", expanded=False)
 
+    if not Config.BACKEND_URL:
+        profile_summary = profile.summary() if profile else None
+
     end_total = time.time()
     total_time = end_total - start_total
 
@@ -139,14 +261,37 @@ if prompt := st.chat_input("Ask about FPL (e.g., 'Salah stats', 'Top scorers')")
                 "Total": f"{total_time:.4f}s",
                 "Graph": f"{t_graph:.4f}s",
                 "LLM": f"{t_llm:.4f}s"
-            }
+            },
+            "5_Trace": turn_span.to_dict(),
+            "6_Memory": {**memory.stats(), "context": memory.context()}
         }
+        if profile_summary:
+            debug_info["7_Profile"] = profile_summary
         
         with st.expander("🛠️ Under the Hood"):
             st.markdown("**Cypher Query:**")
             st.code(cypher_query, language="cypher")
             st.markdown("**Raw Data:**")
             st.text(raw_data)
+            st.markdown("**Trace:**")
+            st.json(debug_info["5_Trace"], expanded=False)
+            if profile_summary:
+                st.markdown(f"**Profile** ({profile_summary['backend']}, {profile_summary['duration_ms']:.0f}ms):")
+                if profile_summary["skipped"]:
+                    st.caption(profile_summary["skipped"])
+                else:
+                    if profile_summary["stages_ms"]:
+                        st.dataframe(
+                            [{"stage": k, "ms": v} for k, v in profile_summary["stages_ms"].items()],
+                            hide_index=True
+                        )
+                    st.dataframe(profile_summary["top"], hide_index=True)
+                    st.code(profile_summary["call_tree"], language="text")
+                    if profile and profile.html:
+                        st.download_button("Download Flame View (HTML)", profile.html,
+                                           file_name=f"profile_{profile.created_at}.html")
+                    if profile_summary["saved_to"]:
+                        st.caption("Saved to " + ", ".join(profile_summary["saved_to"]))
 
     st.session_state.messages.append({
         "role": "assistant", 
@@ -0,0 +1,401 @@
+"""
+Bulk Loader Module for FPL Graph-RAG Assistant
+Builds the FPL graph from the public per-gameweek CSVs
+(<data_dir>/<season>/gws/merged_gw.csv and <data_dir>/<season>/teams.csv).
+Rows are streamed in chunks: new Season/Gameweek/Fixture/Team/Player nodes
+are written first, then PLAYED_IN batches go to a pool of parallel writers.
+It can also write neo4j-admin import CSVs for an offline import.
+Fixtures and PLAYED_IN rows carry their season and gameweek as properties
+(the partition keys, see seasons.py). A fixture whose team is unknown is
+still created (its team link is added once a row names it), and rows that
+cannot be placed at all are counted in LoadStats.skipped.
+"""
+
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .seasons import PARTITION_INDEXES
+
+
+# PLAYED_IN properties and their types (neo4j-admin header suffixes)
+INT_STATS = (
+    "minutes", "total_points", "goals_scored", "assists", "clean_sheets",
+    "goals_conceded", "own_goals", "penalties_saved", "penalties_missed",
+    "yellow_cards", "red_cards", "saves", "bonus", "bps"
+)
+FLOAT_STATS = ("influence", "creativity", "threat", "ict_index")
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+
+CONSTRAINTS = [
+    "CREATE CONSTRAINT season_name IF NOT EXISTS FOR (s:Season) REQUIRE s.season_name IS UNIQUE",
+    "CREATE CONSTRAINT gameweek_key IF NOT EXISTS FOR (g:Gameweek) REQUIRE (g.season, g.GW_number) IS UNIQUE",
+    "CREATE CONSTRAINT fixture_key IF NOT EXISTS FOR (f:Fixture) REQUIRE (f.season, f.fixture_number) IS UNIQUE",
+    "CREATE CONSTRAINT team_name IF NOT EXISTS FOR (t:Team) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT player_key IF NOT EXISTS FOR (p:Player) REQUIRE (p.player_name, p.player_element) IS UNIQUE",
+    "CREATE CONSTRAINT position_name IF NOT EXISTS FOR (p:Position) REQUIRE p.name IS UNIQUE",
+]
+
+STRUCTURE_QUERIES = {
+    "seasons": """
+        UNWIND $rows AS row
+        MERGE (:Season {season_name: row.season})
+    """,
+    "gameweeks": """
+        UNWIND $rows AS row
+        MATCH (s:Season {season_name: row.season})
+        MERGE (gw:Gameweek {season: row.season, GW_number: row.gw})
+        MERGE (s)-[:HAS_GW]->(gw)
+    """,
+    "teams": """
+        UNWIND $rows AS row
+        MERGE (:Team {name: row.name})
+    """,
+    "fixtures": """
+        UNWIND $rows AS row
+        MATCH (gw:Gameweek {season: row.season, GW_number: row.gw})
+        MERGE (f:Fixture {season: row.season, fixture_number: row.fixture})
+        SET f.kickoff_time = row.kickoff_time, f.gw = row.gw
+        MERGE (gw)-[:HAS_FIXTURE]->(f)
+        WITH f, row
+        OPTIONAL MATCH (h:Team {name: row.home})
+        OPTIONAL MATCH (a:Team {name: row.away})
+        FOREACH (_ IN CASE WHEN h IS NULL THEN [] ELSE [1] END | MERGE (f)-[:HAS_HOME_TEAM]->(h))
+        FOREACH (_ IN CASE WHEN a IS NULL THEN [] ELSE [1] END | MERGE (f)-[:HAS_AWAY_TEAM]->(a))
+    """,
+    "players": """
+        UNWIND $rows AS row
+        MERGE (p:Player {player_name: row.name, player_element: row.element})
+        MERGE (pos:Position {name: row.position})
+        MERGE (p)-[:PLAYS_AS]->(pos)
+        WITH p, row
+        MATCH (t:Team {name: row.team})
+        MERGE (p)-[:PLAYS_FOR]->(t)
+    """,
+}
+
+PLAYED_IN_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Player {player_name: row.name, player_element: row.element})
+MATCH (f:Fixture {season: row.season, fixture_number: row.fixture})
+MERGE (p)-[r:PLAYED_IN]->(f)
+SET r += row.stats, r.season = row.season, r.gw = row.gw
+"""
+
+
+# =============================================================================
+# CSV PARSING
+# =============================================================================
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_teams(path, encoding="utf-8"):
+    """teams.csv: FPL team id -> team name."""
+    with open(path, newline="", encoding=encoding) as f:
+        return {_int(row["id"]): row["name"] for row in csv.DictReader(f)}
+
+
+def iter_chunks(path, chunk_size, encoding="utf-8"):
+    """Yields lists of CSV rows (dicts) without reading the whole file."""
+    with open(path, newline="", encoding=encoding) as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def parse_row(row, season, teams):
+    """Maps one merged_gw.csv row to the graph's entity values."""
+    was_home = str(row.get("was_home", "")).strip().lower() in ("true", "1")
+    team = row.get("team") or None
+    opponent = teams.get(_int(row.get("opponent_team")))
+    stats = {col: _int(row.get(col)) for col in INT_STATS}
+    stats.update({col: _float(row.get(col)) for col in FLOAT_STATS})
+    return {
+        "season": season,
+        "gw": _int(row.get("GW") or row.get("round")),
+        "fixture": _int(row.get("fixture")),
+        "kickoff_time": row.get("kickoff_time"),
+        "home": team if was_home else opponent,
+        "away": opponent if was_home else team,
+        "name": row["name"],
+        "element": _int(row.get("element")),
+        "position": row.get("position") or "Unknown",
+        "team": team,
+        "stats": {k: v for k, v in stats.items() if v is not None},
+    }
+
+
+def placeable(parsed_rows, stats):
+    """Rows with a gameweek, fixture and player id; the rest are counted as skipped."""
+    kept = []
+    for r in parsed_rows:
+        if r["gw"] is None:
+            stats.skip("no gameweek")
+        elif r["fixture"] is None:
+            stats.skip("no fixture id")
+        elif r["element"] is None:
+            stats.skip("no player element")
+        else:
+            kept.append(r)
+    return kept
+
+
+class EntityTracker:
+    """
+    Remembers which structural entities were already emitted. A fixture is
+    emitted again when a later row names a team its earlier rows did not.
+    """
+
+    def __init__(self):
+        self.seen = {kind: set() for kind in STRUCTURE_QUERIES}
+
+    def delta(self, parsed_rows):
+        """Returns {kind: [new rows]} for entities first seen in this chunk."""
+        new = {kind: {} for kind in STRUCTURE_QUERIES}
+        for r in parsed_rows:
+            candidates = {
+                "seasons": (r["season"], {"season": r["season"]}),
+                "gameweeks": ((r["season"], r["gw"]), {"season": r["season"], "gw": r["gw"]}),
+                "fixtures": ((r["season"], r["fixture"], r["home"], r["away"]), {
+                    "season": r["season"], "gw": r["gw"], "fixture": r["fixture"],
+                    "kickoff_time": r["kickoff_time"], "home": r["home"], "away": r["away"]
+                }),
+                "players": ((r["name"], r["element"], r["team"]), {
+                    "name": r["name"], "element": r["element"],
+                    "position": r["position"], "team": r["team"]
+                }),
+            }
+            for team in (r["home"], r["away"], r["team"]):
+                if team and team not in self.seen["teams"]:
+                    new["teams"].setdefault(team, {"name": team})
+            for kind, (key, value) in candidates.items():
+                if key not in self.seen[kind]:
+                    new[kind].setdefault(key, value)
+        for kind, rows in new.items():
+            self.seen[kind].update(rows)
+        return {kind: list(rows.values()) for kind, rows in new.items() if rows}
+
+
+# =============================================================================
+# ONLINE LOAD (UNWIND BATCHES)
+# =============================================================================
+
+class LoadStats:
+    """Thread-safe row counters with a rows/sec readout."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.batches = 0
+        self.skipped = {}
+        self._lock = threading.Lock()
+
+    def add(self, rows):
+        with self._lock:
+            self.rows += rows
+            self.batches += 1
+
+    def skip(self, reason, rows=1):
+        with self._lock:
+            self.skipped[reason] = self.skipped.get(reason, 0) + rows
+
+    def skipped_summary(self):
+        """'12 rows skipped (no gameweek: 10, no fixture id: 2)' or '' when none were."""
+        total = sum(self.skipped.values())
+        if not total:
+            return ""
+        reasons = ", ".join(f"{reason}: {n:,}" for reason, n in sorted(self.skipped.items()))
+        return f"{total:,} rows skipped ({reasons})"
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _write(driver, query, rows, stats=None):
+    def work(tx):
+        tx.run(query, rows=rows).consume()
+    with driver.session() as session:
+        # Managed transactions retry transient errors such as lock deadlocks
+        session.execute_write(work)
+    if stats:
+        stats.add(len(rows))
+
+
+def create_constraints(driver):
+    with driver.session() as session:
+        for statement in CONSTRAINTS + PARTITION_INDEXES:
+            session.run(statement).consume()
+
+
+def load_season(driver, data_dir, season, batch_size=DEFAULT_BATCH_SIZE,
+                workers=DEFAULT_WORKERS, encoding="utf-8", tracker=None, log=print):
+    """
+    Streams one season into Neo4j. Structural nodes of each chunk are written
+    synchronously (they are few and must exist first); its PLAYED_IN rows are
+    handed to the writer pool, with at most 2 x workers batches in flight.
+    """
+    teams = load_teams(os.path.join(data_dir, season, "teams.csv"), encoding)
+    gw_path = os.path.join(data_dir, season, "gws", "merged_gw.csv")
+    tracker = tracker or EntityTracker()
+    stats = LoadStats()
+    in_flight = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in iter_chunks(gw_path, batch_size, encoding):
+            parsed = placeable([parse_row(row, season, teams) for row in chunk], stats)
+
+            delta = tracker.delta(parsed)
+            for kind in ("seasons", "gameweeks", "teams", "fixtures", "players"):
+                if kind in delta:
+                    _write(driver, STRUCTURE_QUERIES[kind], delta[kind])
+
+            rels = [{k: r[k] for k in ("season", "gw", "fixture", "name", "element", "stats")} for r in parsed]
+            while len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(pool.submit(_write, driver, PLAYED_IN_QUERY, rels, stats))
+
+            if stats.batches and stats.batches % 10 == 0:
+                log(f"   ...{season}: {stats.rows:,} PLAYED_IN rows ({stats.rows_per_sec:,.0f} rows/s)")
+
+        for future in in_flight:
+            future.result()
+
+    if stats.skipped:
+        log(f"   ⚠️  {season}: {stats.skipped_summary()}")
+    return stats
+
+
+# =============================================================================
+# OFFLINE LOAD (neo4j-admin import CSVs)
+# =============================================================================
+
+ADMIN_NODE_HEADERS = {
+    "seasons": ["season_name:ID(Season)", ":LABEL"],
+    "gameweeks": ["id:ID(Gameweek)", "season", "GW_number:int", ":LABEL"],
+    "fixtures": ["id:ID(Fixture)", "season", "gw:int", "fixture_number:int", "kickoff_time", ":LABEL"],
+    "teams": ["name:ID(Team)", ":LABEL"],
+    "players": ["id:ID(Player)", "player_name", "player_element:int", ":LABEL"],
+    "positions": ["name:ID(Position)", ":LABEL"],
+}
+
+ADMIN_REL_HEADERS = {
+    "has_gw": [":START_ID(Season)", ":END_ID(Gameweek)", ":TYPE"],
+    "has_fixture": [":START_ID(Gameweek)", ":END_ID(Fixture)", ":TYPE"],
+    "has_home_team": [":START_ID(Fixture)", ":END_ID(Team)", ":TYPE"],
+    "has_away_team": [":START_ID(Fixture)", ":END_ID(Team)", ":TYPE"],
+    "plays_as": [":START_ID(Player)", ":END_ID(Position)", ":TYPE"],
+    "plays_for": [":START_ID(Player)", ":END_ID(Team)", ":TYPE"],
+    "played_in": (
+        [":START_ID(Player)", ":END_ID(Fixture)", ":TYPE", "season", "gw:int"]
+        + [f"{c}:int" for c in INT_STATS] + [f"{c}:float" for c in FLOAT_STATS]
+    ),
+}
+
+
+def write_admin_csvs(data_dir, seasons, out_dir, batch_size=DEFAULT_BATCH_SIZE, encoding="utf-8", log=print):
+    """
+    Writes node/relationship CSVs for `neo4j-admin database import full`.
+    Returns (stats, command) where command is the import invocation to run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    writers = {}
+    for name, header in {**ADMIN_NODE_HEADERS, **ADMIN_REL_HEADERS}.items():
+        files[name] = open(os.path.join(out_dir, f"{name}.csv"), "w", newline="", encoding="utf-8")
+        writers[name] = csv.writer(files[name])
+        writers[name].writerow(header)
+
+    tracker = EntityTracker()
+    seen_positions = set()
+    seen_plays_as = set()
+    seen_fixtures = set()
+    seen_team_links = set()
+    stats = LoadStats()
+    try:
+        for season in seasons:
+            teams = load_teams(os.path.join(data_dir, season, "teams.csv"), encoding)
+            gw_path = os.path.join(data_dir, season, "gws", "merged_gw.csv")
+            for chunk in iter_chunks(gw_path, batch_size, encoding):
+                parsed = placeable([parse_row(row, season, teams) for row in chunk], stats)
+                delta = tracker.delta(parsed)
+
+                for r in delta.get("seasons", []):
+                    writers["seasons"].writerow([r["season"], "Season"])
+                for r in delta.get("gameweeks", []):
+                    gw_id = f"{r['season']}|{r['gw']}"
+                    writers["gameweeks"].writerow([gw_id, r["season"], r["gw"], "Gameweek"])
+                    writers["has_gw"].writerow([r["season"], gw_id, "HAS_GW"])
+                for r in delta.get("teams", []):
+                    writers["teams"].writerow([r["name"], "Team"])
+                for r in delta.get("fixtures", []):
+                    # Node IDs must be unique: a fixture re-emitted for a newly named team only adds the link
+                    fixture_id = f"{r['season']}|{r['fixture']}"
+                    if fixture_id not in seen_fixtures:
+                        seen_fixtures.add(fixture_id)
+                        writers["fixtures"].writerow(
+                            [fixture_id, r["season"], r["gw"], r["fixture"], r["kickoff_time"], "Fixture"]
+                        )
+                        writers["has_fixture"].writerow([f"{r['season']}|{r['gw']}", fixture_id, "HAS_FIXTURE"])
+                    for side, team in (("has_home_team", r["home"]), ("has_away_team", r["away"])):
+                        if team and (side, fixture_id) not in seen_team_links:
+                            seen_team_links.add((side, fixture_id))
+                            writers[side].writerow([fixture_id, team, side.upper()])
+
+                for r in delta.get("players", []):
+                    player_id = f"{r['name']}|{r['element']}"
+                    if (r["name"], r["element"]) not in seen_plays_as:
+                        seen_plays_as.add((r["name"], r["element"]))
+                        writers["players"].writerow([player_id, r["name"], r["element"], "Player"])
+                        writers["plays_as"].writerow([player_id, r["position"], "PLAYS_AS"])
+                    if r["position"] not in seen_positions:
+                        seen_positions.add(r["position"])
+                        writers["positions"].writerow([r["position"], "Position"])
+                    if r["team"]:
+                        writers["plays_for"].writerow([player_id, r["team"], "PLAYS_FOR"])
+
+                for r in parsed:
+                    writers["played_in"].writerow(
+                        [f"{r['name']}|{r['element']}", f"{r['season']}|{r['fixture']}", "PLAYED_IN",
+                         r["season"], r["gw"]]
+                        + [r["stats"].get(c, "") for c in INT_STATS + FLOAT_STATS]
+                    )
+                stats.add(len(parsed))
+            log(f"   ...{season}: {stats.rows:,} rows written ({stats.rows_per_sec:,.0f} rows/s)")
+            if stats.skipped:
+                log(f"   ⚠️  {stats.skipped_summary()} so far")
+    finally:
+        for f in files.values():
+            f.close()
+
+    nodes = " ".join(f"--nodes={os.path.join(out_dir, n)}.csv" for n in ADMIN_NODE_HEADERS)
+    rels = " ".join(f"--relationships={os.path.join(out_dir, n)}.csv" for n in ADMIN_REL_HEADERS)
+    command = f"neo4j-admin database import full neo4j --overwrite-destination {nodes} {rels}"
+    return stats, command
@@ -0,0 +1,454 @@
+"""
+Columnar Analytics Module for FPL Graph-RAG Assistant
+Loads every PLAYED_IN appearance once into NumPy arrays and answers the
+aggregation-heavy intents with vectorised group-bys (COLUMNAR retrieval mode).
+
+Each method mirrors the Cypher of the same intent in knowledge_graph.py and
+returns the same rows (same keys, order and rounding).
+"""
+
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from .config import Config
+from .cypher_templates import gameweek_range
+from .seasons import get_season_registry, graph_version
+
+
+# Intents answered in-process; everything else stays on Cypher.
+# Captaincy_Pick is served from the same store by rolling_form.py.
+COLUMNAR_INTENTS = {
+    "Player_Stats", "Compare_Players", "Top_Ranked",
+    "Bonus_Points", "Underlying_Stats"
+}
+
+# PLAYED_IN properties loaded as float64 columns (NaN = null)
+STAT_COLUMNS = (
+    "minutes", "total_points", "goals_scored", "assists", "clean_sheets",
+    "saves", "bonus", "bps", "ict_index", "influence", "creativity", "threat",
+    # Only read by the expected-points features (predictions.py)
+    "goals_conceded", "own_goals", "penalties_missed", "penalties_saved",
+    "yellow_cards", "red_cards"
+)
+
+FIXTURE_QUERY = """
+MATCH (f:Fixture)
+OPTIONAL MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f)
+OPTIONAL MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
+OPTIONAL MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
+RETURN elementId(f) AS fixture_id,
+       head(collect(s.season_name)) AS season,
+       head(collect(gw.GW_number)) AS gw,
+       head(collect(h.name)) AS home,
+       head(collect(a.name)) AS away
+"""
+
+APPEARANCE_QUERY = """
+MATCH (p:Player)-[r:PLAYED_IN]->(f:Fixture)
+RETURN elementId(p) AS player_id, p.player_name AS player, elementId(f) AS fixture_id,
+       r.minutes AS minutes, r.total_points AS total_points,
+       r.goals_scored AS goals_scored, r.assists AS assists,
+       r.clean_sheets AS clean_sheets, r.saves AS saves,
+       r.bonus AS bonus, r.bps AS bps, r.ict_index AS ict_index,
+       r.influence AS influence, r.creativity AS creativity, r.threat AS threat,
+       r.goals_conceded AS goals_conceded, r.own_goals AS own_goals,
+       r.penalties_missed AS penalties_missed, r.penalties_saved AS penalties_saved,
+       r.yellow_cards AS yellow_cards, r.red_cards AS red_cards
+"""
+
+POSITION_QUERY = """
+MATCH (p:Player)-[:PLAYS_AS]->(pos:Position)
+RETURN elementId(p) AS player_id, p.player_name AS player, pos.name AS position
+"""
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def cypher_round(value, digits=2):
+    """Matches Cypher's round(x, n), which rounds half up (Python rounds half-even)."""
+    if value is None:
+        return None
+    quantum = Decimal(1).scaleb(-digits)
+    return float(Decimal(repr(float(value))).quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def _to_float(value):
+    """Mirrors toFloat(): numbers and numeric strings convert, anything else is null."""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_gw(value):
+    try:
+        return float(int(str(value).strip()))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _as_int(value):
+    """Integer sums come back from bincount as floats; Cypher returns ints."""
+    return int(round(float(value)))
+
+
+def _top_k(keys, k):
+    """
+    Indices of the k largest keys in descending order.
+    keys is a tuple of arrays (primary first) used like ORDER BY a DESC, b DESC.
+    """
+    primary = keys[0]
+    n = len(primary)
+    if n == 0:
+        return np.array([], dtype=np.int64)
+    if n > k:
+        # argpartition on the primary key, keeping every tie at the boundary
+        cut = np.partition(primary, n - k)[n - k]
+        candidates = np.flatnonzero(primary >= cut)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort(tuple(-key[candidates] for key in reversed(keys)))
+    return candidates[order][:k]
+
+
+# =============================================================================
+# COLUMNAR STORE
+# =============================================================================
+
+class ColumnarStore:
+    """Per-appearance FPL stats held as contiguous NumPy columns."""
+
+    def __init__(self, fixtures, appearances, positions, graph_version=None):
+        # --- Fixtures --------------------------------------------------------
+        fixture_ids = [f["fixture_id"] for f in fixtures]
+        fixture_index = {fid: i for i, fid in enumerate(fixture_ids)}
+        season_names = sorted({f["season"] for f in fixtures if f["season"]})
+        season_index = {s: i for i, s in enumerate(season_names)}
+
+        # --- Players ---------------------------------------------------------
+        player_index = {}
+        player_names = []
+        for row in list(appearances) + list(positions):
+            if row["player_id"] not in player_index:
+                player_index[row["player_id"]] = len(player_names)
+                player_names.append(row["player"] or "")
+
+        appearances = [a for a in appearances if a["fixture_id"] in fixture_index]
+        pairs = [p for p in positions if p["position"]]
+        position_names = sorted({p["position"] for p in pairs})
+        pos_index = {p: i for i, p in enumerate(position_names)}
+
+        self._set_columns(
+            fixture_ids=fixture_ids,
+            season_names=season_names,
+            fixture_season=np.array([season_index.get(f["season"], -1) for f in fixtures], dtype=np.int32),
+            fixture_gw=np.array([_to_gw(f["gw"]) for f in fixtures], dtype=np.float64),
+            fixture_home=[f["home"] for f in fixtures],
+            fixture_away=[f["away"] for f in fixtures],
+            player_names=player_names,
+            app_player=np.array([player_index[a["player_id"]] for a in appearances], dtype=np.int64),
+            app_fixture=np.array([fixture_index[a["fixture_id"]] for a in appearances], dtype=np.int64),
+            stats={
+                col: np.array([_to_float(a[col]) for a in appearances], dtype=np.float64)
+                for col in STAT_COLUMNS
+            },
+            position_names=position_names,
+            pair_player=np.array([player_index[p["player_id"]] for p in pairs], dtype=np.int64),
+            pair_position=np.array([pos_index[p["position"]] for p in pairs], dtype=np.int64),
+            graph_version=graph_version,
+        )
+
+    @classmethod
+    def from_columns(cls, **columns):
+        """
+        Builds a store from ready-made columns (the keyword arguments of
+        _set_columns), e.g. a graph snapshot's arrays, without row dicts.
+        """
+        store = cls.__new__(cls)
+        store._set_columns(**columns)
+        return store
+
+    def _set_columns(self, fixture_ids, season_names, fixture_season, fixture_gw, fixture_home, fixture_away,
+                     player_names, app_player, app_fixture, stats, position_names, pair_player, pair_position,
+                     graph_version=None):
+        # Registry data version this store was read at (None: snapshot, never refreshed)
+        self.graph_version = graph_version
+
+        # --- Fixtures --------------------------------------------------------
+        self.fixture_ids = fixture_ids
+        self.season_names = season_names
+        self.fixture_season = fixture_season
+        self.fixture_gw = fixture_gw
+        self.fixture_home = fixture_home
+        self.fixture_away = fixture_away
+
+        # --- Players ---------------------------------------------------------
+        self.player_names = player_names
+        self.player_names_lower = np.char.lower(np.array(player_names, dtype=str))
+        # Compare/Underlying group by player_name rather than by node
+        self.name_groups, self.player_name_group = np.unique(
+            np.array(player_names, dtype=object).astype(str), return_inverse=True)
+
+        # --- Appearances -----------------------------------------------------
+        self.app_player = app_player
+        self.app_fixture = app_fixture
+        self.stats = stats
+        self.app_season = self.fixture_season[self.app_fixture]
+        self.app_gw = self.fixture_gw[self.app_fixture]
+
+        # --- Positions (PLAYS_AS pairs) --------------------------------------
+        self.position_names = position_names
+        self.pair_player = pair_player
+        self.pair_position = pair_position
+
+    @classmethod
+    def from_session(cls, session):
+        fixtures = [dict(r) for r in session.run(FIXTURE_QUERY)]
+        appearances = [dict(r) for r in session.run(APPEARANCE_QUERY)]
+        positions = [dict(r) for r in session.run(POSITION_QUERY)]
+        return cls(fixtures, appearances, positions, graph_version=graph_version(session))
+
+    @property
+    def num_appearances(self):
+        return len(self.app_player)
+
+    # -------------------------------------------------------------------------
+    # Row filters
+    # -------------------------------------------------------------------------
+    def _base_mask(self, season, gw):
+        """Season partition plus optional gameweek or (start, end) range (same as PARTITION_FILTER)."""
+        code = self.season_names.index(season) if season in self.season_names else -2
+        mask = self.app_season == code
+        gw_range = gameweek_range(gw)
+        if gw_range:
+            mask &= (self.app_gw >= gw_range[0]) & (self.app_gw <= gw_range[1])
+        return mask
+
+    def _name_weights(self, names):
+        """
+        How many search names each player matches (CONTAINS, case-insensitive).
+        UNWIND $names repeats a player's rows once per matching name.
+        """
+        weights = np.zeros(len(self.player_names), dtype=np.float64)
+        for name in names:
+            weights += np.char.find(self.player_names_lower, str(name).lower()) >= 0
+        return weights
+
+    def positions_matching(self, aliases):
+        """Position indices matching any alias (same rules as the Cypher pos_filter)."""
+        allowed = []
+        for i, pos in enumerate(self.position_names):
+            pl = pos.lower()
+            if any(pl == a.lower() or a.lower() in pl or pl in a.lower() for a in aliases):
+                allowed.append(i)
+        return allowed
+
+    def _position_pairs(self, aliases):
+        """Indices of PLAYS_AS pairs whose position matches any alias."""
+        if not aliases:
+            return np.arange(len(self.pair_player))
+        return np.flatnonzero(np.isin(self.pair_position, self.positions_matching(aliases)))
+
+    # -------------------------------------------------------------------------
+    # Group-by primitives
+    # -------------------------------------------------------------------------
+    def _sum(self, groups, weights, col, n):
+        values = np.nan_to_num(self.stats[col]) if col else 1.0
+        return np.bincount(groups, weights=weights * values, minlength=n)
+
+    def _avg(self, groups, weights, col, n):
+        """avg() ignoring nulls; None where a group has no non-null values."""
+        values = self.stats[col]
+        present = ~np.isnan(values)
+        num = np.bincount(groups, weights=weights * np.nan_to_num(values), minlength=n)
+        den = np.bincount(groups, weights=weights * present, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return num / den, den > 0
+
+    # -------------------------------------------------------------------------
+    # Intents
+    # -------------------------------------------------------------------------
+    def player_stats(self, names, season, gw=None):
+        w = self._row_weights(names, season, gw)
+        n = len(self.player_names)
+        matches = self._sum(self.app_player, w, None, n)
+        groups = np.flatnonzero(matches > 0)
+        if len(groups) == 0:
+            return []
+        best = groups[_top_k((matches[groups],), 1)[0]]
+        sums = {col: self._sum(self.app_player, w, col, n)[best]
+                for col in ("total_points", "goals_scored", "assists", "minutes")}
+        return [{
+            "Player": self.player_names[best],
+            "Points": _as_int(sums["total_points"]),
+            "Goals": _as_int(sums["goals_scored"]),
+            "Assists": _as_int(sums["assists"]),
+            "Matches": _as_int(matches[best]),
+            "Minutes": _as_int(sums["minutes"]),
+        }]
+
+    def compare_players(self, names, season, gw=None):
+        w = self._row_weights(names, season, gw)
+        g = self.player_name_group[self.app_player]
+        n = len(self.name_groups)
+        matches = self._sum(g, w, None, n)
+        points = self._sum(g, w, "total_points", n)
+        goals = self._sum(g, w, "goals_scored", n)
+        assists = self._sum(g, w, "assists", n)
+        minutes = self._sum(g, w, "minutes", n)
+        groups = np.flatnonzero(matches > 0)
+        order = groups[_top_k((points[groups],), len(groups))]
+        return [{
+            "Name": str(self.name_groups[i]),
+            "Points": _as_int(points[i]),
+            "Goals": _as_int(goals[i]),
+            "Assists": _as_int(assists[i]),
+            "Matches": _as_int(matches[i]),
+            "Minutes": _as_int(minutes[i]),
+            "PointsPerGame": cypher_round(points[i] / matches[i], 2),
+        } for i in order]
+
+    def top_ranked(self, aliases, sort_key, season, gw=None, limit=10):
+        mask = self._base_mask(season, gw) & (self.stats["minutes"] > 0)
+        w = mask.astype(np.float64)
+        n = len(self.player_names)
+        agg = {
+            "Matches": self._sum(self.app_player, w, None, n),
+            "Points": self._sum(self.app_player, w, "total_points", n),
+            "Goals": self._sum(self.app_player, w, "goals_scored", n),
+            "Assists": self._sum(self.app_player, w, "assists", n),
+            "CleanSheets": self._sum(self.app_player, w, "clean_sheets", n),
+            "Saves": self._sum(self.app_player, w, "saves", n),
+        }
+        pairs = self._position_pairs(aliases)
+        pairs = pairs[agg["Matches"][self.pair_player[pairs]] > 0]
+        players = self.pair_player[pairs]
+        top = _top_k((agg[sort_key][players],), limit)
+        return [{
+            "Player": self.player_names[players[i]],
+            "Position": self.position_names[self.pair_position[pairs[i]]],
+            "Matches": _as_int(agg["Matches"][players[i]]),
+            "Points": _as_int(agg["Points"][players[i]]),
+            "Goals": _as_int(agg["Goals"][players[i]]),
+            "Assists": _as_int(agg["Assists"][players[i]]),
+            "CleanSheets": _as_int(agg["CleanSheets"][players[i]]),
+        } for i in top]
+
+    def bonus_points(self, season, gw=None, limit=20):
+        mask = self._base_mask(season, gw) & (self.stats["bonus"] > 0)
+        has_teams = np.array(
+            [h is not None and a is not None for h, a in zip(self.fixture_home, self.fixture_away)],
+            dtype=bool)
+        rows = np.flatnonzero(mask & has_teams[self.app_fixture])
+        bonus = np.nan_to_num(self.stats["bonus"][rows])
+        # Cypher sorts nulls first under DESC
+        bps = np.nan_to_num(self.stats["bps"][rows], nan=np.inf)
+        top = rows[_top_k((bonus, bps), limit)]
+        return [{
+            "Player": self.player_names[self.app_player[r]],
+            "BonusPoints": _as_int(self.stats["bonus"][r]),
+            "BPS": None if np.isnan(self.stats["bps"][r]) else _as_int(self.stats["bps"][r]),
+            "Match": f"{self.fixture_home[self.app_fixture[r]]} vs {self.fixture_away[self.app_fixture[r]]}",
+            "TotalPoints": None if np.isnan(self.stats["total_points"][r]) else _as_int(self.stats["total_points"][r]),
+        } for r in top]
+
+    def underlying_stats(self, names, season, gw=None):
+        w = self._row_weights(names, season, gw)
+        g = self.player_name_group[self.app_player]
+        n = len(self.name_groups)
+        matches = self._sum(g, w, None, n)
+        points = self._sum(g, w, "total_points", n)
+        avgs = {col: self._avg(g, w, col, n) for col in ("ict_index", "influence", "creativity", "threat")}
+        groups = np.flatnonzero(matches > 0)
+        ict, has_ict = avgs["ict_index"]
+        ict_key = np.where(has_ict, ict, np.inf)
+        order = groups[_top_k((ict_key[groups],), len(groups))]
+
+        def avg_of(col, i):
+            values, present = avgs[col]
+            return cypher_round(values[i], 2) if present[i] else None
+
+        return [{
+            "Player": str(self.name_groups[i]),
+            "Matches": _as_int(matches[i]),
+            "AvgICT": avg_of("ict_index", i),
+            "AvgInfluence": avg_of("influence", i),
+            "AvgCreativity": avg_of("creativity", i),
+            "AvgThreat": avg_of("threat", i),
+            "TotalPoints": _as_int(points[i]),
+        } for i in order]
+
+    def _row_weights(self, names, season, gw):
+        """Per-row multiplicity for name-driven intents (minutes > 0 filter)."""
+        mask = self._base_mask(season, gw) & (self.stats["minutes"] > 0)
+        return mask * self._name_weights(names)[self.app_player]
+
+
+# =============================================================================
+# SHARED INSTANCE
+# =============================================================================
+
+_store = None
+_store_lock = threading.Lock()
+
+# Caches derived from the store (form tables, similarity engines, predictions)
+# register a reset here and are dropped whenever the store is replaced
+_reload_hooks = []
+
+
+def on_store_reload(hook):
+    _reload_hooks.append(hook)
+    return hook
+
+
+def _is_stale(store):
+    """True once the season registry reports a different graph than the store was read from."""
+    if store.graph_version is None:
+        return False
+    version = get_season_registry().version
+    return version is not None and version != store.graph_version
+
+
+def get_columnar_store():
+    """
+    Loads the store on first use (one Neo4j round trip, or the snapshot in
+    FPL_SNAPSHOT_DIR) and reuses it. A store read from Neo4j is reloaded when
+    the graph's data version changes (checked every SEASON_REGISTRY_TTL).
+    """
+    global _store
+    store = _store
+    if store is not None and not _is_stale(store):
+        return store
+    with _store_lock:
+        if _store is None or _is_stale(_store):
+            replaced = _store is not None
+            if Config.SNAPSHOT_DIR:
+                from .snapshot import load_snapshot
+                _store = load_snapshot(Config.SNAPSHOT_DIR).columnar_store()
+            else:
+                # Imported here: knowledge_graph imports this module
+                from .knowledge_graph import get_driver
+                with get_driver().session() as session:
+                    _store = ColumnarStore.from_session(session)
+            if replaced:
+                _run_reload_hooks()
+    return _store
+
+
+def reset_columnar_store():
+    """Drops the cached store so the next query reloads it."""
+    global _store
+    with _store_lock:
+        _store = None
+    _run_reload_hooks()
+
+
+def _run_reload_hooks():
+    for hook in _reload_hooks:
+        hook()
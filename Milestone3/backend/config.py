@@ -15,6 +15,11 @@ class Config:
     NEO4J_URI = os.getenv("NEO4J_URI")
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+    NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+    # Compound questions: at most this many sub-queries, run in parallel
+    MAX_SUB_INTENTS = int(os.getenv("FPL_MAX_SUB_INTENTS", "4"))
+    # Seasons are re-read from the graph this often (seconds), so newly loaded ones appear
+    SEASON_REGISTRY_TTL = float(os.getenv("FPL_SEASON_REGISTRY_TTL", "300"))
 
     # ---------------------------------------------------------
     # 2. LLM API Keys
@@ -24,6 +29,18 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY")
 
+    # Client-side rate limits per provider (backend/rate_limits.py):
+    # requests/min and tokens/min, as "provider=limit,..."
+    LLM_RATE_LIMITS_ENABLED = os.getenv("FPL_LLM_RATE_LIMITS", "1") == "1"
+    LLM_RPM = os.getenv("FPL_LLM_RPM", "groq=30,openai=60,gemini=15,cerebras=30")
+    LLM_TPM = os.getenv("FPL_LLM_TPM", "groq=12000,openai=60000,gemini=250000,cerebras=60000")
+    # Share of each limit actually used; waits for a slot longer than the timeout fail
+    LLM_RATE_HEADROOM = float(os.getenv("FPL_LLM_RATE_HEADROOM", "0.9"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("FPL_LLM_QUEUE_TIMEOUT", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("FPL_LLM_MAX_RETRIES", "2"))
+    # Buckets are per process: batch_questions.py without --backend uses this share of each limit
+    LLM_BATCH_SHARE = float(os.getenv("FPL_LLM_BATCH_SHARE", "0.5"))
+
     # ---------------------------------------------------------
     # 3. Model Names (YOUR ORIGINAL WORKING MODEL)
     # ---------------------------------------------------------
@@ -38,8 +55,87 @@ class Config:
     EMBEDDING_MODEL_A = "all-MiniLM-L6-v2"
     EMBEDDING_MODEL_B = "all-mpnet-base-v2"
 
+    # Query-time encoder: torch | onnx | onnx-int8 (ONNX models from export_onnx.py)
+    EMBEDDING_BACKEND = os.getenv("FPL_EMBEDDING_BACKEND", "torch")
+    ONNX_MODEL_DIR = os.getenv("FPL_ONNX_MODEL_DIR", "artifacts/onnx")
+    # Short queries gain little past a few threads; more only adds contention
+    ONNX_INTRA_OP_THREADS = int(os.getenv("FPL_ONNX_THREADS", str(min(4, os.cpu_count() or 1))))
+
     # ---------------------------------------------------------
-    # 5. Validation Logic
+    # 5. Observability (Tracing & Metrics)
+    # ---------------------------------------------------------
+    TRACING_ENABLED = os.getenv("FPL_TRACING", "1") == "1"
+    TRACE_LOG_PATH = os.getenv("FPL_TRACE_LOG", "logs/traces.jsonl")
+    METRICS_PATH = os.getenv("FPL_METRICS_PATH", "logs/metrics.prom")
+    # metrics.prom is rewritten at most this often (seconds); GET /metrics on server.py is live
+    METRICS_INTERVAL = float(os.getenv("FPL_METRICS_INTERVAL", "15"))
+
+    # Slow-query log: queries slower than the threshold are re-run under PROFILE
+    SLOW_QUERY_LOG_ENABLED = os.getenv("FPL_SLOW_QUERY_LOG", "0") == "1"
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("FPL_SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_LOG_PATH = os.getenv("FPL_SLOW_QUERY_PATH", "logs/slow_queries.jsonl")
+    # PROFILE runs in the background, at most once per query fingerprint per interval (seconds)
+    SLOW_QUERY_PROFILE_INTERVAL = float(os.getenv("FPL_SLOW_QUERY_PROFILE_INTERVAL", "300"))
+
+    # Plan every Cypher template with EXPLAIN at start-up (backend/cypher_templates.py)
+    PLAN_CACHE_WARMUP = os.getenv("FPL_PLAN_CACHE_WARMUP", "1") == "1"
+
+    # Profile every request (pyinstrument if installed, else cProfile) and
+    # save the call trees; the sidebar toggle does the same per session
+    PROFILE_ENABLED = os.getenv("FPL_PROFILE", "0") == "1"
+    PROFILE_DIR = os.getenv("FPL_PROFILE_DIR", "logs/profiles")
+    PROFILE_INTERVAL = float(os.getenv("FPL_PROFILE_INTERVAL", "0.001"))
+
+    # ---------------------------------------------------------
+    # 6. Local Artifacts (built by initialize_vectors.py)
+    # ---------------------------------------------------------
+    LEADERBOARDS_PATH = os.getenv("FPL_LEADERBOARDS_PATH", "artifacts/leaderboards.json")
+    LEADERBOARD_TOP_K = int(os.getenv("FPL_LEADERBOARD_TOP_K", "25"))
+
+    # Memory-mapped replica of the player embeddings (local vector search)
+    VECTOR_REPLICA_DIR = os.getenv("FPL_VECTOR_REPLICA_DIR", "artifacts/vectors")
+    LOCAL_VECTOR_SEARCH = os.getenv("FPL_LOCAL_VECTOR_SEARCH", "1") == "1"
+    TYPO_CORPUS_PATH = os.getenv("FPL_TYPO_CORPUS", "artifacts/typo_corpus.jsonl")
+    INIT_CHECKPOINT_PATH = os.getenv("FPL_INIT_CHECKPOINT", "artifacts/init_checkpoint.json")
+
+    # Graph snapshot (graph_snapshot.py). When set, the columnar store loads
+    # from it instead of querying Neo4j.
+    SNAPSHOT_DIR = os.getenv("FPL_SNAPSHOT_DIR", "")
+
+    # LightGBM expected-points pipeline (optional: pip install ".[predictions]")
+    PREDICTION_MODEL_PATH = os.getenv("FPL_PREDICTION_MODEL", "../lgbm_model_pipeline.joblib")
+    # Gameweeks of history averaged into each player's feature row
+    PREDICTION_WINDOW = int(os.getenv("FPL_PREDICTION_WINDOW", "5"))
+    # Scored gameweeks kept in memory (least recently used are dropped)
+    PREDICTION_CACHE_SIZE = int(os.getenv("FPL_PREDICTION_CACHE_SIZE", "8"))
+
+    # Candidate scan precision for local search: float32 | float16 | int8.
+    # Quantised scans are re-scored in float32 over the top candidates.
+    VECTOR_PRECISION = os.getenv("FPL_VECTOR_PRECISION", "float32")
+    VECTOR_RESCORE_CANDIDATES = int(os.getenv("FPL_VECTOR_RESCORE", "32"))
+
+    # Query-embedding / resolved-name cache (LRU in memory, SQLite on disk)
+    EMBEDDING_CACHE_ENABLED = os.getenv("FPL_EMBEDDING_CACHE", "1") == "1"
+    EMBEDDING_CACHE_PATH = os.getenv("FPL_EMBEDDING_CACHE_PATH", "artifacts/embedding_cache.sqlite3")
+    EMBEDDING_CACHE_SIZE = int(os.getenv("FPL_EMBEDDING_CACHE_SIZE", "4096"))
+    # Resolved names (and misses) are trusted for this long (seconds) even within one data version
+    RESOLUTION_CACHE_TTL = float(os.getenv("FPL_RESOLUTION_CACHE_TTL", "86400"))
+
+    # ---------------------------------------------------------
+    # 7. Backend Service (server.py)
+    # ---------------------------------------------------------
+    # When set, app.py sends questions to this service instead of running
+    # the pipeline in the Streamlit process, e.g. http://localhost:8000
+    BACKEND_URL = os.getenv("FPL_BACKEND_URL", "")
+    BACKEND_TIMEOUT = float(os.getenv("FPL_BACKEND_TIMEOUT", "120"))
+    SERVICE_HOST = os.getenv("FPL_SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("FPL_SERVICE_PORT", "8000"))
+    SERVICE_WORKERS = int(os.getenv("FPL_SERVICE_WORKERS", "8"))
+    # Seconds a request may wait for a free worker before getting a 503
+    SERVICE_QUEUE_TIMEOUT = float(os.getenv("FPL_SERVICE_QUEUE_TIMEOUT", "30"))
+
+    # ---------------------------------------------------------
+    # 8. Validation Logic
     # ---------------------------------------------------------
     @staticmethod
     def validate():
@@ -82,5 +178,16 @@ def get_available_llms():
     return available if available else [Config.MODEL_GROQ]
 
 
+def get_provider_name(model_name):
+    """Maps an LLM model name to its provider (used for tracing labels)."""
+    providers = {
+        Config.MODEL_GROQ: "groq",
+        Config.MODEL_OPENAI: "openai",
+        Config.MODEL_GEMINI: "gemini",
+        Config.MODEL_CEREBRAS: "cerebras"
+    }
+    return providers.get(model_name, "groq")
+
+
 # Validate on load
 Config.validate()
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Conversation Memory Module for FPL Graph-RAG Assistant
+Per-chat state for follow-up questions: the previous turn's entities (with
+canonical player/team names), a raw -> canonical name map and the rows of
+recent graph queries. Follow-ups like "what about his assists last season?"
+keep the player and skip name resolution, and repeated (parts of) queries
+are answered without another Neo4j round trip.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+
+
+# Entities a follow-up inherits when it does not name its own
+CARRY_KEYS = ("Player", "Team", "Season")
+
+# Words that make a question refer back to the previous turn
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(he|him|his|she|her|hers|they|them|their|those|these|same|what about|how about|instead)\b",
+    re.IGNORECASE
+)
+
+MAX_CACHED_RESULTS = 32
+
+# Results that must not be replayed from memory
+ERROR_PREFIXES = ("Database Error", "Columnar Engine Error")
+
+
+def is_follow_up(question):
+    return bool(FOLLOW_UP_PATTERN.search(question or ""))
+
+
+def format_context(context):
+    """Renders the previous turn for the intent parser (None for a first turn)."""
+    if not context:
+        return None
+    return (
+        f'Previous question: "{context["question"]}"\n'
+        f'Previous intent: {context["intent"]}\n'
+        f'Previous entities: {json.dumps(context["entities"], ensure_ascii=False)}\n'
+        "If the new query refers back (his, their, same player, last season...), "
+        "resolve it against these entities."
+    )
+
+
+def apply_context(intent_data, context):
+    """
+    Fills entities a follow-up left out from the previous turn's (canonical)
+    entities, for the top-level intent and every sub-intent. Records the
+    carried keys under "carried" for the debug panel.
+    """
+    if not context or not is_follow_up(intent_data.get("user_query")):
+        return intent_data
+
+    def carry(data):
+        entities = dict(data.get("entities") or {})
+        carried = []
+        for key in CARRY_KEYS:
+            if not entities.get(key) and context["entities"].get(key):
+                entities[key] = context["entities"][key]
+                carried.append(key)
+        return {**data, "entities": entities}, carried
+
+    intent_data, carried = carry(intent_data)
+    if intent_data.get("sub_intents"):
+        intent_data["sub_intents"] = [carry(sub)[0] for sub in intent_data["sub_intents"]]
+    intent_data["carried"] = carried
+    return intent_data
+
+
+# =============================================================================
+# MEMORY
+# =============================================================================
+
+class ConversationMemory:
+    """
+    One chat's memory (kept in Streamlit session_state). Name maps and
+    cached rows are keyed by retrieval mode and embedding model so baseline
+    and semantic answers never leak into each other.
+    """
+
+    def __init__(self, max_results=MAX_CACHED_RESULTS):
+        self.max_results = max_results
+        self.last_turn = None
+        self.aliases = {}
+        self.results = OrderedDict()
+        self.intents = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def context(self):
+        return self.last_turn
+
+    # ---------------------------------------------------------
+    # Canonical names
+    # ---------------------------------------------------------
+    def canonicalize(self, structured_data, retrieval_mode, model_choice):
+        """
+        Swaps raw player/team names for canonical ones resolved in earlier
+        turns and lists them under resolved_entities so resolution is skipped.
+        """
+        entities = dict(structured_data.get("entities") or {})
+        resolved = {}
+        with self._lock:
+            for key in ("Player", "Team"):
+                names = entities.get(key)
+                if not names:
+                    continue
+                if isinstance(names, str):
+                    names = [names]
+                mapped = [
+                    self.aliases.get((retrieval_mode, model_choice, key, n.strip().lower()), n)
+                    for n in names if n
+                ]
+                entities[key] = mapped
+                resolved[key] = [
+                    n for n in mapped
+                    if (retrieval_mode, model_choice, key, n.strip().lower()) in self.aliases
+                ]
+        return {**structured_data, "entities": entities, "resolved_entities": resolved}
+
+    def learn(self, resolved, retrieval_mode, model_choice):
+        """Stores raw -> canonical names from a query result (and canonical -> itself)."""
+        with self._lock:
+            for key, mapping in (resolved or {}).items():
+                for raw, canonical in mapping.items():
+                    if raw and canonical:
+                        self.aliases[(retrieval_mode, model_choice, key, raw.strip().lower())] = canonical
+                        self.aliases[(retrieval_mode, model_choice, key, canonical.strip().lower())] = canonical
+
+    # ---------------------------------------------------------
+    # Cached rows
+    # ---------------------------------------------------------
+    @staticmethod
+    def _key(structured_data, retrieval_mode, model_choice):
+        # "route" is (intent, predicted) after the question-wording overrides
+        # (knowledge_graph.route_intent); the parsed intent alone can differ
+        intent, predicted = structured_data.get("route") or (structured_data.get("intent"), False)
+        entities = {k: v for k, v in (structured_data.get("entities") or {}).items() if v}
+        return (
+            retrieval_mode, model_choice, intent, predicted,
+            json.dumps(entities, sort_keys=True, default=str).lower(),
+        )
+
+    def cached_result(self, structured_data, retrieval_mode, model_choice):
+        key = self._key(structured_data, retrieval_mode, model_choice)
+        with self._lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.results.move_to_end(key)
+            self.hits += 1
+        return {**result, "cypher": f"N/A - Reused from conversation memory\n{result.get('cypher', '')}"}
+
+    def store_result(self, structured_data, retrieval_mode, model_choice, result):
+        self.learn(result.get("resolved"), retrieval_mode, model_choice)
+        if str(result.get("data", "")).startswith(ERROR_PREFIXES):
+            return
+        # Key on the canonical names just learned, so "salah" and "Mohamed Salah" share rows
+        key = self._key(self.canonicalize(structured_data, retrieval_mode, model_choice), retrieval_mode, model_choice)
+        with self._lock:
+            self.results[key] = dict(result)
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+
+    # ---------------------------------------------------------
+    # Parsed intents
+    # ---------------------------------------------------------
+    def _intent_key(self, question):
+        context = json.dumps((self.last_turn or {}).get("entities"), sort_keys=True, default=str)
+        return " ".join(str(question).lower().split()), context
+
+    def cached_intent(self, question):
+        """The parse of the same question asked with the same context earlier, if any."""
+        key = self._intent_key(question)
+        with self._lock:
+            parsed = self.intents.get(key)
+            if parsed is not None:
+                self.intents.move_to_end(key)
+        return dict(parsed) if parsed is not None else None
+
+    def store_intent(self, question, intent_data):
+        key = self._intent_key(question)
+        with self._lock:
+            self.intents[key] = dict(intent_data)
+            while len(self.intents) > self.max_results:
+                self.intents.popitem(last=False)
+
+    # ---------------------------------------------------------
+    # Turns
+    # ---------------------------------------------------------
+    def remember_turn(self, question, intent_data, retrieval_mode, model_choice, kg_result=None):
+        """Keeps this turn's entities, with canonical names, as the next turn's context."""
+        self.learn((kg_result or {}).get("resolved"), retrieval_mode, model_choice)
+        entities = {k: v for k, v in (intent_data.get("entities") or {}).items() if v}
+        for sub in intent_data.get("sub_intents") or []:
+            for key in CARRY_KEYS:
+                if not entities.get(key) and (sub.get("entities") or {}).get(key):
+                    entities[key] = sub["entities"][key]
+        with self._lock:
+            for key in ("Player", "Team"):
+                if entities.get(key):
+                    names = entities[key] if isinstance(entities[key], list) else [entities[key]]
+                    entities[key] = [
+                        self.aliases.get((retrieval_mode, model_choice, key, n.strip().lower()), n) for n in names
+                    ]
+        self.last_turn = {"question": question, "intent": intent_data.get("intent"), "entities": entities}
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cached_results": len(self.results),
+            "cached_intents": len(self.intents),
+            "known_names": len(self.aliases),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.last_turn = None
+            self.aliases.clear()
+            self.results.clear()
+            self.intents.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,562 @@
+"""
+Cypher Templates Module for FPL Graph-RAG Assistant
+The fixed catalogue of parameterised queries behind query_knowledge_graph.
+
+Every dynamic part of a query is either a parameter ($season, $gw_start, $aliases,
+$index, $emb_field, ...) or one of a small closed set of variants (the
+Top_Ranked sort column), so each logical query always reaches Neo4j as the
+same text and is planned once. warm_plan_cache() plans the whole catalogue
+with EXPLAIN at start-up and measures each template's planning cost;
+PlanCacheStats reports assumed and confirmed hit rates afterwards.
+"""
+
+import re
+import threading
+import time
+
+from .tracing import METRICS
+
+
+# =============================================================================
+# SHARED FRAGMENTS
+# =============================================================================
+
+# Partition filter for the aggregation intents: the appearance's own season
+# and gameweek keys (indexed, see seasons.py), so only the requested season is
+# read. $gw_start/$gw_end bound an inclusive gameweek range (equal for one
+# gameweek) and are both null when the question names no gameweek.
+PARTITION_FILTER = (
+    "r.season = $season"
+    " AND ($gw_start IS NULL OR r.gw >= $gw_start)"
+    " AND ($gw_end IS NULL OR r.gw <= $gw_end)"
+)
+
+# "5-10", "5 to 10", "GW5-GW10", "gw 5 – 10"
+GAMEWEEK_RANGE = re.compile(r"^\D*(\d+)\s*(?:-|–|to)\s*\D*(\d+)\s*$", re.IGNORECASE)
+
+# Closed set of Top_Ranked sort columns (see resolve_sort_metric)
+SORT_KEYS = ("Points", "Goals", "Assists", "CleanSheets", "Saves")
+
+
+# =============================================================================
+# CATALOGUE
+# =============================================================================
+
+TEMPLATES = {
+    # ---------------------------------------------------------
+    # Entity resolution
+    # ---------------------------------------------------------
+    "resolve_team": """
+    MATCH (t:Team)
+    WHERE toLower(t.name) = $raw
+       OR toLower(t.name) CONTAINS $raw
+       OR all(term IN split($raw, ' ') WHERE toLower(t.name) CONTAINS term)
+    RETURN t.name AS Name
+    LIMIT 1
+    """,
+
+    "team_names": "MATCH (t:Team) RETURN t.name AS name",
+
+    "position_names": "MATCH (p:Position) RETURN p.name AS name",
+
+    # Baseline mode's player match (the CONTAINS predicate of the player templates) on its own
+    "resolve_player_contains": """
+    MATCH (p:Player)
+    WHERE toLower(p.player_name) CONTAINS toLower($name)
+    RETURN DISTINCT p.player_name AS Name
+    LIMIT 10
+    """,
+
+    "resolve_player_vector": """
+    CALL db.index.vector.queryNodes($index, 10, $vec)
+    YIELD node, score
+    WHERE score > 0.70
+    RETURN node.player_name AS Name
+    ORDER BY score DESC
+    LIMIT 1
+    """,
+
+    # ---------------------------------------------------------
+    # Intents
+    # ---------------------------------------------------------
+    "player_stats": f"""
+                UNWIND $names AS search_name
+
+                MATCH (p:Player)
+                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
+
+                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE {PARTITION_FILTER} AND r.minutes > 0
+
+                WITH p,
+                     count(r) AS Matches,
+                     sum(r.total_points) AS Points,
+                     sum(r.goals_scored) AS Goals,
+                     sum(r.assists) AS Assists,
+                     sum(r.minutes) AS Minutes
+
+                ORDER BY Matches DESC
+                LIMIT 1
+
+                RETURN p.player_name AS Player, Points, Goals, Assists, Matches, Minutes
+                """,
+
+    "compare_players": f"""
+                UNWIND $names AS search_name
+                MATCH (p:Player)
+                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
+
+                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE {PARTITION_FILTER} AND r.minutes > 0
+
+                RETURN
+                    p.player_name AS Name,
+                    sum(r.total_points) AS Points,
+                    sum(r.goals_scored) AS Goals,
+                    sum(r.assists) AS Assists,
+                    count(r) AS Matches,
+                    sum(r.minutes) AS Minutes,
+                    round(toFloat(sum(r.total_points)) / count(r), 2) AS PointsPerGame
+                ORDER BY Points DESC
+                """,
+
+    "team_stats": """
+                UNWIND $team_names AS t_name
+                MATCH (t:Team) WHERE toLower(t.name) CONTAINS toLower(t_name)
+
+                // Fixtures where our team played, in the season partition
+                MATCH (t)<-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]-(f:Fixture)
+                WHERE f.season = $season
+                MATCH (f)-[:HAS_HOME_TEAM]->(home:Team)
+                MATCH (f)-[:HAS_AWAY_TEAM]->(away:Team)
+
+                // Get all players who played in this fixture with their stats
+                MATCH (p:Player)-[r:PLAYED_IN]->(f)
+                WHERE r.minutes > 0
+
+                // For each player, count how many fixtures they have with our team
+                WITH t, f, home, away, p, r
+                OPTIONAL MATCH (p)-[r1:PLAYED_IN]->(:Fixture)-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]->(t)
+                WHERE r1.season = $season
+                WITH t, f, home, away, p, r, count(r1) AS player_team_fixtures
+
+                // Count player's total fixtures in the season
+                OPTIONAL MATCH (p)-[r2:PLAYED_IN]->(any_f:Fixture)
+                WHERE r2.season = $season
+                WITH t, f, home, away, p, r, player_team_fixtures, count(DISTINCT any_f) AS player_total_fixtures
+
+                // Player belongs to our team if majority of their fixtures involve our team
+                // (handles transfers - player belongs to team they played most for)
+                WITH t, f, home, away, r,
+                     CASE WHEN player_team_fixtures >= player_total_fixtures * 0.5 THEN true ELSE false END AS is_my_player
+
+                // Aggregate goals at fixture level
+                WITH t, f,
+                     sum(CASE WHEN is_my_player THEN r.goals_scored ELSE 0 END) AS my_goals,
+                     sum(CASE WHEN NOT is_my_player THEN r.goals_scored ELSE 0 END) AS opp_goals,
+                     sum(CASE WHEN is_my_player THEN r.own_goals ELSE 0 END) AS my_own_goals,
+                     sum(CASE WHEN NOT is_my_player THEN r.own_goals ELSE 0 END) AS opp_own_goals
+
+                // Goals For = my goals + opponent own goals
+                // Goals Against = opponent goals + my own goals
+                WITH t, f,
+                     my_goals + opp_own_goals AS GF,
+                     opp_goals + my_own_goals AS GA
+
+                // Calculate results per fixture
+                WITH t,
+                     CASE WHEN GF > GA THEN 1 ELSE 0 END AS Win,
+                     CASE WHEN GF = GA THEN 1 ELSE 0 END AS Draw,
+                     CASE WHEN GF < GA THEN 1 ELSE 0 END AS Loss,
+                     CASE WHEN GA = 0 THEN 1 ELSE 0 END AS CleanSheet,
+                     GF, GA
+
+                // Aggregate across all fixtures
+                RETURN
+                    t.name AS Team,
+                    count(*) AS Played,
+                    sum(Win) AS W,
+                    sum(Draw) AS D,
+                    sum(Loss) AS L,
+                    sum(GF) AS GoalsFor,
+                    sum(GA) AS GoalsAgainst,
+                    sum(GF) - sum(GA) AS GD,
+                    sum(CleanSheet) AS CS
+                ORDER BY W DESC, GD DESC
+                """,
+
+    "squad_list": """
+                UNWIND $team_names AS t_name
+                MATCH (t:Team) WHERE toLower(t.name) CONTAINS toLower(t_name)
+                MATCH (t)<-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]-(f:Fixture)<-[r:PLAYED_IN]-(p:Player)
+                WHERE r.season = $season
+                MATCH (p)-[:PLAYS_AS]->(pos:Position)
+
+                WITH DISTINCT p, t, pos, sum(r.total_points) AS TotalPoints
+                ORDER BY TotalPoints DESC
+
+                RETURN
+                    t.name AS Team,
+                    p.player_name AS Player,
+                    pos.name AS Position,
+                    TotalPoints
+                LIMIT 20
+                """,
+
+    "gameweek_schedule": """
+                MATCH (f:Fixture)
+                WHERE f.season = $season AND f.gw >= $gw_start AND f.gw <= $gw_end
+                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
+                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
+
+                RETURN
+                    f.gw AS Gameweek,
+                    f.kickoff_time AS Date,
+                    h.name AS Home,
+                    a.name AS Away
+                ORDER BY f.kickoff_time ASC
+                """,
+
+    "gameweek_analysis": """
+                MATCH (p:Player)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE r.season = $season AND r.gw >= $gw_start AND r.gw <= $gw_end AND r.minutes > 0
+
+                WITH r.gw AS Gameweek,
+                     count(DISTINCT f) AS FixturesPlayed,
+                     sum(r.goals_scored) AS TotalGoals,
+                     p.player_name AS Player,
+                     sum(r.total_points) AS PlayerPoints
+
+                ORDER BY PlayerPoints DESC
+                LIMIT 10
+
+                RETURN Gameweek, FixturesPlayed, TotalGoals, Player, PlayerPoints
+                """,
+
+    "head_to_head": """
+                WITH $team_names AS teams
+                WHERE size(teams) >= 2
+                WITH teams[0] AS team1_name, teams[1] AS team2_name
+
+                MATCH (t1:Team) WHERE toLower(t1.name) CONTAINS toLower(team1_name)
+                MATCH (t2:Team) WHERE toLower(t2.name) CONTAINS toLower(team2_name)
+
+                // Every season: start from the two teams, not from the fixtures
+                MATCH (t1)<-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]-(f:Fixture)-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]->(t2)
+                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
+                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
+
+                MATCH (p:Player)-[r:PLAYED_IN]->(f)
+                WHERE r.minutes > 0
+
+                WITH f, h, a,
+                     sum(r.goals_scored) AS TotalGoals,
+                     collect(CASE WHEN r.goals_scored > 0
+                             THEN {player: p.player_name, goals: r.goals_scored}
+                             ELSE NULL END) AS AllScorers
+
+                RETURN
+                    f.season AS Season,
+                    f.gw AS Gameweek,
+                    f.kickoff_time AS Kickoff,
+                    h.name AS Home,
+                    a.name AS Away,
+                    TotalGoals,
+                    [scorer IN AllScorers WHERE scorer IS NOT NULL] AS GoalScorers
+                ORDER BY f.kickoff_time ASC
+                """,
+
+    # Fallback for Similar_Players when NumPy is not installed (semantic mode
+    # only); otherwise similarity.py answers from per-90 stat vectors.
+    # Index name and embedding property are parameters, not spliced text
+    "similar_players": """
+                MATCH (target:Player)
+                WHERE toLower(target.player_name) CONTAINS toLower($target_name)
+
+                WITH target, target[$emb_field] AS targetVec
+                WHERE targetVec IS NOT NULL
+
+                CALL db.index.vector.queryNodes($index, 10, targetVec)
+                YIELD node AS similar, score
+
+                WHERE similar.player_name <> target.player_name AND score > 0.7
+
+                MATCH (similar)-[:PLAYS_AS]->(pos:Position)
+                OPTIONAL MATCH (similar)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE r.season = $season
+
+                RETURN
+                    similar.player_name AS Player,
+                    pos.name AS Position,
+                    round(score, 3) AS Similarity,
+                    sum(r.total_points) AS Points
+                ORDER BY Similarity DESC
+                LIMIT 5
+                """,
+
+    "underlying_stats": f"""
+                UNWIND $names AS search_name
+                MATCH (p:Player)
+                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
+
+                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE {PARTITION_FILTER} AND r.minutes > 0
+
+                RETURN
+                    p.player_name AS Player,
+                    count(r) AS Matches,
+                    round(avg(toFloat(r.ict_index)), 2) AS AvgICT,
+                    round(avg(toFloat(r.influence)), 2) AS AvgInfluence,
+                    round(avg(toFloat(r.creativity)), 2) AS AvgCreativity,
+                    round(avg(toFloat(r.threat)), 2) AS AvgThreat,
+                    sum(r.total_points) AS TotalPoints
+                ORDER BY AvgICT DESC
+                """,
+
+    "captaincy_pick": """
+                MATCH (f:Fixture) WHERE f.season = $season
+                WITH max(f.gw) AS latestGW
+
+                MATCH (p:Player)-[r:PLAYED_IN]->(:Fixture)
+                WHERE r.season = $season
+                  AND r.gw >= coalesce($gw_start, latestGW - $window + 1)
+                  AND r.gw <= coalesce($gw_end, latestGW)
+                  AND r.minutes >= 60
+
+                MATCH (p)-[:PLAYS_AS]->(pos:Position)
+
+                WITH p, pos,
+                     count(r) AS RecentMatches,
+                     sum(r.total_points) AS RecentPoints,
+                     avg(r.total_points) AS AvgPoints,
+                     sum(r.goals_scored) AS Goals,
+                     sum(r.assists) AS Assists
+
+                WHERE RecentMatches >= $min_matches
+
+                RETURN
+                    p.player_name AS Player,
+                    pos.name AS Position,
+                    RecentMatches,
+                    RecentPoints,
+                    round(AvgPoints, 2) AS PointsPerGame,
+                    Goals,
+                    Assists
+                ORDER BY AvgPoints DESC
+                LIMIT 10
+                """,
+
+    "bonus_points": f"""
+                MATCH (p:Player)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE {PARTITION_FILTER} AND r.bonus > 0
+
+                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
+                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
+
+                RETURN
+                    p.player_name AS Player,
+                    r.bonus AS BonusPoints,
+                    r.bps AS BPS,
+                    h.name + ' vs ' + a.name AS Match,
+                    r.total_points AS TotalPoints
+                ORDER BY r.bonus DESC, r.bps DESC
+                LIMIT 20
+                """,
+}
+
+# Top_Ranked: one template per sort column. An empty $aliases list means
+# "all positions", which replaces the old optional position WHERE clause.
+_TOP_RANKED = """
+                MATCH (p:Player)-[:PLAYS_AS]->(pos:Position)
+                WHERE size($aliases) = 0 OR any(alias IN $aliases WHERE
+                    toLower(pos.name) = toLower(alias) OR
+                    toLower(pos.name) CONTAINS toLower(alias) OR
+                    toLower(alias) CONTAINS toLower(pos.name)
+                )
+
+                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
+                WHERE {partition_filter} AND r.minutes > 0
+
+                WITH p, pos,
+                     count(r) AS Matches,
+                     sum(r.total_points) AS Points,
+                     sum(r.goals_scored) AS Goals,
+                     sum(r.assists) AS Assists,
+                     sum(r.clean_sheets) AS CleanSheets,
+                     sum(r.saves) AS Saves
+
+                RETURN
+                    p.player_name AS Player,
+                    pos.name AS Position,
+                    Matches, Points, Goals, Assists, CleanSheets
+                ORDER BY {sort_key} DESC
+                LIMIT 10
+                """
+
+for _key in SORT_KEYS:
+    TEMPLATES[f"top_ranked:{_key}"] = _TOP_RANKED.format(partition_filter=PARTITION_FILTER, sort_key=_key)
+
+
+def get_template(name):
+    """Returns the Cypher text for a catalogue entry (KeyError if unknown)."""
+    return TEMPLATES[name]
+
+
+def gameweek_range(value):
+    """
+    The parser's Gameweek entity as an inclusive (start, end), or None when no
+    gameweek was given: 12 / "12" / "GW12" -> (12, 12), "5-10" / "GW5 to GW10"
+    -> (5, 10). A (start, end) pair is returned sorted.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (tuple, list)):
+        start, end = (int(v) for v in value)
+        return min(start, end), max(start, end)
+    if isinstance(value, (int, float)):
+        return int(value), int(value)
+    text = str(value).strip()
+    match = GAMEWEEK_RANGE.match(text)
+    if match:
+        start, end = sorted((int(match.group(1)), int(match.group(2))))
+        return start, end
+    match = re.search(r"\d+", text)
+    return (int(match.group()),) * 2 if match else None
+
+
+# Representative parameters for EXPLAIN. Values are never read, but the
+# types match what query_knowledge_graph sends so the cached plan is reused.
+WARMUP_PARAMS = {
+    "season": "2022-23", "names": ["warmup"], "team_names": ["warmup", "warmup"],
+    "aliases": ["MID"], "raw": "warmup", "index": "player_idx_a", "vec": [0.0],
+    "target_name": "warmup", "name": "warmup", "emb_field": "embedding_a",
+    "window": 5, "min_matches": 2,
+}
+
+# Neo4j keys cached plans by parameter types too, so a whole-season question
+# (null range) and a gameweek question (int range) are planned separately
+WARMUP_VARIANTS = (
+    {"gw_start": 1, "gw_end": 5},
+    {"gw_start": None, "gw_end": None},
+)
+
+
+# =============================================================================
+# PLAN-CACHE ACCOUNTING
+# =============================================================================
+
+class PlanCacheStats:
+    """
+    Per-template execution counts and two plan-cache hit rates.
+
+    assumed: the template text was already planned in this process (by
+    warm_plan_cache or an earlier run). It is a proxy: Neo4j does not tell
+    the driver whether a run was planned or served from its query cache.
+
+    confirmed: the run's server-side time to first row
+    (result_available_after, which includes planning) was below the
+    template's planning cost as measured at warm-up (cold EXPLAIN minus a
+    cached EXPLAIN), so it cannot have been re-planned. Slower runs are not
+    counted as misses; execution time alone can exceed the planning cost.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._planned = set()
+        self._planning_ms = {}
+        self._rows = {}
+
+    def mark_planned(self, name, planning_ms=None):
+        with self._lock:
+            self._planned.add(name)
+            if planning_ms is not None:
+                self._planning_ms[name] = max(planning_ms, self._planning_ms.get(name, 0.0))
+
+    def record(self, name, available_after_ms=None):
+        """Counts one run; returns whether it is an (assumed) plan-cache hit."""
+        with self._lock:
+            hit = name in self._planned
+            self._planned.add(name)
+            planning_ms = self._planning_ms.get(name)
+            confirmed = bool(planning_ms and available_after_ms is not None and available_after_ms < planning_ms)
+            row = self._rows.setdefault(name, {"runs": 0, "hits": 0, "confirmed": 0, "first_ms": None,
+                                               "available_ms": 0.0})
+            row["runs"] += 1
+            row["hits"] += hit
+            row["confirmed"] += confirmed
+            if available_after_ms is not None:
+                if row["first_ms"] is None:
+                    row["first_ms"] = available_after_ms
+                row["available_ms"] += available_after_ms
+        labels = {"template": name}
+        METRICS.inc("fpl_plan_cache_assumed_hits_total" if hit else "fpl_plan_cache_assumed_misses_total", labels)
+        if confirmed:
+            METRICS.inc("fpl_plan_cache_confirmed_hits_total", labels)
+        return hit
+
+    def _rate(self, key):
+        with self._lock:
+            runs = sum(r["runs"] for r in self._rows.values())
+            hits = sum(r[key] for r in self._rows.values())
+        return hits / runs if runs else None
+
+    def hit_rate(self):
+        """Assumed hit rate (template planned before in this process)."""
+        return self._rate("hits")
+
+    def confirmed_hit_rate(self):
+        """Lower bound: runs too fast to include planning."""
+        return self._rate("confirmed")
+
+    def stats(self):
+        """Rows for the sidebar / service health (one per template run so far)."""
+        with self._lock:
+            items = [(name, dict(row), self._planning_ms.get(name)) for name, row in self._rows.items()]
+        rows = []
+        for name, row, planning_ms in sorted(items):
+            rows.append({
+                "template": name,
+                "runs": row["runs"],
+                "assumed_hit_rate": round(row["hits"] / row["runs"], 3),
+                "confirmed_hit_rate": round(row["confirmed"] / row["runs"], 3),
+                "planning_ms": planning_ms,
+                "first_ms": row["first_ms"],
+                "avg_available_ms": round(row["available_ms"] / row["runs"], 2),
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._planned.clear()
+            self._planning_ms.clear()
+            self._rows.clear()
+
+
+PLAN_CACHE = PlanCacheStats()
+
+
+def warm_plan_cache(session, names=None):
+    """
+    Plans every catalogue entry with EXPLAIN (nothing is executed), once per
+    WARMUP_VARIANTS parameter shape. Each variant is explained twice: the
+    server-side time of the first minus the second (served from the query
+    cache) is the template's planning cost, which PlanCacheStats uses to
+    confirm later hits. Returns {template: planning ms or "error: ..."}.
+    """
+    timings = {}
+    for name in names or TEMPLATES:
+        planning = []
+        try:
+            for variant in WARMUP_VARIANTS:
+                params = {**WARMUP_PARAMS, **variant}
+                cold = session.run(f"EXPLAIN {TEMPLATES[name]}", params).consume().result_available_after
+                warm = session.run(f"EXPLAIN {TEMPLATES[name]}", params).consume().result_available_after
+                if cold is not None and warm is not None:
+                    planning.append(max(cold - warm, 0))
+        except Exception as e:
+            timings[name] = f"error: {e}"
+            continue
+        # The cheaper variant bounds what a run may take without being re-planned
+        timings[name] = min(planning) if planning else None
+        PLAN_CACHE.mark_planned(name, timings[name])
+    return timings
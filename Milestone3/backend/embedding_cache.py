@@ -0,0 +1,256 @@
+"""
+Embedding Cache Module for FPL Graph-RAG Assistant
+Two-tier cache for semantic name resolution: an in-process LRU in front of
+a SQLite file shared by every worker. It stores query vectors keyed by
+(model, normalised name) and the player each name finally resolved to.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from .config import Config
+from .tracing import METRICS
+
+
+# "database is locked" / "busy" are retried with exponential backoff; other
+# SQLite errors (bad file, schema) turn the disk tier off for the process
+DISK_RETRIES = 3
+DISK_BACKOFF = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    key TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, key)
+);
+CREATE TABLE IF NOT EXISTS resolutions (
+    model TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    resolved TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, scope, key)
+);
+"""
+
+
+def normalize_key(text):
+    """Case/whitespace-insensitive key (both embedding models are uncased)."""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).lower().split())
+
+
+def _is_contention(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _encode_vector(vector):
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(blob):
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """LRU (per process) over SQLite (per host). Thread-safe."""
+
+    def __init__(self, path=None, capacity=None):
+        self.path = path or Config.EMBEDDING_CACHE_PATH
+        self.capacity = capacity or Config.EMBEDDING_CACHE_SIZE
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+        self._disk_ok = True
+
+    # -------------------------------------------------------------------------
+    # Tiers
+    # -------------------------------------------------------------------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _disk(self, sql, params, fetch=False):
+        """
+        Runs one statement. Lock contention is retried; after the retries the
+        statement is skipped. Any other SQLite error degrades the cache to
+        memory only.
+        """
+        if not self._disk_ok:
+            return None
+        for attempt in range(DISK_RETRIES + 1):
+            try:
+                conn = self._conn()
+                if fetch:
+                    return conn.execute(sql, params).fetchone()
+                with conn:
+                    conn.execute(sql, params)
+                return None
+            except sqlite3.OperationalError as e:
+                if _is_contention(e) and attempt < DISK_RETRIES:
+                    time.sleep(DISK_BACKOFF * 2 ** attempt)
+                    continue
+                print(f"Embedding Cache Error: {e}")
+                if not _is_contention(e):
+                    self._disk_ok = False
+                return None
+            except sqlite3.Error as e:
+                print(f"Embedding Cache Error: {e}")
+                self._disk_ok = False
+                return None
+        return None
+
+    def _memory_get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return True, self._memory[key]
+        return False, None
+
+    def _memory_put(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+    def _record(self, model, kind, tier, elapsed_ms=0.0):
+        with self._lock:
+            stats = self._stats.setdefault(model, {
+                "embed_lookups": 0, "embed_memory_hits": 0, "embed_disk_hits": 0,
+                "resolve_lookups": 0, "resolve_hits": 0,
+                "encode_ms_total": 0.0, "encodes": 0, "saved_ms": 0.0,
+            })
+            stats[f"{kind}_lookups"] += 1
+            if kind == "embed" and tier == "miss":
+                stats["encode_ms_total"] += elapsed_ms
+                stats["encodes"] += 1
+            elif tier != "miss":
+                stats["resolve_hits" if kind == "resolve" else f"embed_{tier}_hits"] += 1
+                # Any hit saves one encode at this model's average encode time
+                if stats["encodes"]:
+                    saved = max(0.0, stats["encode_ms_total"] / stats["encodes"] - elapsed_ms)
+                    stats["saved_ms"] += saved
+                    METRICS.inc("fpl_embedding_cache_saved_ms_total", {"model": model}, saved)
+        METRICS.inc("fpl_embedding_cache_total", {"model": model, "kind": kind, "result": tier})
+
+    def stats(self):
+        """Per-model hit rates and milliseconds saved since process start."""
+        with self._lock:
+            snapshot = {m: dict(s) for m, s in self._stats.items()}
+        rows = []
+        for model, s in snapshot.items():
+            hits = s["embed_memory_hits"] + s["embed_disk_hits"]
+            rows.append({
+                "model": model,
+                "embed_lookups": s["embed_lookups"],
+                "embed_hit_rate": round(hits / s["embed_lookups"], 3) if s["embed_lookups"] else 0.0,
+                "memory_hits": s["embed_memory_hits"],
+                "disk_hits": s["embed_disk_hits"],
+                "resolve_hit_rate": round(s["resolve_hits"] / s["resolve_lookups"], 3) if s["resolve_lookups"] else 0.0,
+                "avg_encode_ms": round(s["encode_ms_total"] / s["encodes"], 2) if s["encodes"] else 0.0,
+                "saved_ms": round(s["saved_ms"], 1),
+            })
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+    def embed(self, embedder, model, text):
+        """Returns embedder.embed_query(normalised text), from cache when possible."""
+        key = normalize_key(text)
+        t0 = time.perf_counter()
+
+        found, vector = self._memory_get(("embed", model, key))
+        if found:
+            self._record(model, "embed", "memory", (time.perf_counter() - t0) * 1000)
+            return vector
+
+        row = self._disk("SELECT vector FROM embeddings WHERE model = ? AND key = ?", (model, key), fetch=True)
+        if row:
+            vector = _decode_vector(row[0])
+            self._memory_put(("embed", model, key), vector)
+            self._record(model, "embed", "disk", (time.perf_counter() - t0) * 1000)
+            return vector
+
+        t_encode = time.perf_counter()
+        vector = embedder.embed_query(key)
+        self._record(model, "embed", "miss", (time.perf_counter() - t_encode) * 1000)
+        self._memory_put(("embed", model, key), vector)
+        self._disk(
+            "INSERT OR REPLACE INTO embeddings (model, key, vector, created_at) VALUES (?, ?, ?, ?)",
+            (model, key, _encode_vector(vector), time.time())
+        )
+        return vector
+
+    def get_resolution(self, model, scope, text):
+        """
+        Returns (found, resolved_name). scope identifies the index and data
+        version the answer came from, so a re-export or graph reload
+        invalidates it; entries older than Config.RESOLUTION_CACHE_TTL are
+        ignored as well. resolved_name is None when the name had no match
+        above the threshold.
+        """
+        key = normalize_key(text)
+        t0 = time.perf_counter()
+        oldest = time.time() - Config.RESOLUTION_CACHE_TTL
+        found, entry = self._memory_get(("resolve", model, scope, key))
+        if found and entry[1] < oldest:
+            found = False
+        if not found:
+            row = self._disk(
+                "SELECT resolved, created_at FROM resolutions WHERE model = ? AND scope = ? AND key = ?",
+                (model, scope, key), fetch=True
+            )
+            if row and row[1] >= oldest:
+                found, entry = True, (row[0], row[1])
+                self._memory_put(("resolve", model, scope, key), entry)
+        self._record(model, "resolve", "hit" if found else "miss", (time.perf_counter() - t0) * 1000)
+        return found, entry[0] if found else None
+
+    def put_resolution(self, model, scope, text, resolved):
+        key = normalize_key(text)
+        created = time.time()
+        self._memory_put(("resolve", model, scope, key), (resolved, created))
+        self._disk(
+            "INSERT OR REPLACE INTO resolutions (model, scope, key, resolved, created_at) VALUES (?, ?, ?, ?, ?)",
+            (model, scope, key, resolved, created)
+        )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Process-wide cache, or None when FPL_EMBEDDING_CACHE=0."""
+    global _cache
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,221 @@
+"""
+Embeddings Module for FPL Graph-RAG Assistant
+Creates (and caches) the query-time embedder for each model. The default is
+the PyTorch HuggingFaceEmbeddings pipeline; with FPL_EMBEDDING_BACKEND=onnx
+(or onnx-int8) queries are encoded by ONNX Runtime from a model exported
+once with export_onnx.py, without importing torch.
+"""
+
+import json
+import os
+import threading
+
+from .config import Config
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = None
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Minimum cosine between ONNX and torch vectors for the same text
+TOLERANCE = {"onnx": 0.9999, "onnx-int8": 0.98}
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+
+def onnx_model_dir(model_name):
+    return os.path.join(Config.ONNX_MODEL_DIR, model_name)
+
+
+def onnx_model_file(backend):
+    return "model.int8.onnx" if backend == "onnx-int8" else "model.onnx"
+
+
+# =============================================================================
+# ONNX RUNTIME EMBEDDER
+# =============================================================================
+
+class OnnxEmbeddings:
+    """
+    Mean-pooled, L2-normalised sentence embeddings from an exported
+    transformer, with the same embed_query/embed_documents interface as
+    HuggingFaceEmbeddings.
+    """
+
+    def __init__(self, model_name, backend="onnx", threads=None):
+        directory = onnx_model_dir(model_name)
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.model_name = model_name
+        self.backend = backend
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.meta["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.meta["pad_token_id"], pad_token=self.meta["pad_token"])
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads if threads is not None else Config.ONNX_INTRA_OP_THREADS
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(directory, onnx_model_file(backend)),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(texts))
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {k: v for k, v in feeds.items() if k in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalise (sentence-transformers)
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# =============================================================================
+# FACTORY
+# =============================================================================
+
+def _torch_embedder(model_name):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _onnx_unavailable(model_name, backend):
+    """Why the ONNX backend cannot serve this model (None if it can)."""
+    if ort is None:
+        return "onnxruntime/tokenizers not installed (pip install '.[onnx]')"
+    model_path = os.path.join(onnx_model_dir(model_name), onnx_model_file(backend))
+    if not os.path.exists(model_path):
+        return f"{model_path} not found (run export_onnx.py)"
+    return None
+
+
+def _create_embedder(model_name, backend):
+    """Returns (embedder, backend actually built); ONNX falls back to torch."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend != "torch":
+        reason = _onnx_unavailable(model_name, backend)
+        if reason is None:
+            return OnnxEmbeddings(model_name, backend), backend
+        print(f"⚠️ {reason}, using torch embeddings.")
+        if (model_name, "torch") in _embedders:
+            return _embedders[(model_name, "torch")], "torch"
+    return _torch_embedder(model_name), "torch"
+
+
+def get_embedder(model_name, backend=None):
+    """
+    Returns a cached embedder for the model. Loading a model is the expensive
+    part of a semantic query, so each process builds one per model/backend;
+    an ONNX request that falls back to torch shares the torch embedder.
+    Use embedder_backend() for the backend actually serving it.
+    Returns None if no backend is installed.
+    """
+    backend = backend or Config.EMBEDDING_BACKEND
+    key = (model_name, backend)
+    if key not in _embedders:
+        with _embedders_lock:
+            if key not in _embedders:
+                try:
+                    embedder, built = _create_embedder(model_name, backend)
+                except ImportError:
+                    return None
+                _embedders.setdefault((model_name, built), embedder)
+                _embedders[key] = embedder
+    return _embedders[key]
+
+
+def embedder_backend(embedder):
+    """The backend that actually encodes with this embedder (torch or onnx/onnx-int8)."""
+    return getattr(embedder, "backend", "torch")
+
+
+# =============================================================================
+# EXPORT AND VERIFICATION
+# =============================================================================
+
+def export_onnx(model_name, quantize=True, opset=17):
+    """
+    Exports a sentence-transformers model's transformer to ONNX (dynamic batch
+    and sequence axes), saves its fast tokenizer, and optionally writes a
+    dynamically int8-quantised copy. Needs torch and sentence-transformers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    directory = onnx_model_dir(model_name)
+    os.makedirs(directory, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(directory)
+
+    sample = tokenizer(["Player: Mohamed Salah"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(directory, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, os.path.join(directory, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "inputs": input_names,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "quantized": quantize,
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return directory
+
+
+def compare_embedders(reference, candidate, texts):
+    """
+    Encodes texts with both embedders. Returns (min_cosine, max_abs_diff)
+    over the batch.
+    """
+    ref = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    cand = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    ref /= np.linalg.norm(ref, axis=1, keepdims=True)
+    cand /= np.linalg.norm(cand, axis=1, keepdims=True)
+    cosine = (ref * cand).sum(axis=1)
+    return float(cosine.min()), float(np.abs(ref - cand).max())
@@ -1,12 +1,20 @@
 import json
 import re
 from .config import groq_client, Config
+from .tracing import span, mark_error
+from .rate_limits import SCHEDULER, completion_tokens_used
 
+# Completion budget assumed for the JSON reply when reserving rate-limit tokens
+INTENT_REPLY_TOKENS = 200
 
-def parse_user_intent(user_input):
+
+def parse_user_intent(user_input, context=None):
     """
     Analyzes user input to determine the Intent and Entities.
     Returns dict with: intent, entities, user_query
+
+    context is the previous turn rendered by conversation.format_context,
+    so follow-ups ("what about his assists?") can be resolved.
     """
     
     system_prompt = """
@@ -32,24 +40,71 @@ Step 1: Identify the INTENT from this list:
 Step 2: Extract ENTITIES exactly as typed (DO NOT correct spelling):
 - "Player": List of player names exactly as user typed them
 - "Team": List of team names exactly as user typed them  
-- "Season": Use format "2021-22" or "2022-23"
-- "Gameweek": e.g. "12"
+- "Season": Use format "2022-23"; keep relative phrases such as "last season" as typed
+- "Gameweek": a single gameweek e.g. "12", or a range e.g. "5-10" for "GW5 to GW10"
+- "Window": number of recent gameweeks for form questions, e.g. "last 3 gameweeks" -> "3"
 - "Position": e.g. "Defender", "Midfielder", "Forward", "GKP"
-- "Metric": e.g. "goals", "points", "assists", "clean sheets"
+- "Metric": e.g. "goals", "points", "assists", "clean sheets", "predicted points"
+
+Step 3: If the query asks for SEVERAL different things (e.g. "compare Salah and Kane, and show GW5 fixtures"),
+also return "sub_intents": one object per part with its own "intent", "entities" and "question" (the part of the
+query it answers). The top-level intent/entities repeat the first part. Omit "sub_intents" for single questions.
 
 OUTPUT: Return ONLY valid JSON.
 Example: {"intent": "Player_Stats", "entities": {"Player": ["Salah"], "Season": "2022-23"}}
+Example: {"intent": "Compare_Players", "entities": {"Player": ["Salah", "Kane"]},
+          "sub_intents": [
+            {"intent": "Compare_Players", "entities": {"Player": ["Salah", "Kane"]}, "question": "compare Salah and Kane"},
+            {"intent": "Gameweek_Schedule", "entities": {"Gameweek": "5"}, "question": "show GW5 fixtures"}
+          ]}
 """
     
+    with span("parse_user_intent", provider="groq", model=Config.MODEL_GROQ,
+              query_chars=len(user_input)) as s:
+        parsed = _call_intent_llm(system_prompt, user_input, context)
+        s.update(intent=parsed["intent"], entity_keys=sorted(parsed["entities"].keys()),
+                 sub_intents=[sub["intent"] for sub in parsed["sub_intents"]] or None)
+        return parsed
+
+
+def normalize_sub_intents(parsed, user_input):
+    """
+    Cleans the optional sub_intents list: each part gets intent, entities and
+    its own user_query. Fewer than two usable parts means a single question.
+    """
+    subs = []
+    for sub in parsed.get("sub_intents") or []:
+        if not isinstance(sub, dict) or not sub.get("intent"):
+            continue
+        subs.append({
+            "intent": sub["intent"],
+            "entities": sub.get("entities") if isinstance(sub.get("entities"), dict) else {},
+            "user_query": sub.get("question") or user_input,
+        })
+    subs = subs[:Config.MAX_SUB_INTENTS]
+    if len(subs) < 2:
+        return []
+    return subs
+
+
+def _call_intent_llm(system_prompt, user_input, context=None):
+    """Sends the classification prompt to Groq and normalises the JSON reply."""
+    messages = [{"role": "system", "content": system_prompt}]
+    if context:
+        messages.append({"role": "system", "content": f"CONVERSATION CONTEXT:\n{context}"})
+    messages.append({"role": "user", "content": user_input})
     try:
-        completion = groq_client.chat.completions.create(
-            model=Config.MODEL_GROQ,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0,
-            response_format={"type": "json_object"}
+        completion = SCHEDULER.call(
+            "groq",
+            lambda: groq_client.chat.completions.create(
+                model=Config.MODEL_GROQ,
+                messages=messages,
+                temperature=0,
+                response_format={"type": "json_object"}
+            ),
+            prompt_chars=sum(len(m["content"]) for m in messages),
+            max_completion_tokens=INTENT_REPLY_TOKENS,
+            usage=completion_tokens_used,
         )
         
         content = completion.choices[0].message.content.strip()
@@ -63,16 +118,18 @@ Example: {"intent": "Player_Stats", "entities": {"Player": ["Salah"], "Season":
         parsed = json.loads(content)
         
         # Ensure required fields exist
-        if "intent" not in parsed:
+        if not parsed.get("intent"):
             parsed["intent"] = "General_Chat"
-        if "entities" not in parsed:
+        if not isinstance(parsed.get("entities"), dict):
             parsed["entities"] = {}
         
         # Pass through original query for downstream processing
         parsed["user_query"] = user_input
+        parsed["sub_intents"] = normalize_sub_intents(parsed, user_input)
 
         return parsed
 
     except Exception as e:
         print(f"Intent Parser Error: {e}")
-        return {"intent": "General_Chat", "entities": {}, "user_query": user_input}
\ No newline at end of file
+        mark_error(e)
+        return {"intent": "General_Chat", "entities": {}, "user_query": user_input, "sub_intents": []}
\ No newline at end of file
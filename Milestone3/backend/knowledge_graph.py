@@ -3,20 +3,81 @@ Knowledge Graph Query Module for FPL Graph-RAG Assistant
 Handles all Neo4j queries with baseline and semantic retrieval modes.
 """
 
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from neo4j import GraphDatabase
 from difflib import get_close_matches
 from .config import Config
+from .tracing import span, current_span, mark_error
+from .slow_query_log import record_if_slow
+from .cypher_templates import GAMEWEEK_RANGE, PLAN_CACHE, gameweek_range, get_template, warm_plan_cache
+from .leaderboards import load_leaderboards, lookup_leaderboard
+from .embeddings import embedder_backend, get_embedder
+from .embedding_cache import get_embedding_cache
+from .seasons import get_season_registry
 
 try:
-    from langchain_huggingface import HuggingFaceEmbeddings
+    from .columnar import COLUMNAR_INTENTS, get_columnar_store
+    from .rolling_form import get_season_form
+    from .predictions import get_gameweek_predictions
+    from .similarity import get_similarity_engine
+    from .vector_store import INDEX_FIELDS, get_local_index
 except ImportError:
-    HuggingFaceEmbeddings = None
+    # NumPy missing: columnar mode falls back to Cypher
+    COLUMNAR_INTENTS = set()
+
+    def get_local_index():
+        return None
 
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def get_driver():
+    """
+    Process-wide Neo4j driver. The driver keeps a connection pool and is
+    thread-safe; each request opens (and closes) its own session on it.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(
+                    Config.NEO4J_URI,
+                    auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD),
+                    max_connection_pool_size=Config.NEO4J_POOL_SIZE
+                )
+    return _driver
+
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+def warm_query_plans():
+    """
+    Plans the whole Cypher template catalogue with EXPLAIN so the first
+    real questions skip query planning. Returns per-template planning ms
+    (server-side, cold minus cached EXPLAIN).
+    """
+    if not Config.PLAN_CACHE_WARMUP:
+        return None
+    with get_driver().session() as session:
+        return warm_plan_cache(session)
+
+
 def get_search_aliases(db_code):
     """Expands position code to aliases for flexible matching."""
     code = db_code.upper()
@@ -29,8 +90,11 @@ def get_search_aliases(db_code):
     return alias_map.get(code, [code])
 
 
-def resolve_position(session, raw_pos):
-    """Converts user position input to database-compatible aliases."""
+def resolve_position(session, raw_pos, db_positions=None):
+    """
+    Converts user position input to database-compatible aliases.
+    db_positions can be passed in to skip the Position lookup query.
+    """
     if not raw_pos:
         return []
     
@@ -47,8 +111,8 @@ def resolve_position(session, raw_pos):
         if key in raw:
             return get_search_aliases(code)
 
-    result = session.run("MATCH (p:Position) RETURN p.name AS name")
-    db_positions = [r["name"] for r in result]
+    if db_positions is None:
+        db_positions = [r["name"] for r in run_resolver(session, "position_names")]
 
     for pos in db_positions:
         if raw == pos.lower():
@@ -69,91 +133,316 @@ def resolve_team(session, raw_name):
     raw_name = raw_name.strip()
     raw_lower = raw_name.lower()
 
-    cypher_query = """
-    MATCH (t:Team)
-    WHERE toLower(t.name) = $raw 
-       OR toLower(t.name) CONTAINS $raw
-       OR all(term IN split($raw, ' ') WHERE toLower(t.name) CONTAINS term)
-    RETURN t.name AS Name 
-    LIMIT 1
-    """
-    result = session.run(cypher_query, {"raw": raw_lower})
-    record = result.single()
+    rows = run_resolver(session, "resolve_team", {"raw": raw_lower})
+    if rows:
+        return rows[0]["Name"]
 
-    if record:
-        return record["Name"]
-
-    result = session.run("MATCH (t:Team) RETURN t.name AS name")
-    db_teams = [r["name"] for r in result]
+    db_teams = [r["name"] for r in run_resolver(session, "team_names")]
 
     matches = get_close_matches(raw_name, db_teams, n=1, cutoff=0.6)
     return matches[0] if matches else raw_name
 
 
-def resolve_player_names_semantic(session, raw_names, embedder, index_name):
+def normalize_season(raw_season):
+    """Maps free-text season input to a season in the graph (defaults to the latest)."""
+    return get_season_registry().resolve(raw_season)
+
+
+# Default Captaincy_Pick form window (the original "last 5 gameweeks")
+DEFAULT_FORM_WINDOW = 5
+
+
+def parse_form_window(gameweek=None, window=None, latest_gw=None):
+    """
+    Turns the parser's Gameweek/Window entities into an inclusive (start, end).
+
+    - Gameweek "5-10"          -> (5, 10)
+    - Gameweek "20", Window 4  -> (17, 20)  (form as of GW20)
+    - Window "last 3"          -> (latest-2, latest)
+    - nothing                  -> last DEFAULT_FORM_WINDOW gameweeks
+
+    Returns None when the end depends on latest_gw and it is unknown.
+    """
+    size = _first_int(window) or DEFAULT_FORM_WINDOW
+    gw_range = gameweek_range(gameweek)
+    if gw_range and GAMEWEEK_RANGE.match(str(gameweek).strip()):
+        return gw_range
+
+    end = gw_range[1] if gw_range else latest_gw
+    if end is None:
+        return None
+    return max(1, end - size + 1), end
+
+
+def form_min_matches(start, end):
+    """At least 3 qualifying matches, or every gameweek for shorter windows."""
+    return min(3, max(1, end - start + 1))
+
+
+def _first_int(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d+", str(value))
+    return int(match.group()) if match else None
+
+
+def resolve_sort_metric(target_metric, aliases):
+    """Picks the Top_Ranked sort column (Points/Goals/Assists/CleanSheets/Saves)."""
+    sort_key = "Points"
+    is_keeper_query = aliases and "GKP" in aliases
+
+    if target_metric:
+        tm = target_metric.lower()
+        if "goal" in tm and not is_keeper_query:
+            sort_key = "Goals"
+        elif "assist" in tm:
+            sort_key = "Assists"
+        elif "clean" in tm:
+            sort_key = "CleanSheets"
+        elif "save" in tm:
+            sort_key = "Saves"
+    return sort_key
+
+
+# Metric / question wording that asks for model predictions instead of totals
+PREDICTION_PATTERN = re.compile(r"\b(predict\w*|projected|expected points|xp|xpts)\b", re.IGNORECASE)
+
+# Intents that can be answered from the expected-points model
+PREDICTION_INTENTS = {"Top_Ranked", "Captaincy_Pick"}
+
+
+# Question wording that turns a two-team question into Head_to_Head
+HEAD_TO_HEAD_WORDS = ("h2h", " vs ", "versus", "head to head", "against")
+
+
+def wants_predicted_points(target_metric, user_query=""):
+    return bool(PREDICTION_PATTERN.search(f"{target_metric or ''} {user_query or ''}"))
+
+
+def route_intent(structured_data):
+    """
+    (intent, predicted): the intent actually answered after the overrides
+    for common misclassifications, and whether it is answered with
+    predicted points. Both depend on the question's wording, not just the
+    parsed entities, so conversation memory keys cached rows on them.
+    """
+    intent = structured_data.get("intent")
+    entities = structured_data.get("entities") or {}
+    user_query = str(structured_data.get("user_query", "")).lower()
+
+    if intent == "General_Chat":
+        if entities.get("Player"):
+            intent = "Player_Stats"
+        elif entities.get("Team"):
+            intent = "Team_Stats"
+        elif entities.get("Position") or entities.get("Metric"):
+            intent = "Top_Ranked"
+
+    # Head-to-Head detection
+    if any(p in user_query for p in HEAD_TO_HEAD_WORDS):
+        team_list = entities.get("Team", [])
+        if isinstance(team_list, str):
+            team_list = [team_list]
+        if len(team_list) >= 2:
+            intent = "Head_to_Head"
+
+    predicted = intent in PREDICTION_INTENTS and wants_predicted_points(entities.get("Metric", "total_points"), user_query)
+    return intent, predicted
+
+
+def resolve_player_names_semantic(session, raw_names, embedder, index_name, model_name=None):
     """
     SEMANTIC MODE ONLY: Resolves messy player names using vector similarity.
     This is what makes semantic mode different from baseline.
+
+    Uses the memory-mapped local replica when one has been exported,
+    otherwise the Neo4j vector index. Vectors and resolved names are cached
+    per (model, normalised name).
     """
     cleaned_names = []
+    local_index = get_local_index()
+    field = INDEX_FIELDS.get(index_name) if local_index else None
+    use_local = bool(field and local_index.has(field))
+
+    cache = get_embedding_cache() if model_name else None
+    # Keyed by the backend that actually encodes (ONNX may have fallen back to torch)
+    cache_model = f"{model_name}|{embedder_backend(embedder)}"
+    if use_local:
+        scope = f"{index_name}@{local_index.version}"
+    else:
+        # Index answers change with a graph reload, re-embedding or an index generation switch
+        registry = get_season_registry()
+        physical_index = registry.vector_indexes[index_name]["index"]
+        scope = f"{physical_index}@neo4j:{registry.version}:{registry.embeddings_version}"
 
     for name in raw_names:
-        vector = embedder.embed_query(name)
-
-        # Vector search only - this is the key difference from baseline
-        query = f"""
-        CALL db.index.vector.queryNodes('{index_name}', 10, $vec)
-        YIELD node, score
-        WHERE score > 0.70
-        RETURN node.player_name AS Name
-        ORDER BY score DESC
-        LIMIT 1
-        """
-
-        result = session.run(query, {"vec": vector})
-        record = result.single()
-
-        if record and record["Name"]:
-            cleaned_names.append(record["Name"])
+        if cache:
+            found, resolved = cache.get_resolution(cache_model, scope, name)
+            if found:
+                cleaned_names.append(resolved or name)
+                continue
+            vector = cache.embed(embedder, cache_model, name)
+        else:
+            vector = embedder.embed_query(name)
+
+        if use_local:
+            resolved = local_index.resolve(vector, field)
         else:
-            cleaned_names.append(name)
+            # Vector search only - this is the key difference from baseline
+            rows = run_resolver(session, "resolve_player_vector", {"index": physical_index, "vec": vector})
+            resolved = rows[0]["Name"] if rows and rows[0]["Name"] else None
+
+        if cache:
+            cache.put_resolution(cache_model, scope, name, resolved)
+        cleaned_names.append(resolved or name)
 
     return cleaned_names
 
 
+def run_cypher(session, query, params, template=None):
+    """
+    Executes a Cypher query inside a tracing span and returns rows as dicts.
+    Catalogue queries pass their template name for plan-cache accounting.
+    """
+    with span("cypher_execution", query_chars=len(query), template=template) as s:
+        t0 = time.perf_counter()
+        result = session.run(query, params)
+        rows = [dict(r) for r in result]
+        duration = time.perf_counter() - t0
+        s.set("rows_returned", len(rows))
+        if template:
+            available_ms = result.consume().result_available_after
+            s.set("plan_cache_hit", PLAN_CACHE.record(template, available_ms))
+        record_if_slow(query, params, duration, intent=s.labels().get("intent"))
+        return rows
+
+
+def run_resolver(session, template, params=None):
+    """
+    Runs a name/position lookup from the catalogue without a span of its own
+    (the caller's resolve_entities span covers it) but through the slow-query log.
+    """
+    query = get_template(template)
+    t0 = time.perf_counter()
+    rows = [dict(r) for r in session.run(query, params or {})]
+    active = current_span()
+    record_if_slow(query, params, time.perf_counter() - t0,
+                   intent=active.labels().get("intent") if active else None)
+    return rows
+
+
+def query_columnar(store, intent, names, raw_pos, target_metric, season, gw):
+    """Answers an aggregation intent from the in-memory columnar store."""
+    if intent == "Player_Stats":
+        return store.player_stats(names, season, gw)
+    if intent == "Compare_Players":
+        return store.compare_players(names, season, gw)
+    if intent == "Top_Ranked":
+        aliases = resolve_position(None, raw_pos, db_positions=store.position_names)
+        return store.top_ranked(aliases, resolve_sort_metric(target_metric, aliases), season, gw)
+    if intent == "Bonus_Points":
+        return store.bonus_points(season, gw)
+    if intent == "Underlying_Stats":
+        return store.underlying_stats(names, season, gw)
+    raise ValueError(f"Intent {intent} is not supported by the columnar engine")
+
+
 # =============================================================================
 # MAIN QUERY FUNCTION
 # =============================================================================
 
-def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choice="A"):
+def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choice="A", memory=None):
     """
     Main entry point for querying the Knowledge Graph.
     
     BASELINE: Uses exact text matching - typos will fail
     SEMANTIC: Uses vector search to find similar names - handles typos
+
+    memory (conversation.ConversationMemory) lets follow-ups reuse the
+    canonical names and rows of earlier turns in the same chat.
+    """
+    with span("query_knowledge_graph", retrieval_mode=retrieval_mode) as s:
+        sub_intents = structured_data.get("sub_intents") or []
+        if len(sub_intents) > 1:
+            result = query_sub_intents(sub_intents, retrieval_mode, model_choice, memory)
+        else:
+            result = _query_with_memory(structured_data, retrieval_mode, model_choice, memory)
+        s.set("data_chars", len(str(result.get("data", ""))))
+        return result
+
+
+def _query_with_memory(structured_data, retrieval_mode, model_choice, memory):
+    """
+    Answers from the conversation's cached rows when the same query ran
+    before. The result carries the raw -> canonical names under "resolved".
+    """
+    if memory is not None:
+        # Rows are reused only for the same routed intent (see route_intent)
+        structured_data = {**structured_data, "route": route_intent(structured_data)}
+        structured_data = memory.canonicalize(structured_data, retrieval_mode, model_choice)
+        cached = memory.cached_result(structured_data, retrieval_mode, model_choice)
+        current_span().set("memory_hit", cached is not None)
+        if cached is not None:
+            return cached
+
+    resolved = {}
+    result = _query_knowledge_graph(structured_data, retrieval_mode, model_choice, resolved)
+    result["resolved"] = resolved
+    if memory is not None:
+        memory.store_result(structured_data, retrieval_mode, model_choice, result)
+    return result
+
+
+def query_sub_intents(sub_intents, retrieval_mode="baseline", model_choice="A", memory=None):
+    """
+    Runs the parts of a compound question in parallel, each on its own
+    pooled session, and merges them into one labelled context. Wall time is
+    that of the slowest part rather than the sum.
+    """
+    def run_part(sub):
+        with span("sub_intent", intent=sub.get("intent")):
+            return _query_with_memory(sub, retrieval_mode, model_choice, memory)
+
+    with ThreadPoolExecutor(max_workers=len(sub_intents), thread_name_prefix="sub-intent") as pool:
+        # copy_context() keeps each part's spans under the current trace
+        futures = [pool.submit(contextvars.copy_context().run, run_part, sub) for sub in sub_intents]
+        results = [f.result() for f in futures]
+
+    parts = []
+    resolved = {}
+    for sub, result in zip(sub_intents, results):
+        parts.append({
+            "intent": sub.get("intent"),
+            "question": sub.get("user_query"),
+            "data": result.get("data", "[]"),
+            "cypher": result.get("cypher", "No Query Executed"),
+        })
+        for key, mapping in (result.get("resolved") or {}).items():
+            resolved.setdefault(key, {}).update(mapping)
+    return {
+        "data": "\n\n".join(
+            f"[Part {i}: {p['intent']} - {p['question']}]\n{p['data']}" for i, p in enumerate(parts, 1)
+        ),
+        "cypher": "\n\n".join(f"// Part {i}: {p['intent']}\n{p['cypher'].strip()}" for i, p in enumerate(parts, 1)),
+        "parts": parts,
+        "resolved": resolved,
+    }
+
+
+def _query_knowledge_graph(structured_data, retrieval_mode, model_choice, resolved=None):
+    """
+    Resolves entities and dispatches to the Cypher query for the intent.
+    Names listed in structured_data["resolved_entities"] are already canonical
+    and skip resolution; the raw -> canonical mapping is written to resolved.
     """
-    intent = structured_data.get("intent")
     entities = structured_data.get("entities", {})
-    user_query = str(structured_data.get("user_query", "")).lower()
 
     # ==========================================================================
     # INTENT OVERRIDE: Fix common misclassifications
     # ==========================================================================
-    if intent == "General_Chat":
-        if entities.get("Player"):
-            intent = "Player_Stats"
-        elif entities.get("Team"):
-            intent = "Team_Stats"
-        elif entities.get("Position") or entities.get("Metric"):
-            intent = "Top_Ranked"
-
-    # Head-to-Head detection
-    if any(p in user_query for p in ["h2h", " vs ", "versus", "head to head", "against"]):
-        team_list = entities.get("Team", [])
-        if isinstance(team_list, str):
-            team_list = [team_list]
-        if len(team_list) >= 2:
-            intent = "Head_to_Head"
+    intent, predicted = route_intent(structured_data)
 
     # ==========================================================================
     # INPUT SANITIZATION
@@ -178,45 +467,119 @@ def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choi
         active_model = Config.EMBEDDING_MODEL_A
         active_index = "player_idx_a"
 
+    current_span().update(
+        intent=intent,
+        embedding_model=active_model if retrieval_mode == "semantic" else None
+    )
+
     # ==========================================================================
     # SEASON AND FILTERS
     # ==========================================================================
-    target_season = entities.get("Season")
+    target_season = normalize_season(entities.get("Season"))
     target_gw = entities.get("Gameweek")
     target_metric = entities.get("Metric", "total_points")
     raw_pos = entities.get("Position")
 
-    if target_season:
-        target_season = str(target_season).strip()
-        if "21" in target_season:
-            target_season = "2021-22"
-        elif "22" in target_season or "23" in target_season:
-            target_season = "2022-23"
-    else:
-        target_season = "2022-23"
+    # The season/gameweek filter lives in the templates: one gameweek or a
+    # range such as "5-10" bounds $gw_start/$gw_end, null for the whole
+    # season (see cypher_templates.PARTITION_FILTER)
+    gw_range = gameweek_range(target_gw)
+    params = {"season": target_season, "gw_start": None, "gw_end": None}
+    if gw_range:
+        params["gw_start"], params["gw_end"] = gw_range
+    executed_cypher = "No Query Executed"
 
-    base_filters = []
-    base_filters.append(
-        "EXISTS { MATCH (f)<-[:HAS_FIXTURE]-(:Gameweek)<-[:HAS_GW]-(s:Season) "
-        "WHERE s.season_name CONTAINS $season }"
-    )
+    # ==========================================================================
+    # PREDICTED POINTS: LightGBM expected points for a whole gameweek
+    # ==========================================================================
+    if predicted and COLUMNAR_INTENTS:
+        try:
+            store = get_columnar_store()
+            if intent == "Captaincy_Pick":
+                # Pick for the gameweek after the form window
+                form = get_season_form(store, target_season)
+                window = parse_form_window(target_gw, entities.get("Window"), form.latest_gw) if form else None
+                gameweek = window[1] + 1 if window else None
+            else:
+                # The model scores one gameweek; a range asks about its first
+                gameweek = gw_range[0] if gw_range else None
+            table = get_gameweek_predictions(store, target_season, gameweek)
+            if table is not None:
+                aliases = resolve_position(None, raw_pos, db_positions=store.position_names)
+                with span("predicted_points", gameweek=table.gameweek) as s:
+                    rows = table.top(aliases)
+                    s.set("rows_returned", len(rows))
+                return {
+                    "data": str(rows),
+                    "cypher": f"N/A - LightGBM predicted points ({target_season} GW{table.gameweek}, "
+                              f"{len(table.players)} players scored in {table.predict_ms:.0f}ms)"
+                }
+        except Exception as e:
+            # Fall back to the historical ranking below
+            mark_error(e)
 
-    if target_gw:
-        base_filters.append(
-            "EXISTS { MATCH (f)<-[:HAS_FIXTURE]-(gw:Gameweek) "
-            "WHERE toString(gw.GW_number) = toString($gw) OR gw.GW_number = toInteger($gw) }"
-        )
+    # ==========================================================================
+    # LEADERBOARDS: Top_Ranked without a gameweek filter is a dict lookup
+    # ==========================================================================
+    if intent == "Top_Ranked" and not target_gw:
+        artifact = load_leaderboards()
+        if artifact is not None:
+            aliases = resolve_position(None, raw_pos, db_positions=artifact["positions"])
+            sort_key = resolve_sort_metric(target_metric, aliases)
+            with span("leaderboard_lookup") as s:
+                rows = lookup_leaderboard(target_season, aliases, sort_key)
+                s.set("hit", rows is not None)
+            if rows is not None:
+                label = aliases[0] if aliases else "ALL"
+                return {
+                    "data": str(rows),
+                    "cypher": f"N/A - Precomputed leaderboard ({target_season} | {label} | {sort_key})"
+                }
 
-    params = {"season": target_season, "gw": target_gw}
-    executed_cypher = "No Query Executed"
+    # ==========================================================================
+    # ROLLING FORM: Captaincy_Pick over any window from per-season prefix sums
+    # ==========================================================================
+    if intent == "Captaincy_Pick" and COLUMNAR_INTENTS:
+        try:
+            form = get_season_form(get_columnar_store(), target_season)
+            window = parse_form_window(target_gw, entities.get("Window"), form.latest_gw) if form else None
+            if window:
+                start, end = window
+                with span("rolling_form", gw_start=start, gw_end=end) as s:
+                    rows = form.captaincy_pick(start, end, form_min_matches(start, end))
+                    s.set("rows_returned", len(rows))
+                # Model view of the next gameweek alongside the recent form
+                table = get_gameweek_predictions(form.store, target_season, end + 1)
+                if table is not None:
+                    table.attach(rows)
+                return {
+                    "data": str(rows),
+                    "cypher": f"N/A - Rolling form prefix sums ({target_season} GW{start}-{end})"
+                }
+        except Exception as e:
+            # Fall back to the Cypher query below
+            mark_error(e)
+
+    # ==========================================================================
+    # COLUMNAR: Aggregation intents answered in-process (no Neo4j round trip)
+    # ==========================================================================
+    if retrieval_mode == "columnar" and intent in COLUMNAR_INTENTS:
+        try:
+            store = get_columnar_store()
+            with span("columnar_execution", appearances=store.num_appearances) as s:
+                rows = query_columnar(
+                    store, intent, names, raw_pos, target_metric, target_season, gw_range
+                )
+                s.set("rows_returned", len(rows))
+            return {"data": str(rows), "cypher": "N/A - Columnar engine (NumPy group-by)"}
+        except Exception as e:
+            mark_error(e)
+            return {"data": f"Columnar Engine Error: {str(e)}", "cypher": executed_cypher}
 
     # ==========================================================================
     # DATABASE CONNECTION
     # ==========================================================================
-    driver = GraphDatabase.driver(
-        Config.NEO4J_URI,
-        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
-    )
+    driver = get_driver()
 
     try:
         with driver.session() as session:
@@ -227,301 +590,109 @@ def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choi
             # SEMANTIC: Pre-resolve names using vector search (handles typos)
             # BASELINE: Use names exactly as provided (typos will fail)
             
-            if retrieval_mode == "semantic" and names and HuggingFaceEmbeddings:
-                embedder = HuggingFaceEmbeddings(model_name=active_model)
-                params["names"] = resolve_player_names_semantic(
-                    session, names, embedder, active_index
-                )
-            else:
-                # BASELINE: Use raw names without any correction
-                params["names"] = names
-
-            # Resolve teams (both modes do this)
-            clean_teams = []
-            for t in team_names:
-                resolved = resolve_team(session, t)
-                if resolved:
-                    clean_teams.append(resolved)
-            params["team_names"] = clean_teams
-
-            # Resolve position aliases
-            params["aliases"] = resolve_position(session, raw_pos)
+            with span("resolve_entities", players=len(names), teams=len(team_names)):
+                known = structured_data.get("resolved_entities") or {}
+                pending = [n for n in names if n not in known.get("Player", ())]
+                embedder = get_embedder(active_model) if retrieval_mode == "semantic" and pending else None
+                if embedder:
+                    mapping = dict(zip(pending, resolve_player_names_semantic(
+                        session, pending, embedder, active_index, model_name=active_model
+                    )))
+                    params["names"] = [mapping.get(n, n) for n in names]
+                else:
+                    # BASELINE: Use raw names without any correction
+                    params["names"] = names
+
+                # Resolve teams (both modes do this)
+                clean_teams = []
+                team_mapping = {}
+                for t in team_names:
+                    team = t if t in known.get("Team", ()) else resolve_team(session, t)
+                    if team:
+                        clean_teams.append(team)
+                        team_mapping[t] = team
+                params["team_names"] = clean_teams
+
+                if resolved is not None:
+                    resolved["Player"] = dict(zip(names, params["names"]))
+                    resolved["Team"] = team_mapping
+
+                # Resolve position aliases
+                params["aliases"] = resolve_position(session, raw_pos)
 
             # ==================================================================
             # INTENT 1: PLAYER_STATS
             # ==================================================================
             if intent == "Player_Stats":
-                filter_clause = " AND ".join(base_filters) if base_filters else "1=1"
-                
                 # Simple CONTAINS matching - typos will fail in baseline mode
-                query = f"""
-                UNWIND $names AS search_name
-                
-                MATCH (p:Player)
-                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
-                
-                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
-                WHERE ({filter_clause}) AND r.minutes > 0
-                
-                WITH p, 
-                     count(r) AS Matches, 
-                     sum(r.total_points) AS Points, 
-                     sum(r.goals_scored) AS Goals, 
-                     sum(r.assists) AS Assists,
-                     sum(r.minutes) AS Minutes
-                
-                ORDER BY Matches DESC
-                LIMIT 1
-                
-                RETURN p.player_name AS Player, Points, Goals, Assists, Matches, Minutes
-                """
+                query = get_template("player_stats")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="player_stats")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 2: COMPARE_PLAYERS
             # ==================================================================
             elif intent == "Compare_Players":
-                filter_clause = " AND ".join(base_filters) if base_filters else "1=1"
-                
-                query = f"""
-                UNWIND $names AS search_name
-                MATCH (p:Player) 
-                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
-                
-                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
-                WHERE ({filter_clause}) AND r.minutes > 0
-                
-                RETURN 
-                    p.player_name AS Name,
-                    sum(r.total_points) AS Points,
-                    sum(r.goals_scored) AS Goals,
-                    sum(r.assists) AS Assists,
-                    count(r) AS Matches,
-                    sum(r.minutes) AS Minutes,
-                    round(toFloat(sum(r.total_points)) / count(r), 2) AS PointsPerGame
-                ORDER BY Points DESC
-                """
+                query = get_template("compare_players")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="compare_players")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 3: TOP_RANKED
             # ==================================================================
             elif intent == "Top_Ranked":
-                filter_clause = " AND ".join(base_filters) if base_filters else "1=1"
-
-                sort_clause = "ORDER BY Points DESC"
-                is_keeper_query = params["aliases"] and "GKP" in params["aliases"]
-
-                if target_metric:
-                    tm = target_metric.lower()
-                    if "goal" in tm and not is_keeper_query:
-                        sort_clause = "ORDER BY Goals DESC"
-                    elif "assist" in tm:
-                        sort_clause = "ORDER BY Assists DESC"
-                    elif "clean" in tm:
-                        sort_clause = "ORDER BY CleanSheets DESC"
-                    elif "save" in tm:
-                        sort_clause = "ORDER BY Saves DESC"
-
-                pos_filter = ""
-                if params["aliases"]:
-                    pos_filter = """
-                    WHERE any(alias IN $aliases WHERE 
-                        toLower(pos.name) = toLower(alias) OR 
-                        toLower(pos.name) CONTAINS toLower(alias) OR 
-                        toLower(alias) CONTAINS toLower(pos.name)
-                    )
-                    """
-
-                query = f"""
-                MATCH (p:Player)-[:PLAYS_AS]->(pos:Position)
-                {pos_filter}
-                
-                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
-                WHERE ({filter_clause}) AND r.minutes > 0
-                
-                WITH p, pos,
-                     count(r) AS Matches,
-                     sum(r.total_points) AS Points,
-                     sum(r.goals_scored) AS Goals,
-                     sum(r.assists) AS Assists,
-                     sum(r.clean_sheets) AS CleanSheets,
-                     sum(r.saves) AS Saves
-                
-                RETURN 
-                    p.player_name AS Player,
-                    pos.name AS Position,
-                    Matches, Points, Goals, Assists, CleanSheets
-                {sort_clause}
-                LIMIT 10
-                """
+                # Sort column picks one of the closed template variants;
+                # an empty $aliases list matches every position
+                sort_key = resolve_sort_metric(target_metric, params["aliases"])
+                query = get_template(f"top_ranked:{sort_key}")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template=f"top_ranked:{sort_key}")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 4: TEAM_STATS
             # ==================================================================
             elif intent == "Team_Stats":
-                target_season = params.get("season", "2022-23")
-                
-                query = """
-                UNWIND $team_names AS t_name
-                MATCH (t:Team) WHERE toLower(t.name) CONTAINS toLower(t_name)
-                
-                // Find all fixtures for this team in the season
-                MATCH (s:Season) WHERE s.season_name = $season OR s.season_name CONTAINS $season
-                MATCH (s)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f:Fixture)
-                
-                // Get fixtures where our team played
-                MATCH (f)-[:HAS_HOME_TEAM]->(home:Team)
-                MATCH (f)-[:HAS_AWAY_TEAM]->(away:Team)
-                WHERE home = t OR away = t
-                
-                // Get all players who played in this fixture with their stats
-                MATCH (p:Player)-[r:PLAYED_IN]->(f)
-                WHERE r.minutes > 0
-                
-                // For each player, count how many fixtures they have with our team
-                WITH t, f, home, away, p, r
-                OPTIONAL MATCH (p)-[:PLAYED_IN]->(:Fixture)-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]->(t)
-                WITH t, f, home, away, p, r, count(*) AS player_team_fixtures
-                
-                // Count player's total fixtures in the season
-                OPTIONAL MATCH (p)-[:PLAYED_IN]->(any_f:Fixture)<-[:HAS_FIXTURE]-(:Gameweek)<-[:HAS_GW]-(s2:Season)
-                WHERE s2.season_name CONTAINS $season
-                WITH t, f, home, away, p, r, player_team_fixtures, count(DISTINCT any_f) AS player_total_fixtures
-                
-                // Player belongs to our team if majority of their fixtures involve our team
-                // (handles transfers - player belongs to team they played most for)
-                WITH t, f, home, away, r,
-                     CASE WHEN player_team_fixtures >= player_total_fixtures * 0.5 THEN true ELSE false END AS is_my_player
-                
-                // Aggregate goals at fixture level
-                WITH t, f,
-                     sum(CASE WHEN is_my_player THEN r.goals_scored ELSE 0 END) AS my_goals,
-                     sum(CASE WHEN NOT is_my_player THEN r.goals_scored ELSE 0 END) AS opp_goals,
-                     sum(CASE WHEN is_my_player THEN r.own_goals ELSE 0 END) AS my_own_goals,
-                     sum(CASE WHEN NOT is_my_player THEN r.own_goals ELSE 0 END) AS opp_own_goals
-                
-                // Goals For = my goals + opponent own goals
-                // Goals Against = opponent goals + my own goals  
-                WITH t, f,
-                     my_goals + opp_own_goals AS GF,
-                     opp_goals + my_own_goals AS GA
-                
-                // Calculate results per fixture
-                WITH t,
-                     CASE WHEN GF > GA THEN 1 ELSE 0 END AS Win,
-                     CASE WHEN GF = GA THEN 1 ELSE 0 END AS Draw,
-                     CASE WHEN GF < GA THEN 1 ELSE 0 END AS Loss,
-                     CASE WHEN GA = 0 THEN 1 ELSE 0 END AS CleanSheet,
-                     GF, GA
-                
-                // Aggregate across all fixtures
-                RETURN
-                    t.name AS Team,
-                    count(*) AS Played,
-                    sum(Win) AS W,
-                    sum(Draw) AS D,
-                    sum(Loss) AS L,
-                    sum(GF) AS GoalsFor,
-                    sum(GA) AS GoalsAgainst,
-                    sum(GF) - sum(GA) AS GD,
-                    sum(CleanSheet) AS CS
-                ORDER BY W DESC, GD DESC
-                """
-                
-                params["season"] = target_season
+                query = get_template("team_stats")
+
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="team_stats")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 5: SQUAD_LIST
             # ==================================================================
             elif intent == "Squad_List":
-                query = """
-                UNWIND $team_names AS t_name
-                MATCH (t:Team) WHERE toLower(t.name) CONTAINS toLower(t_name)
-                MATCH (t)<-[:HAS_HOME_TEAM|HAS_AWAY_TEAM]-(f:Fixture)<-[r:PLAYED_IN]-(p:Player)
-                MATCH (p)-[:PLAYS_AS]->(pos:Position)
-                
-                WITH DISTINCT p, t, pos, sum(r.total_points) AS TotalPoints
-                ORDER BY TotalPoints DESC
-                
-                RETURN 
-                    t.name AS Team, 
-                    p.player_name AS Player,
-                    pos.name AS Position,
-                    TotalPoints
-                LIMIT 20
-                """
+                query = get_template("squad_list")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="squad_list")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 6: GAMEWEEK_SCHEDULE
             # ==================================================================
             elif intent == "Gameweek_Schedule":
-                query = """
-                MATCH (s:Season) WHERE s.season_name CONTAINS $season
-                MATCH (s)-[:HAS_GW]->(gw:Gameweek)
-                WHERE toString(gw.GW_number) = toString($gw) OR gw.GW_number = toInteger($gw)
-                
-                MATCH (gw)-[:HAS_FIXTURE]->(f:Fixture)
-                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
-                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
-                
-                RETURN 
-                    gw.GW_number AS Gameweek,
-                    f.kickoff_time AS Date,
-                    h.name AS Home,
-                    a.name AS Away
-                ORDER BY f.kickoff_time ASC
-                """
+                query = get_template("gameweek_schedule")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="gameweek_schedule")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 7: GAMEWEEK_ANALYSIS
             # ==================================================================
             elif intent == "Gameweek_Analysis":
-                query = """
-                MATCH (s:Season) WHERE s.season_name CONTAINS $season
-                MATCH (s)-[:HAS_GW]->(gw:Gameweek)
-                WHERE toString(gw.GW_number) = toString($gw)
-                
-                MATCH (gw)-[:HAS_FIXTURE]->(f:Fixture)
-                MATCH (p:Player)-[r:PLAYED_IN]->(f)
-                WHERE r.minutes > 0
-                
-                WITH gw.GW_number AS Gameweek,
-                     count(DISTINCT f) AS FixturesPlayed,
-                     sum(r.goals_scored) AS TotalGoals,
-                     p.player_name AS Player,
-                     sum(r.total_points) AS PlayerPoints
-                
-                ORDER BY PlayerPoints DESC
-                LIMIT 10
-                
-                RETURN Gameweek, FixturesPlayed, TotalGoals, Player, PlayerPoints
-                """
+                query = get_template("gameweek_analysis")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="gameweek_analysis")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 8: HEAD_TO_HEAD
@@ -529,186 +700,86 @@ def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choi
             elif intent == "Head_to_Head":
                 params["season"] = None  # Query all seasons for H2H
 
-                query = """
-                WITH $team_names AS teams
-                WHERE size(teams) >= 2
-                WITH teams[0] AS team1_name, teams[1] AS team2_name
-                
-                MATCH (t1:Team) WHERE toLower(t1.name) CONTAINS toLower(team1_name)
-                MATCH (t2:Team) WHERE toLower(t2.name) CONTAINS toLower(team2_name)
-                
-                MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f:Fixture)
-                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
-                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
-                WHERE (h = t1 AND a = t2) OR (h = t2 AND a = t1)
-                
-                MATCH (p:Player)-[r:PLAYED_IN]->(f)
-                WHERE r.minutes > 0
-                
-                WITH s, gw, f, h, a,
-                     sum(r.goals_scored) AS TotalGoals,
-                     collect(CASE WHEN r.goals_scored > 0 
-                             THEN {player: p.player_name, goals: r.goals_scored} 
-                             ELSE NULL END) AS AllScorers
-                
-                RETURN 
-                    s.season_name AS Season,
-                    gw.GW_number AS Gameweek,
-                    f.kickoff_time AS Kickoff,
-                    h.name AS Home,
-                    a.name AS Away,
-                    TotalGoals,
-                    [scorer IN AllScorers WHERE scorer IS NOT NULL] AS GoalScorers
-                ORDER BY f.kickoff_time ASC
-                """
+                query = get_template("head_to_head")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="head_to_head")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 9: SIMILAR_PLAYERS (Requires Semantic Mode)
             # ==================================================================
             elif intent == "Similar_Players":
-                if retrieval_mode != "semantic" or not HuggingFaceEmbeddings:
+                if not params["names"]:
+                    return {"data": "Please specify a player name.", "cypher": "N/A"}
+
+                # Stat-vector similarity works in every retrieval mode
+                if COLUMNAR_INTENTS:
+                    engine = get_similarity_engine(get_columnar_store())
+                    with span("stat_similarity", candidates=len(engine.row_player)) as s:
+                        rows = engine.most_similar(
+                            params["names"], season=target_season,
+                            aliases=params["aliases"] if raw_pos else None
+                        )
+                        s.set("rows_returned", len(rows))
+                    return {
+                        "data": str(rows),
+                        "cypher": f"N/A - Stat-vector cosine similarity (per-90 features, {target_season})"
+                    }
+
+                # Without NumPy: embedding similarity through the Neo4j vector index
+                if retrieval_mode != "semantic" or not get_embedder(active_model):
                     return {
                         "data": "Similar Players requires semantic mode. Please enable it in the sidebar.",
                         "cypher": "N/A - Requires Vector Index"
                     }
 
-                if not params["names"]:
-                    return {"data": "Please specify a player name.", "cypher": "N/A"}
-
                 target_name = params["names"][0]
-                emb_field = "embedding_a" if model_choice == "A" else "embedding_b"
-                
-                query = f"""
-                MATCH (target:Player)
-                WHERE toLower(target.player_name) CONTAINS toLower($target_name)
-                
-                WITH target, target.{emb_field} AS targetVec
-                WHERE targetVec IS NOT NULL
-                
-                CALL db.index.vector.queryNodes('{active_index}', 10, targetVec)
-                YIELD node AS similar, score
-                
-                WHERE similar.player_name <> target.player_name AND score > 0.7
-                
-                MATCH (similar)-[:PLAYS_AS]->(pos:Position)
-                OPTIONAL MATCH (similar)-[r:PLAYED_IN]->(f:Fixture)
-                
-                RETURN 
-                    similar.player_name AS Player,
-                    pos.name AS Position,
-                    round(score, 3) AS Similarity,
-                    sum(r.total_points) AS Points
-                ORDER BY Similarity DESC
-                LIMIT 5
-                """
+                query = get_template("similar_players")
 
                 params["target_name"] = target_name
+                # The index generation currently served (see vector_indexes.py)
+                served = get_season_registry().vector_indexes[active_index]
+                params["emb_field"] = served["field"]
+                params["index"] = served["index"]
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="similar_players")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 10: UNDERLYING_STATS
             # ==================================================================
             elif intent == "Underlying_Stats":
-                filter_clause = " AND ".join(base_filters) if base_filters else "1=1"
-                
-                query = f"""
-                UNWIND $names AS search_name
-                MATCH (p:Player)
-                WHERE toLower(p.player_name) CONTAINS toLower(search_name)
-                
-                MATCH (p)-[r:PLAYED_IN]->(f:Fixture)
-                WHERE ({filter_clause}) AND r.minutes > 0
-                
-                RETURN 
-                    p.player_name AS Player,
-                    count(r) AS Matches,
-                    round(avg(toFloat(r.ict_index)), 2) AS AvgICT,
-                    round(avg(toFloat(r.influence)), 2) AS AvgInfluence,
-                    round(avg(toFloat(r.creativity)), 2) AS AvgCreativity,
-                    round(avg(toFloat(r.threat)), 2) AS AvgThreat,
-                    sum(r.total_points) AS TotalPoints
-                ORDER BY AvgICT DESC
-                """
+                query = get_template("underlying_stats")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="underlying_stats")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 11: CAPTAINCY_PICK
             # ==================================================================
             elif intent == "Captaincy_Pick":
-                query = """
-                MATCH (s:Season) WHERE s.season_name = $season
-                MATCH (s)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f:Fixture)
-                
-                WITH max(gw.GW_number) AS latestGW
-                
-                MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f:Fixture)
-                WHERE s.season_name = $season AND gw.GW_number > (latestGW - 5)
-                
-                MATCH (p:Player)-[r:PLAYED_IN]->(f)
-                WHERE r.minutes >= 60
-                
-                MATCH (p)-[:PLAYS_AS]->(pos:Position)
-                
-                WITH p, pos,
-                     count(r) AS RecentMatches,
-                     sum(r.total_points) AS RecentPoints,
-                     avg(r.total_points) AS AvgPoints,
-                     sum(r.goals_scored) AS Goals,
-                     sum(r.assists) AS Assists
-                
-                WHERE RecentMatches >= 3
-                
-                RETURN 
-                    p.player_name AS Player,
-                    pos.name AS Position,
-                    RecentMatches,
-                    RecentPoints,
-                    round(AvgPoints, 2) AS PointsPerGame,
-                    Goals,
-                    Assists
-                ORDER BY AvgPoints DESC
-                LIMIT 10
-                """
+                query = get_template("captaincy_pick")
 
+                size = _first_int(entities.get("Window")) or DEFAULT_FORM_WINDOW
+                window = parse_form_window(target_gw, size)
+                params["window"] = size
+                params["gw_start"], params["gw_end"] = window if window else (None, None)
+                params["min_matches"] = form_min_matches(*window) if window else form_min_matches(1, size)
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="captaincy_pick")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # INTENT 12: BONUS_POINTS
             # ==================================================================
             elif intent == "Bonus_Points":
-                filter_clause = " AND ".join(base_filters) if base_filters else "1=1"
-                
-                query = f"""
-                MATCH (p:Player)-[r:PLAYED_IN]->(f:Fixture)
-                WHERE ({filter_clause}) AND r.bonus > 0
-                
-                MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
-                MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
-                
-                RETURN 
-                    p.player_name AS Player,
-                    r.bonus AS BonusPoints,
-                    r.bps AS BPS,
-                    h.name + ' vs ' + a.name AS Match,
-                    r.total_points AS TotalPoints
-                ORDER BY r.bonus DESC, r.bps DESC
-                LIMIT 20
-                """
+                query = get_template("bonus_points")
 
                 executed_cypher = query
-                result = session.run(query, params)
-                return {"data": str([dict(r) for r in result]), "cypher": executed_cypher}
+                rows = run_cypher(session, query, params, template="bonus_points")
+                return {"data": str(rows), "cypher": executed_cypher}
 
             # ==================================================================
             # FALLBACK: GENERAL_CHAT
@@ -720,10 +791,8 @@ def query_knowledge_graph(structured_data, retrieval_mode="baseline", model_choi
                 }
 
     except Exception as e:
+        mark_error(e)
         return {
             "data": f"Database Error: {str(e)}",
             "cypher": executed_cypher
-        }
-
-    finally:
-        driver.close()
\ No newline at end of file
+        }
\ No newline at end of file
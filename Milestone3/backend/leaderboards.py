@@ -0,0 +1,131 @@
+"""
+Precomputed Leaderboards Module for FPL Graph-RAG Assistant
+Builds top-K tables for every season x position x metric at init time and
+serves Top_Ranked requests from a local JSON artifact with a dict lookup.
+"""
+
+import json
+import os
+import threading
+import time
+
+from .config import Config
+from .seasons import get_season_registry
+
+
+# Sort columns supported by Top_Ranked (see resolve_sort_metric)
+LEADERBOARD_METRICS = ("Points", "Goals", "Assists", "CleanSheets", "Saves")
+
+# Position codes from get_search_aliases, plus "ALL" for no position filter
+LEADERBOARD_POSITIONS = ("ALL", "GKP", "DEF", "MID", "FWD")
+
+ARTIFACT_VERSION = 1
+
+_boards = None
+_boards_mtime = None
+_boards_lock = threading.Lock()
+
+
+def leaderboard_key(season, position_code, metric):
+    return f"{season}|{position_code}|{metric}"
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def build_leaderboards(store, alias_fn, top_k=None):
+    """
+    Computes every leaderboard from a ColumnarStore.
+
+    alias_fn maps a position code to its search aliases (get_search_aliases),
+    so the tables use exactly the same position matching as the live query.
+    """
+    top_k = top_k or Config.LEADERBOARD_TOP_K
+    boards = {}
+    for season in store.season_names:
+        for code in LEADERBOARD_POSITIONS:
+            aliases = [] if code == "ALL" else alias_fn(code)
+            for metric in LEADERBOARD_METRICS:
+                rows = store.top_ranked(aliases, metric, season, None, limit=top_k)
+                boards[leaderboard_key(season, code, metric)] = rows
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "top_k": top_k,
+        # Tables built from a different graph are ignored (see lookup_leaderboard)
+        "graph_version": store.graph_version,
+        "seasons": store.season_names,
+        "positions": store.position_names,
+        "boards": boards,
+    }
+
+
+def save_leaderboards(artifact, path=None):
+    path = path or Config.LEADERBOARDS_PATH
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f)
+    os.replace(tmp_path, path)
+    reload_leaderboards()
+
+
+# =============================================================================
+# LOOKUP
+# =============================================================================
+
+def load_leaderboards():
+    """
+    Returns the artifact or None if not built. It is read once per process
+    and again whenever the file changes (initialize_vectors.py in another
+    process rebuilt it).
+    """
+    global _boards, _boards_mtime
+    path = Config.LEADERBOARDS_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _boards is None or mtime != _boards_mtime:
+        with _boards_lock:
+            if _boards is None or mtime != _boards_mtime:
+                with open(path, encoding="utf-8") as f:
+                    artifact = json.load(f)
+                _boards = artifact if artifact.get("version") == ARTIFACT_VERSION else None
+                _boards_mtime = mtime
+    return _boards
+
+
+def reload_leaderboards():
+    global _boards, _boards_mtime
+    with _boards_lock:
+        _boards = None
+        _boards_mtime = None
+
+
+def is_current(artifact):
+    """False when the tables were built from a graph other than the one loaded now."""
+    built = artifact.get("graph_version")
+    version = get_season_registry().version
+    return built is None or version is None or built == version
+
+
+def lookup_leaderboard(season, aliases, metric, limit=10):
+    """
+    Returns the precomputed rows, or None when the combination was not built
+    (unknown season/position or limit above the stored top-K) or the graph
+    has changed since the tables were built.
+    """
+    artifact = load_leaderboards()
+    if artifact is None or limit > artifact["top_k"] or not is_current(artifact):
+        return None
+
+    code = "ALL" if not aliases else str(aliases[0]).upper()
+    rows = artifact["boards"].get(leaderboard_key(season, code, metric))
+    if rows is None:
+        return None
+    return rows[:limit]
@@ -0,0 +1,331 @@
+"""
+Load Generator Module for FPL Graph-RAG Assistant
+Simulates concurrent chat users replaying a question mix against the
+pipeline (in-process or through server.py), with stubbed LLM clients so the
+measurement covers our own code: Neo4j, embedders, local stores and the GIL.
+Used by load_test.py to build ramped capacity reports.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from .tracing import percentile
+
+
+# Simulated provider latency (ms); the stubs sleep, so they release the GIL like real network calls
+DEFAULT_INTENT_LATENCY_MS = 300
+DEFAULT_ANSWER_LATENCY_MS = 1200
+
+# A step whose throughput gains less than this over the previous one is saturated
+KNEE_MIN_GAIN = 0.10
+KNEE_MAX_ERROR_RATE = 0.01
+
+# Pipeline results that count as failures even though no exception was raised
+ERROR_PREFIXES = ("Database Error", "Columnar Engine Error", "⚠️")
+
+# Realistic mix: what the LLM parser would return for each question, weighted by how often it is asked
+DEFAULT_QUESTION_MIX = [
+    {"question": "How many points did Salah get in 2022-23?", "intent": "Player_Stats",
+     "entities": {"Player": ["Salah"], "Season": "2022-23"}, "weight": 5},
+    {"question": "haland goals this season", "intent": "Player_Stats",
+     "entities": {"Player": ["haland"], "Season": "2022-23"}, "weight": 3},
+    {"question": "Compare Salah and Kane in 2021-22", "intent": "Compare_Players",
+     "entities": {"Player": ["Salah", "Kane"], "Season": "2021-22"}, "weight": 3},
+    {"question": "Top 10 midfielders by points in 2022-23", "intent": "Top_Ranked",
+     "entities": {"Position": "Midfielder", "Metric": "points", "Season": "2022-23"}, "weight": 4},
+    {"question": "Best defenders for clean sheets", "intent": "Top_Ranked",
+     "entities": {"Position": "Defender", "Metric": "clean sheets"}, "weight": 2},
+    {"question": "Who should I captain in gameweek 12?", "intent": "Captaincy_Pick",
+     "entities": {"Gameweek": "12", "Season": "2022-23"}, "weight": 4},
+    {"question": "Fixtures for GW5", "intent": "Gameweek_Schedule",
+     "entities": {"Gameweek": "5", "Season": "2022-23"}, "weight": 2},
+    {"question": "Arsenal vs Liverpool head to head", "intent": "Head_to_Head",
+     "entities": {"Team": ["Arsenal", "Liverpool"]}, "weight": 2},
+    {"question": "How did Man City do in 2021-22?", "intent": "Team_Stats",
+     "entities": {"Team": ["Man City"], "Season": "2021-22"}, "weight": 2},
+    {"question": "Players similar to Saka", "intent": "Similar_Players",
+     "entities": {"Player": ["Saka"]}, "weight": 2},
+    {"question": "Trent ICT index last 5 gameweeks", "intent": "Underlying_Stats",
+     "entities": {"Player": ["Trent"], "Window": "5"}, "weight": 1},
+    {"question": "Bonus points in GW20", "intent": "Bonus_Points",
+     "entities": {"Gameweek": "20", "Season": "2022-23"}, "weight": 1},
+    {"question": "Compare Salah and Son, and show GW8 fixtures", "intent": "Compare_Players",
+     "entities": {"Player": ["Salah", "Son"]}, "weight": 1,
+     "sub_intents": [
+         {"intent": "Compare_Players", "entities": {"Player": ["Salah", "Son"]}, "question": "Compare Salah and Son"},
+         {"intent": "Gameweek_Schedule", "entities": {"Gameweek": "8"}, "question": "show GW8 fixtures"},
+     ]},
+    {"question": "hi there", "intent": "General_Chat", "entities": {}, "weight": 1},
+]
+
+
+def load_question_mix(path=None):
+    """Reads a JSONL mix ({"question", "intent", "entities", "weight"}), or returns the default."""
+    if not path:
+        return list(DEFAULT_QUESTION_MIX)
+    mix = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if not item.get("question"):
+                raise ValueError(f"{path}:{line_no}: 'question' is required")
+            item.setdefault("intent", "General_Chat")
+            item.setdefault("entities", {})
+            mix.append(item)
+    return mix
+
+
+def _normalize(question):
+    return " ".join(str(question).lower().split())
+
+
+# =============================================================================
+# STUB LLM CLIENTS
+# =============================================================================
+
+class StubLLMClient:
+    """
+    Stands in for the Groq/OpenAI/Cerebras (chat.completions.create) and
+    Gemini (models.generate_content) clients. JSON-mode calls get the intent
+    recorded in the question mix; other calls get a short canned answer.
+    """
+
+    def __init__(self, mix, intent_latency_ms=DEFAULT_INTENT_LATENCY_MS,
+                 answer_latency_ms=DEFAULT_ANSWER_LATENCY_MS, seed=None):
+        self.intents = {_normalize(item["question"]): item for item in mix}
+        self.intent_latency = intent_latency_ms / 1000
+        self.answer_latency = answer_latency_ms / 1000
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+
+    def _sleep(self, mean):
+        if mean <= 0:
+            return
+        with self._rng_lock:
+            self.calls += 1
+            delay = mean * self._rng.uniform(0.5, 1.5)
+        time.sleep(delay)
+
+    def _intent_reply(self, messages):
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        item = self.intents.get(_normalize(question), {})
+        reply = {"intent": item.get("intent", "General_Chat"), "entities": item.get("entities", {})}
+        if item.get("sub_intents"):
+            reply["sub_intents"] = item["sub_intents"]
+        return json.dumps(reply)
+
+    def _create(self, model=None, messages=(), response_format=None, **kwargs):
+        if response_format and response_format.get("type") == "json_object":
+            self._sleep(self.intent_latency)
+            content = self._intent_reply(messages)
+        else:
+            self._sleep(self.answer_latency)
+            content = f"[stub {model}] answer grounded in {len(messages[-1]['content'])} prompt chars."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _generate_content(self, model=None, contents=""):
+        self._sleep(self.answer_latency)
+        return SimpleNamespace(text=f"[stub {model}] answer grounded in {len(contents)} prompt chars.")
+
+
+_stub = None
+
+
+def install_llm_stubs(mix=None, intent_latency_ms=DEFAULT_INTENT_LATENCY_MS,
+                      answer_latency_ms=DEFAULT_ANSWER_LATENCY_MS, seed=None):
+    """
+    Replaces every provider client the intent parser and response generator
+    use with one StubLLMClient and turns off the rate-limit scheduler.
+    Process-wide and irreversible: only for load tests and `server.py --stub-llm`.
+    """
+    global _stub
+    from . import intent_parser, response_generator
+    from .rate_limits import SCHEDULER
+
+    _stub = StubLLMClient(mix or DEFAULT_QUESTION_MIX, intent_latency_ms, answer_latency_ms, seed)
+    intent_parser.groq_client = _stub
+    for name in ("groq_client", "openai_client", "gemini_client", "cerebras_client"):
+        setattr(response_generator, name, _stub)
+    # Stubs have no provider limits; queueing for them would skew the measurement
+    SCHEDULER.enabled = False
+    return _stub
+
+
+def llm_stubbed():
+    return _stub is not None
+
+
+# =============================================================================
+# RESOURCE USAGE
+# =============================================================================
+
+def process_usage():
+    """CPU seconds (user + system), resident memory and thread count of this process."""
+    times = os.times()
+    rss = None
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, KB on Linux
+        except ImportError:
+            pass
+    return {
+        "cpu_seconds": round(times.user + times.system, 3),
+        "rss_mb": round(rss / 1e6, 1) if rss else None,
+        "threads": threading.active_count(),
+    }
+
+
+class UsageSampler:
+    """Polls a usage function in the background and keeps the peaks."""
+
+    def __init__(self, usage_fn, interval=0.5):
+        self.usage_fn = usage_fn
+        self.interval = interval
+        self.peak_rss_mb = None
+        self.peak_threads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        usage = self.usage_fn()
+        if not usage:
+            return
+        if usage.get("rss_mb") is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, usage["rss_mb"])
+        self.peak_threads = max(self.peak_threads, usage.get("threads") or 0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="load-usage-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+# =============================================================================
+# LOAD STEPS
+# =============================================================================
+
+def classify(result):
+    """'ok' or 'error' for one pipeline result (service.ask shape)."""
+    data = str(result.get("data", ""))
+    answer = str(result.get("answer", ""))
+    if data.startswith(ERROR_PREFIXES) or answer.startswith(ERROR_PREFIXES):
+        return "error"
+    return "ok"
+
+
+def run_step(call, mix, users, duration, think_time=0.0, seed=0, usage_fn=process_usage):
+    """
+    Runs `users` closed-loop users for `duration` seconds. Each user picks a
+    weighted question, calls call(item) -> service.ask-style dict, optionally
+    waits an exponential think time, and repeats. Requests still in flight
+    at the deadline finish and count.
+    """
+    weights = [item.get("weight", 1) for item in mix]
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(index):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            item = rng.choices(mix, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                result = call(item)
+                status, timings = classify(result), result.get("timings") or {}
+            except Exception as e:
+                status, timings = ("rejected" if "busy" in str(e) else "error"), {}
+            sample = (time.perf_counter() - t0, status, timings, item["intent"])
+            with lock:
+                samples.append(sample)
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    before = usage_fn() or {}
+    t_start = time.perf_counter()
+    with UsageSampler(usage_fn) as sampler:
+        threads = [threading.Thread(target=user, args=(i,), name=f"load-user-{i}") for i in range(users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - t_start
+    after = usage_fn() or {}
+
+    cpu = None
+    if before.get("cpu_seconds") is not None and after.get("cpu_seconds") is not None:
+        cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    return summarize_step(samples, users, wall, cpu, sampler)
+
+
+def summarize_step(samples, users, wall, cpu_seconds, sampler):
+    latencies = [s[0] for s in samples if s[1] == "ok"]
+    errors = sum(1 for s in samples if s[1] == "error")
+    rejected = sum(1 for s in samples if s[1] == "rejected")
+    stages = {}
+    for stage in ("intent", "graph", "llm"):
+        values = [s[2][stage] for s in samples if s[1] == "ok" and stage in s[2]]
+        if values:
+            stages[stage] = {"p50_ms": round(percentile(values, 50) * 1000, 2),
+                             "p95_ms": round(percentile(values, 95) * 1000, 2)}
+    by_intent = {}
+    for s in samples:
+        if s[1] == "ok":
+            by_intent.setdefault(s[3], []).append(s[0])
+
+    total = len(samples)
+    return {
+        "users": users,
+        "requests": total,
+        "wall_seconds": round(wall, 2),
+        "throughput_qps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rejected_rate": round(rejected / total, 4) if total else 0.0,
+        "stages": stages,
+        "intent_p95_ms": {k: round(percentile(v, 95) * 1000, 2) for k, v in sorted(by_intent.items())},
+        "cpu_cores": round(cpu_seconds / wall, 2) if cpu_seconds is not None and wall else None,
+        "peak_rss_mb": sampler.peak_rss_mb,
+        "peak_threads": sampler.peak_threads,
+    }
+
+
+def find_knee(steps):
+    """
+    Returns (saturation_step, reason): the last step before throughput stops
+    growing by KNEE_MIN_GAIN or errors exceed KNEE_MAX_ERROR_RATE. None if
+    the ramp never saturated.
+    """
+    for prev, step in zip(steps, steps[1:]):
+        if step["error_rate"] + step["rejected_rate"] > KNEE_MAX_ERROR_RATE:
+            return prev, f"errors {step['error_rate'] + step['rejected_rate']:.1%} at {step['users']} users"
+        if step["throughput_qps"] < prev["throughput_qps"] * (1 + KNEE_MIN_GAIN):
+            return prev, (f"throughput {prev['throughput_qps']:.1f} -> {step['throughput_qps']:.1f} q/s "
+                          f"from {prev['users']} to {step['users']} users")
+    return None, None
@@ -0,0 +1,198 @@
+"""
+Pipeline Module for FPL Graph-RAG Assistant
+Small helpers for long-running jobs: a producer/consumer pipeline whose
+stages run on their own threads and hand off through bounded queues, and a
+JSON checkpoint file so an interrupted job can resume.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+
+_DONE = object()
+
+
+# =============================================================================
+# CHECKPOINT
+# =============================================================================
+
+class Checkpoint:
+    """
+    Progress of one job, persisted atomically after every update.
+    `fingerprint` describes the run's inputs; a checkpoint written with a
+    different fingerprint is ignored.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.state = {"fingerprint": fingerprint, "steps": [], "items": {}}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("fingerprint") == fingerprint:
+                    self.state = saved
+            except (OSError, ValueError):
+                pass
+
+    @property
+    def resumed(self):
+        return bool(self.state["steps"] or self.state["items"])
+
+    def step_done(self, step):
+        return step in self.state["steps"]
+
+    def mark_step(self, step):
+        with self._lock:
+            if step not in self.state["steps"]:
+                self.state["steps"].append(step)
+            self._save()
+
+    def items(self, step):
+        return set(self.state["items"].get(step, []))
+
+    def add_items(self, step, ids):
+        with self._lock:
+            self.state["items"].setdefault(step, []).extend(ids)
+            self._save()
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self.state[key] = value
+            self._save()
+
+    def _save(self):
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+
+    def rate(self, elapsed):
+        return self.items / elapsed if elapsed else 0.0
+
+
+def run_pipeline(source, stages, queue_size=4, log_interval=5.0, log=print):
+    """
+    Runs source() -> stage_1 -> ... -> stage_n, each on its own thread.
+
+    source is an iterable of batches; each stage is (name, fn, count_fn)
+    where fn(batch) returns the batch for the next stage and count_fn(batch)
+    gives the number of items for throughput. Queues between stages hold at
+    most queue_size batches, so a slow stage applies back-pressure instead of
+    buffering the whole job. Returns {stage: StageStats}; re-raises the first
+    stage error after stopping the others.
+    """
+    names = ["source"] + [name for name, _, _ in stages]
+    stats = {name: StageStats(name) for name in names}
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+    started = time.perf_counter()
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def run_source():
+        try:
+            t0 = time.perf_counter()
+            for batch in source:
+                stats["source"].busy += time.perf_counter() - t0
+                stats["source"].items += stages[0][2](batch)
+                put(queues[0], batch)
+                if stop.is_set():
+                    return
+                t0 = time.perf_counter()
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(queues[0], _DONE)
+
+    def run_stage(i):
+        name, fn, count_fn = stages[i]
+        inbox = queues[i]
+        outbox = queues[i + 1] if i + 1 < len(queues) else None
+        try:
+            while True:
+                try:
+                    batch = inbox.get(timeout=0.2)
+                except queue.Empty:
+                    if stop.is_set():
+                        return
+                    continue
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                result = fn(batch)
+                stats[name].busy += time.perf_counter() - t0
+                stats[name].items += count_fn(batch)
+                if outbox is not None:
+                    put(outbox, result)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if outbox is not None:
+                put(outbox, _DONE)
+
+    threads = [threading.Thread(target=run_source, name="pipeline-source", daemon=True)]
+    threads += [
+        threading.Thread(target=run_stage, args=(i,), name=f"pipeline-{stages[i][0]}", daemon=True)
+        for i in range(len(stages))
+    ]
+    for t in threads:
+        t.start()
+
+    last_log = time.perf_counter()
+    while any(t.is_alive() for t in threads):
+        threads[-1].join(timeout=0.5)
+        if time.perf_counter() - last_log >= log_interval:
+            last_log = time.perf_counter()
+            log("   " + format_progress(stats, queues, names, last_log - started))
+
+    if errors:
+        raise errors[0]
+    log("   " + format_progress(stats, queues, names, time.perf_counter() - started))
+    return stats
+
+
+def format_progress(stats, queues, names, elapsed):
+    parts = []
+    for i, name in enumerate(names):
+        s = stats[name]
+        part = f"{name}: {s.items} ({s.rate(elapsed):.1f}/s, busy {s.busy:.1f}s)"
+        if i < len(queues):
+            part += f" →[{queues[i].qsize()}/{queues[i].maxsize}]"
+        parts.append(part)
+    return " ".join(parts)
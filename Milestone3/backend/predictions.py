@@ -0,0 +1,240 @@
+"""
+Predictions Module for FPL Graph-RAG Assistant
+Expected points for every player of a gameweek from the LightGBM pipeline
+(lgbm_model_pipeline.joblib). Feature rows come from the columnar store in
+one NumPy pass: per-appearance averages over the gameweeks before the
+target, plus position and home/away for the target fixture. The whole
+gameweek is scored with one predict() call, and the result is cached per
+(season, GW).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import Config
+from .columnar import cypher_round, on_store_reload
+from .tracing import span
+
+try:
+    import joblib
+    import pandas as pd
+except ImportError:
+    joblib = None
+    pd = None
+
+
+# Column order the pipeline was fitted with
+FEATURES = (
+    "goals_scored", "goals_conceded", "own_goals", "penalties_missed", "penalties_saved",
+    "saves", "minutes", "assists", "clean_sheets", "bonus", "bps", "was_home",
+    "yellow_cards", "red_cards", "position", "creativity", "influence", "form",
+    "ict_index", "threat",
+)
+
+# Per-appearance averages over the window; the other three are built separately
+AVERAGED_FEATURES = tuple(f for f in FEATURES if f not in ("was_home", "position", "form"))
+
+# Graph position names -> the pipeline's one-hot categories (DEF/FWD/GK/MID)
+MODEL_POSITIONS = {"GK": "GK", "GKP": "GK", "DEF": "DEF", "MID": "MID", "FWD": "FWD"}
+
+_model = None
+_model_error = None
+_model_lock = threading.Lock()
+
+
+def load_prediction_model(path=None):
+    """
+    Loads the pipeline once per process. Returns None when joblib / pandas /
+    scikit-learn / lightgbm are not installed (pip install ".[predictions]")
+    or the file is missing or unreadable. A failed load is remembered, so it
+    is reported once rather than on every request.
+    """
+    global _model, _model_error
+    if _model is None and _model_error is None:
+        with _model_lock:
+            if _model is None and _model_error is None:
+                path = path or Config.PREDICTION_MODEL_PATH
+                if joblib is None:
+                    _model_error = "joblib / pandas not installed"
+                elif not os.path.exists(path):
+                    _model_error = f"{path} not found"
+                else:
+                    try:
+                        _model = joblib.load(path)
+                    except Exception as e:
+                        _model_error = f"{type(e).__name__}: {e}"
+                        print(f"Prediction Model Error: {_model_error}")
+    return _model
+
+
+# =============================================================================
+# ONE GAMEWEEK
+# =============================================================================
+
+class GameweekPredictions:
+    """Predicted points for every player with history before `gameweek` in one season."""
+
+    def __init__(self, store, season, gameweek, model, window=None):
+        t0 = time.perf_counter()
+        self.store = store
+        self.season = season
+        self.gameweek = gameweek
+        self.window = window or Config.PREDICTION_WINDOW
+        code = store.season_names.index(season)
+        n_players = len(store.player_names)
+
+        # --- History: appearances in GW [gameweek - window, gameweek) -------
+        rows = np.flatnonzero(
+            (store.app_season == code)
+            & (store.app_gw >= gameweek - self.window)
+            & (store.app_gw < gameweek)
+        )
+        players = store.app_player[rows]
+        counts = np.bincount(players, minlength=n_players)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = {
+                col: np.bincount(players, weights=np.nan_to_num(store.stats[col][rows]), minlength=n_players) / counts
+                for col in AVERAGED_FEATURES + ("total_points",)
+            }
+
+        # --- Team: the side a player turned out for most in the window ------
+        team_names = sorted({t for t in store.fixture_home + store.fixture_away if t})
+        team_index = {t: i for i, t in enumerate(team_names)}
+        fixture_home = np.array([team_index.get(t, -1) for t in store.fixture_home], dtype=np.int64)
+        fixture_away = np.array([team_index.get(t, -1) for t in store.fixture_away], dtype=np.int64)
+        n_teams = max(len(team_names), 1)
+        seen = np.zeros(n_players * n_teams)
+        for side in (fixture_home, fixture_away):
+            teams = side[store.app_fixture[rows]]
+            ok = teams >= 0
+            seen += np.bincount(players[ok] * n_teams + teams[ok], minlength=n_players * n_teams)
+        seen = seen.reshape(n_players, n_teams)
+        player_team = np.where(seen.max(axis=1) > 0, seen.argmax(axis=1), -1)
+
+        # --- One feature row per (player, target fixture) --------------------
+        active = np.flatnonzero(counts > 0)
+        targets = np.flatnonzero((store.fixture_season == code) & (store.fixture_gw == gameweek))
+        row_player, row_home = [], []
+        for f in targets:
+            for side, was_home in ((fixture_home[f], 1.0), (fixture_away[f], 0.0)):
+                playing = active[player_team[active] == side]
+                row_player.append(playing)
+                row_home.append(np.full(len(playing), was_home))
+        if not len(targets):
+            # Past the last loaded gameweek: fixtures unknown, use each player's home share
+            home_games = np.bincount(
+                players, weights=(fixture_home[store.app_fixture[rows]] == player_team[players]).astype(np.float64),
+                minlength=n_players)
+            row_player.append(active)
+            row_home.append(home_games[active] / counts[active])
+        row_player = np.concatenate(row_player) if row_player else np.array([], dtype=np.int64)
+        row_home = np.concatenate(row_home) if row_home else np.array([])
+
+        position = np.full(n_players, "", dtype=object)
+        position[store.pair_player] = [
+            MODEL_POSITIONS.get(store.position_names[p].upper(), store.position_names[p]) for p in store.pair_position
+        ]
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+        # --- Score the whole gameweek in one call ----------------------------
+        t0 = time.perf_counter()
+        predicted = np.zeros(n_players)
+        if len(row_player):
+            features = {col: means[col][row_player] for col in AVERAGED_FEATURES}
+            features.update(was_home=row_home, position=position[row_player], form=means["total_points"][row_player])
+            frame = pd.DataFrame({col: features[col] for col in FEATURES})
+            # Double gameweeks add up; blank gameweeks have no rows and stay at 0
+            predicted = np.bincount(row_player, weights=model.predict(frame), minlength=n_players)
+        self.predict_ms = (time.perf_counter() - t0) * 1000
+
+        self.players = np.unique(row_player)
+        self.predicted = predicted
+        self.fixtures = np.bincount(row_player, minlength=n_players)
+        self.form = means["total_points"]
+        self.minutes = means["minutes"]
+        self._by_name = {}
+        for p in self.players:
+            name = store.player_names[p]
+            self._by_name[name] = max(self._by_name.get(name, predicted[p]), predicted[p])
+
+    def top(self, aliases=None, limit=10):
+        """Highest predicted points, optionally for the positions matching aliases."""
+        store = self.store
+        pairs = store._position_pairs(aliases)
+        pairs = pairs[np.isin(store.pair_player[pairs], self.players)]
+        keys = self.predicted[store.pair_player[pairs]]
+        order = np.argsort(-keys, kind="stable")[:limit]
+        return [{
+            "Player": store.player_names[store.pair_player[i]],
+            "Position": store.position_names[store.pair_position[i]],
+            "Gameweek": self.gameweek,
+            "Fixtures": int(self.fixtures[store.pair_player[i]]),
+            "PredictedPoints": cypher_round(self.predicted[store.pair_player[i]], 2),
+            "RecentPointsPerGame": cypher_round(self.form[store.pair_player[i]], 2),
+            "RecentMinutes": cypher_round(self.minutes[store.pair_player[i]], 1),
+        } for i in pairs[order]]
+
+    def attach(self, rows):
+        """Adds PredictedPoints (None if the player has no prediction) to result rows."""
+        for row in rows:
+            value = self._by_name.get(row.get("Player"))
+            row["PredictedPoints"] = cypher_round(value, 2) if value is not None else None
+        return rows
+
+
+# =============================================================================
+# SHARED INSTANCES
+# =============================================================================
+
+# (season, GW, window) -> GameweekPredictions for _predictions_store only,
+# least recently used first
+_predictions = OrderedDict()
+_predictions_store = None
+_predictions_lock = threading.Lock()
+
+
+def get_gameweek_predictions(store, season, gameweek=None, window=None):
+    """
+    Predictions for one season's gameweek (default: the one after the last
+    loaded), built on first use and cached with the store. The cache keeps
+    the Config.PREDICTION_CACHE_SIZE most recently used gameweeks and is
+    emptied when a different store is passed. Returns None when the model is
+    unavailable or the season is not loaded.
+    """
+    global _predictions_store
+    model = load_prediction_model()
+    if model is None or season not in store.season_names:
+        return None
+    if gameweek is None:
+        season_gws = store.fixture_gw[store.fixture_season == store.season_names.index(season)]
+        season_gws = season_gws[~np.isnan(season_gws)]
+        gameweek = int(season_gws.max()) + 1 if len(season_gws) else 1
+    key = (season, int(gameweek), window or Config.PREDICTION_WINDOW)
+    with _predictions_lock:
+        if _predictions_store is not store:
+            _predictions.clear()
+            _predictions_store = store
+        table = _predictions.get(key)
+        if table is None:
+            with span("gameweek_predictions", season=season, gameweek=int(gameweek)) as s:
+                table = GameweekPredictions(store, season, int(gameweek), model, window)
+                s.update(players=len(table.players), build_ms=round(table.build_ms, 1),
+                         predict_ms=round(table.predict_ms, 1))
+            _predictions[key] = table
+            while len(_predictions) > max(Config.PREDICTION_CACHE_SIZE, 1):
+                _predictions.popitem(last=False)
+        else:
+            _predictions.move_to_end(key)
+    return table
+
+
+@on_store_reload
+def reset_predictions():
+    global _predictions_store
+    with _predictions_lock:
+        _predictions.clear()
+        _predictions_store = None
@@ -0,0 +1,208 @@
+"""
+Profiling Module for FPL Graph-RAG Assistant
+Wraps a single request in a profiler, switched on from the sidebar or with
+FPL_PROFILE=1. It uses pyinstrument (sampling, with an HTML call tree and
+speedscope flame data) when installed, and cProfile otherwise. The result
+shows where a slow question spent its time: torch import, difflib
+fallbacks, result stringification...
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import Config
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    SamplingProfiler = None
+    SpeedscopeRenderer = None
+
+
+# Pipeline functions broken out in the per-stage table
+FOCUS_FUNCTIONS = (
+    "parse_user_intent",
+    "query_knowledge_graph",
+    "resolve_player_names_semantic",
+    "resolve_team",
+    "resolve_position",
+    "embed_query",
+    "run_cypher",
+    "generate_natural_language_answer",
+)
+
+TOP_FUNCTIONS = 25
+
+# cProfile and pyinstrument both hook the interpreter globally; one request at a time
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """The outcome of one profiled request, ready for the UI, JSON or disk."""
+
+    def __init__(self, label, backend):
+        self.label = label
+        self.backend = backend
+        self.created_at = time.strftime("%Y%m%d_%H%M%S")
+        self.duration = 0.0
+        self.text = ""
+        self.html = None
+        self.speedscope = None
+        self.stats = None
+        self.stages = {}
+        self.top = []
+        self.skipped = None
+        self.paths = []
+
+    def summary(self):
+        """JSON-safe view (no HTML / raw stats) for the debug panel and /ask."""
+        return {
+            "label": self.label,
+            "backend": self.backend,
+            "duration_ms": round(self.duration * 1000, 1),
+            "stages_ms": self.stages,
+            "top": self.top,
+            "call_tree": self.text,
+            "skipped": self.skipped,
+            "saved_to": self.paths,
+        }
+
+    def save(self, directory=None):
+        """Writes the call tree (+ HTML / speedscope for pyinstrument, .prof for cProfile). Returns the paths."""
+        if self.skipped:
+            return []
+        directory = directory or Config.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"profile_{self.created_at}_{_slug(self.label)}")
+        paths = [f"{stem}.txt"]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write(self.text)
+        if self.html:
+            paths.append(f"{stem}.html")
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write(self.html)
+        if self.speedscope:
+            paths.append(f"{stem}.speedscope.json")
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write(self.speedscope)
+        if self.stats is not None:
+            paths.append(f"{stem}.prof")
+            self.stats.dump_stats(paths[-1])
+        return paths
+
+
+def _slug(text, limit=40):
+    slug = "".join(c if c.isalnum() else "_" for c in str(text).lower())
+    return "_".join(part for part in slug.split("_") if part)[:limit] or "request"
+
+
+# =============================================================================
+# PROFILE A REQUEST
+# =============================================================================
+
+@contextmanager
+def profile_request(label, enabled=None):
+    """
+    Profiles the block when enabled (default: Config.PROFILE_ENABLED) and
+    yields a RequestProfile, filled in and saved to Config.PROFILE_DIR on
+    exit. It yields None when disabled.
+    Only the calling thread is sampled. Compound questions' parallel parts
+    show up as time spent waiting in query_sub_intents.
+    """
+    if enabled is None:
+        enabled = Config.PROFILE_ENABLED
+    if not enabled:
+        yield None
+        return
+
+    profile = RequestProfile(label, "pyinstrument" if SamplingProfiler else "cProfile")
+    if not _profiler_lock.acquire(blocking=False):
+        profile.skipped = "Another request is being profiled"
+        yield profile
+        return
+
+    t0 = time.perf_counter()
+    try:
+        if SamplingProfiler:
+            profiler = SamplingProfiler(interval=Config.PROFILE_INTERVAL)
+            profiler.start()
+            try:
+                yield profile
+            finally:
+                profiler.stop()
+                profile.duration = time.perf_counter() - t0
+                _collect_pyinstrument(profile, profiler)
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield profile
+            finally:
+                profiler.disable()
+                profile.duration = time.perf_counter() - t0
+                _collect_cprofile(profile, profiler)
+    finally:
+        _profiler_lock.release()
+        try:
+            profile.paths = profile.save()
+        except OSError as e:
+            print(f"Profile Save Error: {e}")
+
+
+def _collect_pyinstrument(profile, profiler):
+    profile.text = profiler.output_text(unicode=True, color=False, show_all=False)
+    profile.html = profiler.output_html()
+    profile.speedscope = profiler.output(SpeedscopeRenderer())
+    root = profiler.last_session.root_frame() if profiler.last_session else None
+    stages = {}
+    top = {}
+
+    def walk(frame, inside=()):
+        name = frame.function
+        if name in FOCUS_FUNCTIONS and name not in inside:
+            stages[name] = stages.get(name, 0.0) + frame.time
+            inside = inside + (name,)
+        if not frame.is_synthetic:  # "[self]" frames are already in their parent's total_self_time
+            key = f"{name} ({os.path.basename(frame.file_path or '')}:{frame.line_no})"
+            top[key] = top.get(key, 0.0) + frame.total_self_time
+        for child in frame.children:
+            walk(child, inside)
+
+    if root is not None:
+        walk(root)
+    profile.stages = {k: round(v * 1000, 1) for k, v in stages.items()}
+    profile.top = [
+        {"function": k, "self_ms": round(v * 1000, 1)}
+        for k, v in sorted(top.items(), key=lambda kv: kv[1], reverse=True)[:TOP_FUNCTIONS]
+    ]
+
+
+def _collect_cprofile(profile, profiler):
+    stats = pstats.Stats(profiler)
+    profile.stats = stats
+    buffer = io.StringIO()
+    stats.stream = buffer
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    profile.text = buffer.getvalue()
+
+    stages = {}
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if name in FOCUS_FUNCTIONS:
+            # Recursive calls are already inside cumtime; keep the largest entry per name
+            stages[name] = max(stages.get(name, 0.0), cumtime)
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": ncalls,
+            "self_ms": round(tottime * 1000, 1),
+            "cumulative_ms": round(cumtime * 1000, 1),
+        })
+    profile.stages = {k: round(v * 1000, 1) for k, v in stages.items()}
+    profile.top = sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:TOP_FUNCTIONS]
+
@@ -0,0 +1,354 @@
+"""
+Rate Limits Module for FPL Graph-RAG Assistant
+Client-side scheduler for LLM calls. Each provider gets two token buckets:
+one for requests per minute and one for estimated tokens per minute.
+Waiting callers are served in priority order, so interactive chat goes ahead
+of batch jobs. A 429's Retry-After pauses the provider and lowers its rate
+for a while. Throughput stays just under the limits instead of bouncing off
+them.
+
+The buckets live in one process. Callers in other processes (e.g.
+batch_questions.py) either send their questions through server.py, which
+shares its scheduler, or run with a share of the limits (Config.LLM_BATCH_SHARE).
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+
+from .config import Config
+from .tracing import METRICS, current_span
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Bucket size as a share of the per-minute limit. With the headroom this keeps
+# any 60 s window at or under the provider's limit.
+BURST_FRACTION = 0.1
+
+# Rough prompt size -> tokens, when no tokenizer is at hand
+CHARS_PER_TOKEN = 4
+
+# After a 429 the rate drops to this share and recovers a little per success
+BACKOFF_FACTOR = 0.8
+MIN_RATE_SCALE = 0.5
+RECOVERY_STEP = 0.02
+
+# Used when a 429 carries no usable Retry-After
+DEFAULT_RETRY_AFTER = 5.0
+
+_priority = ContextVar("fpl_llm_priority", default=PRIORITY_INTERACTIVE)
+_waits = ContextVar("fpl_llm_waits", default=None)
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+class RateLimitExceeded(Exception):
+    """A provider kept answering 429 after all retries."""
+
+
+def parse_limits(spec):
+    """'groq=30,openai=60' -> {"groq": 30.0, "openai": 60.0} (0 means no limit)"""
+    limits = {}
+    for part in (spec or "").split(","):
+        provider, _, value = part.partition("=")
+        if provider.strip() and value.strip():
+            limit = float(value)
+            if limit < 0:
+                raise ValueError(f"Rate limit for {provider.strip()} must be >= 0, got {value.strip()}")
+            limits[provider.strip().lower()] = limit
+    return limits
+
+
+def estimate_tokens(prompt_chars, max_completion_tokens):
+    return int(prompt_chars / CHARS_PER_TOKEN) + max_completion_tokens
+
+
+@contextmanager
+def request_priority(priority):
+    """LLM calls made inside the block (in this thread/context) queue at this priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class WaitTracker:
+    seconds = 0.0
+
+
+@contextmanager
+def track_waits():
+    """Sums the time LLM calls inside the block spent queued for a rate limit."""
+    tracker = WaitTracker()
+    token = _waits.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _waits.reset(token)
+
+
+# =============================================================================
+# RETRY-AFTER
+# =============================================================================
+
+def _status_code(error):
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_rate_limit_error(error):
+    return _status_code(error) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def retry_after_seconds(error):
+    """
+    How long the provider asked us to wait: retry-after-ms / retry-after headers
+    (Groq, OpenAI, Cerebras SDKs), Gemini's retryDelay, else DEFAULT_RETRY_AFTER.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s", str(error))
+    if match:
+        return float(match.group(1))
+    return DEFAULT_RETRY_AFTER
+
+
+# =============================================================================
+# BUCKETS
+# =============================================================================
+
+class TokenBucket:
+    """
+    Refills at `rate` units/second up to `capacity`. The level may go negative
+    (debt). A per_minute of 0 means no limit: the bucket never makes a call wait.
+    """
+
+    def __init__(self, per_minute, headroom):
+        if per_minute < 0 or headroom <= 0:
+            raise ValueError(f"Invalid rate limit: {per_minute}/min at headroom {headroom}")
+        self.per_minute = per_minute
+        self.limited = per_minute > 0
+        self.rate = per_minute * headroom / 60.0
+        self.capacity = max(1.0, per_minute * BURST_FRACTION)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now, scale=1.0):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * scale)
+        self.updated = now
+
+    def wait_time(self, amount, scale=1.0):
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)."""
+        if not self.limited:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / (self.rate * scale)
+
+    def take(self, amount):
+        """Charges the whole amount; above capacity the bucket goes into debt and later calls wait it off."""
+        if self.limited:
+            self.level -= amount
+
+
+class ProviderLimiter:
+    """Requests + tokens buckets and a priority queue of waiting calls for one provider."""
+
+    def __init__(self, name, rpm, tpm=None, headroom=None):
+        headroom = headroom if headroom is not None else Config.LLM_RATE_HEADROOM
+        self.name = name
+        self.requests = TokenBucket(rpm, headroom)
+        self.tokens = TokenBucket(tpm, headroom) if tpm else None
+        self.scale = 1.0
+        self.blocked_until = 0.0
+        self.rate_limited = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _wait_time(self, tokens, now):
+        self.requests.refill(now, self.scale)
+        wait = self.requests.wait_time(1, self.scale)
+        if self.tokens:
+            self.tokens.refill(now, self.scale)
+            wait = max(wait, self.tokens.wait_time(tokens, self.scale))
+        return max(wait, self.blocked_until - now)
+
+    def acquire(self, tokens=0, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Blocks until this call is first in line and both buckets allow it. Returns seconds waited."""
+        t0 = time.monotonic()
+        deadline = t0 + timeout if timeout else None
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._queue[0] == entry else None
+                    if wait == 0.0:
+                        heapq.heappop(self._queue)
+                        self.requests.take(1)
+                        if self.tokens:
+                            self.tokens.take(tokens)
+                        self._cond.notify_all()
+                        return now - t0
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise RateLimitTimeout(
+                                f"Waited {now - t0:.0f}s for a {self.name} rate-limit slot"
+                            )
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def settle(self, estimated, actual):
+        """After a successful call: corrects the token estimate and recovers the rate."""
+        with self._cond:
+            if self.tokens and actual is not None:
+                self.tokens.level -= actual - estimated
+            self.scale = min(1.0, self.scale + RECOVERY_STEP)
+
+    def penalize(self, retry_after):
+        """A 429: pause until Retry-After, empty the buckets and slow down."""
+        with self._cond:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.requests.refill(now, self.scale)
+            self.requests.level = min(self.requests.level, 0.0)
+            if self.tokens:
+                self.tokens.refill(now, self.scale)
+                self.tokens.level = min(self.tokens.level, 0.0)
+            self.scale = max(MIN_RATE_SCALE, self.scale * BACKOFF_FACTOR)
+            self.rate_limited += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "rpm": self.requests.per_minute,
+                "tpm": self.tokens.per_minute if self.tokens else None,
+                "rate_scale": round(self.scale, 2),
+                "queued": len(self._queue),
+                "blocked_for_s": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+                "rate_limited": self.rate_limited,
+            }
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+class RateLimitScheduler:
+    """Process-wide registry of ProviderLimiters, built from Config on first use."""
+
+    def __init__(self):
+        self.enabled = Config.LLM_RATE_LIMITS_ENABLED
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider, rpm=None, tpm=None):
+        """Replaces one provider's limits (e.g. from batch_questions.py --rpm)."""
+        current = self.limiter(provider)
+        with self._lock:
+            self._limiters[provider] = ProviderLimiter(
+                provider,
+                rpm if rpm is not None else current.requests.per_minute,
+                tpm if tpm is not None else (current.tokens.per_minute if current.tokens else None),
+            )
+
+    def limiter(self, provider):
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                rpm = parse_limits(Config.LLM_RPM).get(provider, 30)
+                limiter = ProviderLimiter(provider, rpm, parse_limits(Config.LLM_TPM).get(provider))
+                self._limiters[provider] = limiter
+            return limiter
+
+    def call(self, provider, fn, prompt_chars=0, max_completion_tokens=0, usage=None):
+        """
+        Runs fn() once the provider's buckets allow it, at the caller's
+        request_priority. On a 429 it honours Retry-After and retries up to
+        Config.LLM_MAX_RETRIES times. usage(result) returns the real token count.
+        """
+        if not self.enabled:
+            return fn()
+        limiter = self.limiter(provider)
+        estimated = estimate_tokens(prompt_chars, max_completion_tokens)
+        waited = 0.0
+        try:
+            for attempt in range(Config.LLM_MAX_RETRIES + 1):
+                wait = limiter.acquire(estimated, _priority.get(), timeout=Config.LLM_QUEUE_TIMEOUT)
+                waited += wait
+                if wait:
+                    METRICS.observe("fpl_llm_queue_wait_seconds", wait, {"provider": provider})
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    METRICS.inc("fpl_llm_rate_limited_total", {"provider": provider})
+                    limiter.penalize(retry_after_seconds(e))
+                    if attempt == Config.LLM_MAX_RETRIES:
+                        raise RateLimitExceeded(f"{provider} rate limit: {e}") from e
+                    continue
+                limiter.settle(estimated, usage(result) if usage else None)
+                return result
+        finally:
+            self._record_wait(waited)
+
+    @staticmethod
+    def _record_wait(seconds):
+        if not seconds:
+            return
+        tracker = _waits.get()
+        if tracker is not None:
+            tracker.seconds += seconds
+        active = current_span()
+        if active is not None:
+            active.set("rate_limit_wait_ms", round(seconds * 1000, 1))
+
+    def stats(self):
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.stats() for name, limiter in sorted(limiters.items())}
+
+
+def completion_tokens_used(completion):
+    """total_tokens from an OpenAI-style completion (Groq, OpenAI, Cerebras)."""
+    return getattr(getattr(completion, "usage", None), "total_tokens", None)
+
+
+def gemini_tokens_used(response):
+    return getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+
+
+SCHEDULER = RateLimitScheduler()
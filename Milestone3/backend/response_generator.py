@@ -3,7 +3,13 @@ Response Generator Module for FPL Graph-RAG Assistant
 Generates natural language answers using LLMs, grounded in Knowledge Graph data.
 """
 
-from .config import Config, groq_client, openai_client, gemini_client, cerebras_client
+from .config import Config, groq_client, openai_client, gemini_client, cerebras_client, get_provider_name
+from .tracing import span, mark_error
+from .rate_limits import SCHEDULER, completion_tokens_used, gemini_tokens_used
+from .seasons import get_season_registry
+
+# max_tokens of every answer call (also reserved against the tokens/min limit)
+ANSWER_MAX_TOKENS = 500
 
 
 def generate_natural_language_answer(user_query, structured_data, kg_data, model_name=None):
@@ -48,10 +54,18 @@ def generate_natural_language_answer(user_query, structured_data, kg_data, model
     
     system_persona = persona_map.get(intent, "You are a helpful FPL Assistant.")
 
+    # Compound question: one merged context with a labelled section per part
+    sub_intents = structured_data.get("sub_intents") or []
+    multi_part_note = ""
+    if len(sub_intents) > 1:
+        system_persona = "You are an expert FPL Analyst. The question has several parts; answer each one."
+        multi_part_note = "- The question has several parts. Answer each part in turn from its [Part N] section.\n"
+
     # Build prompt
+    seasons = ", ".join(get_season_registry().names)
     prompt = f"""
 [SYSTEM CONTEXT]
-- You are strictly limited to FPL data from seasons 2021-22 and 2022-23.
+- You are strictly limited to FPL data from seasons {seasons}.
 - Do NOT use external knowledge about matches/players outside this range.
 
 [CONTEXT]
@@ -63,79 +77,85 @@ The user asked: "{user_query}"
 - Answer the question using ONLY the retrieved info above.
 - If the retrieved info contains the answer, be specific (numbers, names).
 - If the retrieved info is empty or irrelevant, admit you don't know based on the database.
-- Keep it short and conversational.
+{multi_part_note}- Keep it short and conversational.
 """
     
     target_model = model_name if model_name else Config.MODEL_GROQ
+    prompt_chars = len(system_persona) + len(prompt)
     
-    try:
-        # Groq (Llama)
-        if target_model == Config.MODEL_GROQ and groq_client:
-            completion = groq_client.chat.completions.create(
-                model=target_model,
-                messages=[
-                    {"role": "system", "content": system_persona},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            return completion.choices[0].message.content
-        
-        # OpenAI (GPT-4)
-        elif target_model == Config.MODEL_OPENAI and openai_client:
-            completion = openai_client.chat.completions.create(
-                model=target_model,
-                messages=[
-                    {"role": "system", "content": system_persona},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            return completion.choices[0].message.content
+    with span("generate_natural_language_answer", intent=intent, parts=len(sub_intents) or None,
+              provider=get_provider_name(target_model), model=target_model,
+              prompt_chars=prompt_chars) as answer_span:
+        try:
+            # Groq (Llama)
+            if target_model == Config.MODEL_GROQ and groq_client:
+                completion = SCHEDULER.call("groq", lambda: groq_client.chat.completions.create(
+                    model=target_model,
+                    messages=[
+                        {"role": "system", "content": system_persona},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=ANSWER_MAX_TOKENS
+                ), prompt_chars, ANSWER_MAX_TOKENS, completion_tokens_used)
+                return completion.choices[0].message.content
         
-        # Google Gemini
-        elif target_model == Config.MODEL_GEMINI and gemini_client:
-            full_prompt = f"{system_persona}\n\n{prompt}"
-            response = gemini_client.models.generate_content(
-                model=target_model,
-                contents=full_prompt
-            )
-            return response.text
+            # OpenAI (GPT-4)
+            elif target_model == Config.MODEL_OPENAI and openai_client:
+                completion = SCHEDULER.call("openai", lambda: openai_client.chat.completions.create(
+                    model=target_model,
+                    messages=[
+                        {"role": "system", "content": system_persona},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=ANSWER_MAX_TOKENS
+                ), prompt_chars, ANSWER_MAX_TOKENS, completion_tokens_used)
+                return completion.choices[0].message.content
         
-        # Cerebras (Llama - Fast Inference)
-        elif target_model == Config.MODEL_CEREBRAS and cerebras_client:
-            completion = cerebras_client.chat.completions.create(
-                model=target_model,
-                messages=[
-                    {"role": "system", "content": system_persona},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_completion_tokens=500,
-                top_p=1
-            )
-            return completion.choices[0].message.content
+            # Google Gemini
+            elif target_model == Config.MODEL_GEMINI and gemini_client:
+                full_prompt = f"{system_persona}\n\n{prompt}"
+                response = SCHEDULER.call("gemini", lambda: gemini_client.models.generate_content(
+                    model=target_model,
+                    contents=full_prompt
+                ), prompt_chars, ANSWER_MAX_TOKENS, gemini_tokens_used)
+                return response.text
         
-        # Fallback to Groq
-        else:
-            if groq_client:
-                completion = groq_client.chat.completions.create(
-                    model=Config.MODEL_GROQ,
+            # Cerebras (Llama - Fast Inference)
+            elif target_model == Config.MODEL_CEREBRAS and cerebras_client:
+                completion = SCHEDULER.call("cerebras", lambda: cerebras_client.chat.completions.create(
+                    model=target_model,
                     messages=[
                         {"role": "system", "content": system_persona},
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.7,
-                    max_tokens=500
-                )
-                return f"[Using Groq fallback] {completion.choices[0].message.content}"
+                    max_completion_tokens=ANSWER_MAX_TOKENS,
+                    top_p=1
+                ), prompt_chars, ANSWER_MAX_TOKENS, completion_tokens_used)
+                return completion.choices[0].message.content
+        
+            # Fallback to Groq
             else:
-                return f"⚠️ No LLM available for '{target_model}'. Check API keys."
+                if groq_client:
+                    answer_span.update(provider="groq", model=Config.MODEL_GROQ, fallback_from=target_model)
+                    completion = SCHEDULER.call("groq", lambda: groq_client.chat.completions.create(
+                        model=Config.MODEL_GROQ,
+                        messages=[
+                            {"role": "system", "content": system_persona},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=ANSWER_MAX_TOKENS
+                    ), prompt_chars, ANSWER_MAX_TOKENS, completion_tokens_used)
+                    return f"[Using Groq fallback] {completion.choices[0].message.content}"
+                else:
+                    return f"⚠️ No LLM available for '{target_model}'. Check API keys."
         
-    except Exception as e:
-        return f"⚠️ LLM Error: {str(e)}"
+        except Exception as e:
+            mark_error(e)
+            return f"⚠️ LLM Error: {str(e)}"
 
 
 def get_model_display_name(model_name):
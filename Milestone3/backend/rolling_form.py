@@ -0,0 +1,114 @@
+"""
+Rolling Form Module for FPL Graph-RAG Assistant
+Per-season prefix sums of points, minutes, goals and assists by gameweek, so
+any form window (last N GWs, GW a-b, form as of a past GW) is answered in
+O(players) from memory.
+"""
+
+import threading
+
+import numpy as np
+
+from .columnar import cypher_round, on_store_reload
+
+
+# Appearances shorter than this do not count towards form (as before)
+MIN_MINUTES = 60
+
+
+# =============================================================================
+# PREFIX SUMS
+# =============================================================================
+
+class SeasonForm:
+    """Cumulative per-player, per-gameweek totals for one season."""
+
+    def __init__(self, store, season):
+        self.season = season
+        self.store = store
+        code = store.season_names.index(season)
+
+        season_gws = store.fixture_gw[store.fixture_season == code]
+        season_gws = season_gws[~np.isnan(season_gws)]
+        self.latest_gw = int(season_gws.max()) if len(season_gws) else None
+        width = (self.latest_gw or 0) + 1
+        n_players = len(store.player_names)
+
+        rows = np.flatnonzero(
+            (store.app_season == code)
+            & ~np.isnan(store.app_gw)
+            & (store.stats["minutes"] >= MIN_MINUTES)
+        )
+        flat = store.app_player[rows] * width + store.app_gw[rows].astype(np.int64)
+        points = store.stats["total_points"][rows]
+
+        def accumulate(weights):
+            per_gw = np.bincount(flat, weights=weights, minlength=n_players * width)
+            return np.cumsum(per_gw.reshape(n_players, width), axis=1)
+
+        self.prefix = {
+            "matches": accumulate(np.ones(len(rows))),
+            "points": accumulate(np.nan_to_num(points)),
+            "points_counted": accumulate((~np.isnan(points)).astype(np.float64)),
+            "minutes": accumulate(np.nan_to_num(store.stats["minutes"][rows])),
+            "goals": accumulate(np.nan_to_num(store.stats["goals_scored"][rows])),
+            "assists": accumulate(np.nan_to_num(store.stats["assists"][rows])),
+        }
+
+    def window_totals(self, start, end):
+        """Per-player totals over GW start..end (inclusive) via two lookups."""
+        last = self.prefix["matches"].shape[1] - 1
+        end = min(end, last)
+        if end < start or end < 0:
+            return {k: np.zeros(v.shape[0]) for k, v in self.prefix.items()}
+        lo = max(start, 1) - 1
+        return {k: v[:, end] - v[:, lo] for k, v in self.prefix.items()}
+
+    def captaincy_pick(self, start, end, min_matches, limit=10):
+        """Top players by points per game over the window (same rows as the Cypher)."""
+        totals = self.window_totals(start, end)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_points = totals["points"] / totals["points_counted"]
+
+        store = self.store
+        players = store.pair_player
+        eligible = np.flatnonzero(
+            (totals["matches"][players] >= min_matches) & (totals["points_counted"][players] > 0)
+        )
+        keys = avg_points[players[eligible]]
+        order = np.argsort(-keys, kind="stable")[:limit]
+        return [{
+            "Player": store.player_names[players[i]],
+            "Position": store.position_names[store.pair_position[i]],
+            "RecentMatches": int(totals["matches"][players[i]]),
+            "RecentPoints": int(totals["points"][players[i]]),
+            "PointsPerGame": cypher_round(avg_points[players[i]], 2),
+            "Goals": int(totals["goals"][players[i]]),
+            "Assists": int(totals["assists"][players[i]]),
+        } for i in eligible[order]]
+
+
+# =============================================================================
+# SHARED INSTANCES
+# =============================================================================
+
+_forms = {}
+_forms_lock = threading.Lock()
+
+
+def get_season_form(store, season):
+    """Builds a season's prefix sums on first use and caches them with the store."""
+    key = (id(store), season)
+    if key not in _forms:
+        with _forms_lock:
+            if key not in _forms:
+                if season not in store.season_names:
+                    return None
+                _forms[key] = SeasonForm(store, season)
+    return _forms[key]
+
+
+@on_store_reload
+def reset_season_forms():
+    with _forms_lock:
+        _forms.clear()
@@ -0,0 +1,269 @@
+"""
+Seasons Module for FPL Graph-RAG Assistant
+Seasons are partitions of the graph. Every Fixture carries `season` and `gw`,
+every PLAYED_IN appearance carries the same two keys, and both are indexed.
+The templates filter on those keys with equality, so a one-season question
+reads one season's rows however many seasons are loaded.
+
+The SeasonRegistry lists the seasons present in the graph and maps free text
+("2022/23", "22-23", "last season", ...) to a season name. It also carries a
+data version (node and relationship counts) that in-process caches built from
+the graph compare against to notice a reload, an embeddings version
+(digest of the players' text hashes) for caches of vector-search answers,
+and the physical vector index each logical one points at (vector_indexes.py).
+"""
+
+import hashlib
+import re
+import threading
+import time
+
+from .config import Config
+from .vector_indexes import active_vector_indexes, default_vector_indexes
+
+
+# Used when the graph cannot be reached (and by load_graph.py)
+DEFAULT_SEASONS = ("2021-22", "2022-23")
+
+# Properties that key fixtures and PLAYED_IN appearances to their partition
+PARTITION_KEYS = ("season", "gw")
+
+# Partition indexes: season-only lookups use the single-property indexes,
+# season + gameweek lookups the composite ones
+PARTITION_INDEXES = [
+    "CREATE INDEX fixture_season IF NOT EXISTS FOR (f:Fixture) ON (f.season)",
+    "CREATE INDEX fixture_season_gw IF NOT EXISTS FOR (f:Fixture) ON (f.season, f.gw)",
+    "CREATE INDEX played_in_season IF NOT EXISTS FOR ()-[r:PLAYED_IN]-() ON (r.season)",
+    "CREATE INDEX played_in_season_gw IF NOT EXISTS FOR ()-[r:PLAYED_IN]-() ON (r.season, r.gw)",
+]
+
+SEASONS_QUERY = "MATCH (s:Season) RETURN s.season_name AS name"
+
+# Counts come from the count store, so this is cheap on any graph size
+GRAPH_VERSION_QUERY = """
+MATCH (f:Fixture) WITH count(f) AS fixtures
+MATCH ()-[r:PLAYED_IN]->() WITH fixtures, count(r) AS appearances
+MATCH (p:Player)
+RETURN fixtures, appearances, count(p) AS players
+"""
+
+EMBEDDINGS_VERSION_QUERY = """
+MATCH (p:Player) WHERE p.text_hash IS NOT NULL
+RETURN p.text_hash AS text_hash
+"""
+
+# One appearance is enough to tell whether the graph predates the partition keys
+PARTITIONED_QUERY = """
+MATCH ()-[r:PLAYED_IN]->()
+RETURN r.season IS NOT NULL AND r.gw IS NOT NULL AS keyed
+LIMIT 1
+"""
+
+# Backfill for graphs loaded before the partition keys existed. Fixtures take
+# their season and gameweek from Season -> Gameweek -> Fixture, then each
+# fixture's appearances copy them.
+BACKFILL_FIXTURES_QUERY = """
+MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f:Fixture)
+WHERE f.season IS NULL OR f.gw IS NULL
+SET f.season = coalesce(f.season, s.season_name), f.gw = coalesce(f.gw, gw.GW_number)
+"""
+
+BACKFILL_APPEARANCES_QUERY = """
+MATCH (f:Fixture)
+WHERE f.season IS NOT NULL AND f.gw IS NOT NULL
+CALL (f) {
+    MATCH (:Player)-[r:PLAYED_IN]->(f)
+    WHERE r.season IS NULL OR r.gw IS NULL
+    SET r.season = f.season, r.gw = f.gw
+} IN TRANSACTIONS OF {batch} ROWS
+"""
+
+PARTITION_COUNTS_QUERY = """
+MATCH (f:Fixture)
+OPTIONAL MATCH (:Player)-[r:PLAYED_IN]->(f)
+RETURN f.season AS season,
+       count(DISTINCT f) AS fixtures,
+       count(DISTINCT f.gw) AS gameweeks,
+       count(r) AS appearances,
+       count(r.season) AS keyed
+ORDER BY season
+"""
+
+_CURRENT_WORDS = ("this season", "current", "latest")
+_PREVIOUS_WORDS = ("last season", "previous", "prior")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def start_year(season):
+    """'2022-23' -> 2022 (None if the name carries no 4-digit year)."""
+    match = re.search(r"(\d{4})", str(season))
+    return int(match.group(1)) if match else None
+
+
+class SeasonRegistry:
+    """The seasons in the graph, oldest first, and free-text resolution against them."""
+
+    def __init__(self, names, partitioned=True, source="graph", version=None, embeddings_version=None,
+                 vector_indexes=None):
+        self.names = sorted({str(n) for n in names if n}, key=lambda n: (start_year(n) or 0, n))
+        self.partitioned = partitioned
+        self.source = source
+        # None when the graph was not read (defaults): callers keep what they have
+        self.version = version
+        self.embeddings_version = embeddings_version
+        self.vector_indexes = vector_indexes or default_vector_indexes()
+        self.loaded_at = time.monotonic()
+        self._by_start = {start_year(n): n for n in self.names if start_year(n) is not None}
+
+    @classmethod
+    def from_session(cls, session):
+        names = [r["name"] for r in session.run(SEASONS_QUERY)]
+        record = session.run(PARTITIONED_QUERY).single()
+        return cls(names, partitioned=bool(record and record["keyed"]), version=graph_version(session),
+                   embeddings_version=embeddings_version(session), vector_indexes=active_vector_indexes(session))
+
+    @property
+    def latest(self):
+        return self.names[-1] if self.names else None
+
+    def resolve(self, raw):
+        """
+        Free-text season -> season name. Empty input means the latest season;
+        "2022", "22", "2022/23", "22-23" and "2022-2023" all pick 2022-23 (a
+        lone year matches a season's start, then its end). Input naming no
+        loaded season is returned as given, and the query finds nothing.
+        """
+        if raw is None or not str(raw).strip():
+            return self.latest
+        text = str(raw).strip()
+        if text in self.names:
+            return text
+
+        lowered = text.lower()
+        if any(word in lowered for word in _PREVIOUS_WORDS):
+            return self.names[-2] if len(self.names) > 1 else self.latest
+        if any(word in lowered for word in _CURRENT_WORDS):
+            return self.latest
+
+        years = [int(y) for y in re.findall(r"\d{2,4}", lowered)]
+        years = [y if y >= 100 else 2000 + y for y in years]
+        if not years:
+            return text
+        if len(years) >= 2 and years[1] == years[0] + 1:
+            return self._by_start.get(years[0], text)
+        year = years[0]
+        return self._by_start.get(year) or self._by_start.get(year - 1) or text
+
+    def stats(self):
+        return {
+            "seasons": self.names,
+            "latest": self.latest,
+            "partitioned": self.partitioned,
+            "source": self.source,
+            "version": self.version,
+            "embeddings_version": self.embeddings_version,
+            "vector_indexes": {name: entry["index"] for name, entry in self.vector_indexes.items()},
+        }
+
+
+def graph_version(session):
+    """'fixtures/appearances/players' - changes whenever the graph is reloaded or extended."""
+    record = session.run(GRAPH_VERSION_QUERY).single()
+    if record is None:
+        return "0/0/0"
+    return f"{record['fixtures']}/{record['appearances']}/{record['players']}"
+
+
+def embeddings_version(session):
+    """'count:digest' of the embedded players' text hashes; changes when any player is re-embedded."""
+    hashes = sorted(r["text_hash"] for r in session.run(EMBEDDINGS_VERSION_QUERY))
+    digest = hashlib.sha1("\n".join(hashes).encode("utf-8")).hexdigest()[:12]
+    return f"{len(hashes)}:{digest}"
+
+
+def get_season_registry():
+    """
+    Loads the registry from Neo4j on first use and again once it is older
+    than Config.SEASON_REGISTRY_TTL. If the graph is unreachable it keeps
+    the previous registry (or DEFAULT_SEASONS) until the next refresh.
+    """
+    global _registry
+    registry = _registry
+    if registry is not None and time.monotonic() - registry.loaded_at < Config.SEASON_REGISTRY_TTL:
+        return registry
+    with _registry_lock:
+        if _registry is None or time.monotonic() - _registry.loaded_at >= Config.SEASON_REGISTRY_TTL:
+            # Imported here: knowledge_graph itself resolves seasons through this module
+            from .knowledge_graph import get_driver
+            try:
+                with get_driver().session() as session:
+                    loaded = SeasonRegistry.from_session(session)
+            except Exception as e:
+                print(f"Season Registry Error: {e}")
+                loaded = SeasonRegistry(_registry.names if _registry else DEFAULT_SEASONS, source="default",
+                                        vector_indexes=_registry.vector_indexes if _registry else None)
+            if not loaded.names:
+                loaded = SeasonRegistry(DEFAULT_SEASONS, partitioned=loaded.partitioned, source="default",
+                                        version=loaded.version, embeddings_version=loaded.embeddings_version,
+                                        vector_indexes=loaded.vector_indexes)
+            if not loaded.partitioned and (_registry is None or _registry.partitioned):
+                print("⚠️  PLAYED_IN has no season/gw keys; run `python graph_seasons.py partition`.")
+            _registry = loaded
+        return _registry
+
+
+def reset_season_registry():
+    """Drops the cached registry so the next lookup reads the graph again."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+def resolve_season(raw):
+    return get_season_registry().resolve(raw)
+
+
+# =============================================================================
+# PARTITION AN EXISTING GRAPH
+# =============================================================================
+
+def create_partition_indexes(driver):
+    with driver.session() as session:
+        for statement in PARTITION_INDEXES:
+            session.run(statement).consume()
+        session.run("CALL db.awaitIndexes(300)").consume()
+
+
+def partition_graph(driver, batch_size=100, log=print):
+    """
+    Adds the season/gw keys to a graph loaded before they existed and creates
+    the partition indexes. Idempotent; already keyed rows are skipped.
+    batch_size is in fixtures per transaction (about 30 appearances each).
+    Raises RuntimeError if any appearance is still unkeyed afterwards (its
+    fixture is not reachable from a Season), since the templates would miss it.
+    """
+    log("   ...Creating partition indexes")
+    create_partition_indexes(driver)
+    with driver.session() as session:
+        t0 = time.perf_counter()
+        keys_set = session.run(BACKFILL_FIXTURES_QUERY).consume().counters.properties_set
+        log(f"   ...Fixture season/gw: {keys_set:,} keys set ({time.perf_counter() - t0:.1f}s)")
+        t0 = time.perf_counter()
+        # CALL { } IN TRANSACTIONS needs an auto-commit transaction (session.run)
+        session.run(BACKFILL_APPEARANCES_QUERY.replace("{batch}", str(int(batch_size)))).consume()
+        log(f"   ...PLAYED_IN season/gw backfilled ({time.perf_counter() - t0:.1f}s)")
+        rows = [dict(r) for r in session.run(PARTITION_COUNTS_QUERY)]
+    reset_season_registry()
+    unkeyed = {r["season"]: r["appearances"] - r["keyed"] for r in rows if r["keyed"] < r["appearances"]}
+    if unkeyed:
+        detail = ", ".join(f"{season or 'no season'}: {count:,}" for season, count in unkeyed.items())
+        raise RuntimeError(f"{sum(unkeyed.values()):,} appearances still lack season/gw keys ({detail}). "
+                           "Link their fixtures Season -> Gameweek -> Fixture and re-run.")
+    return rows
+
+
+def partition_counts(driver):
+    with driver.session() as session:
+        return [dict(r) for r in session.run(PARTITION_COUNTS_QUERY)]
@@ -0,0 +1,257 @@
+"""
+Backend Service Module for FPL Graph-RAG Assistant
+A long-lived HTTP service (stdlib ThreadingHTTPServer) around the pipeline.
+It keeps the Neo4j driver, embedders, vector replica, leaderboards and
+columnar store warm, so Streamlit processes only render the UI.
+
+Endpoints (JSON in, JSON out):
+    GET  /health   readiness (+ process CPU/RSS); 200 once warm-up finished, 503 before
+    GET  /metrics  Prometheus text exposition of the span metrics (rendered on scrape)
+    POST /intent   {"question"}                                -> intent data
+    POST /graph    {"intent_data", "mode", "model_choice"}     -> {"data", "cypher"}
+    POST /ask      {"question", "mode", "model_choice", "llm", "context", "profile"} -> answer + timings + trace
+
+Any POST may add "priority": "batch" so its LLM calls queue behind chat in
+the service's rate-limit scheduler (batch_questions.py --backend).
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import Config
+from .intent_parser import parse_user_intent
+from .conversation import apply_context, format_context
+from .knowledge_graph import query_knowledge_graph, get_driver, warm_query_plans
+from .cypher_templates import PLAN_CACHE
+from .rate_limits import PRIORITY_BATCH, PRIORITY_INTERACTIVE, SCHEDULER, request_priority
+from .profiling import profile_request
+from .response_generator import generate_natural_language_answer
+from .embeddings import get_embedder
+from .embedding_cache import get_embedding_cache
+from .leaderboards import load_leaderboards
+from .seasons import get_season_registry
+from .loadgen import llm_stubbed, process_usage
+from .tracing import METRICS, span
+
+try:
+    from .columnar import get_columnar_store
+    from .predictions import load_prediction_model
+    from .vector_store import get_local_index
+except ImportError:
+    get_columnar_store = None
+    load_prediction_model = None
+    get_local_index = None
+
+
+MODES = ("baseline", "semantic", "columnar")
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def ask(question, mode="semantic", model_choice="A", llm=None, context=None, profile=False):
+    """
+    Runs intent -> graph -> answer once and returns everything the UI shows.
+    context is the caller's previous turn (ConversationMemory.context()).
+    profile (or FPL_PROFILE=1 on the server) adds a profile summary; the
+    full call tree is saved under the server's FPL_PROFILE_DIR.
+    """
+    llm = llm or Config.MODEL_GROQ
+    with span("ask", retrieval_mode=mode) as s, \
+            profile_request(question, enabled=profile or Config.PROFILE_ENABLED) as request_profile:
+        t0 = time.perf_counter()
+        intent_data = apply_context(parse_user_intent(question, format_context(context)), context)
+        t_intent = time.perf_counter() - t0
+        s.set("intent", intent_data["intent"])
+
+        t0 = time.perf_counter()
+        kg_result = query_knowledge_graph(intent_data, retrieval_mode=mode, model_choice=model_choice)
+        t_graph = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        answer = generate_natural_language_answer(question, intent_data, kg_result.get("data", "[]"), model_name=llm)
+        t_llm = time.perf_counter() - t0
+
+    return {
+        "intent_data": intent_data,
+        "data": kg_result.get("data", "[]"),
+        "cypher": kg_result.get("cypher", "No query"),
+        "resolved": kg_result.get("resolved"),
+        "answer": answer,
+        "timings": {"intent": t_intent, "graph": t_graph, "llm": t_llm},
+        "trace": s.to_dict(),
+        "profile": request_profile.summary() if request_profile else None,
+    }
+
+
+# =============================================================================
+# WARM-UP / READINESS
+# =============================================================================
+
+class Warmup:
+    """Loads shared resources in the background and tracks readiness."""
+
+    def __init__(self, load_columnar=True):
+        self.load_columnar = load_columnar
+        self.components = {}
+        self.ready = threading.Event()
+        self.failed = False
+
+    def _load(self, name, fn, critical=False):
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+            status = "ok" if result is not None else "unavailable"
+        except Exception as e:
+            status = f"error: {e}"
+            self.failed |= critical
+        self.components[name] = {"status": status, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+    def run(self):
+        self._load("neo4j", lambda: get_driver().verify_connectivity() or True, critical=True)
+        self._load("plan_cache", warm_query_plans)
+        self._load("seasons", get_season_registry)
+        for choice, model_name in (("A", Config.EMBEDDING_MODEL_A), ("B", Config.EMBEDDING_MODEL_B)):
+            self._load(f"embedder_{choice}", lambda m=model_name: _warm_embedder(m))
+        self._load("embedding_cache", get_embedding_cache)
+        self._load("leaderboards", load_leaderboards)
+        if load_prediction_model:
+            self._load("prediction_model", load_prediction_model)
+        if get_local_index:
+            self._load("local_vector_index", get_local_index)
+        if get_columnar_store and self.load_columnar:
+            self._load("columnar_store", get_columnar_store)
+        if not self.failed:
+            self.ready.set()
+
+    def start(self):
+        threading.Thread(target=self.run, name="service-warmup", daemon=True).start()
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "failed": self.failed,
+            "components": dict(self.components),
+        }
+
+
+def _warm_embedder(model_name):
+    embedder = get_embedder(model_name)
+    if embedder is not None:
+        embedder.embed_query("warm up")
+    return embedder
+
+
+# =============================================================================
+# HTTP
+# =============================================================================
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "FPLService/1.0"
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        payload = json.loads(self.rfile.read(length))
+        if not isinstance(payload, dict):
+            raise ValueError("body must be a JSON object")
+        return payload
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            return self._send_text(200, METRICS.render_prometheus())
+        if path != "/health":
+            return self._send(404, {"error": f"Unknown path {self.path}"})
+        status = self.server.warmup.status()
+        status["workers"] = self.server.workers
+        status["plan_cache_assumed_hit_rate"] = PLAN_CACHE.hit_rate()
+        status["plan_cache_confirmed_hit_rate"] = PLAN_CACHE.confirmed_hit_rate()
+        status["llm_stub"] = llm_stubbed()
+        status["rate_limits"] = SCHEDULER.stats()
+        status["seasons"] = get_season_registry().stats()
+        status["process"] = process_usage()
+        self._send(200 if status["ready"] else 503, status)
+
+    def do_POST(self):
+        routes = {"/ask": self._ask, "/intent": self._intent, "/graph": self._graph}
+        handler = routes.get(self.path.split("?")[0])
+        if handler is None:
+            return self._send(404, {"error": f"Unknown path {self.path}"})
+        if not self.server.warmup.ready.is_set():
+            return self._send(503, {"error": "Service is warming up", **self.server.warmup.status()})
+
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            return self._send(400, {"error": f"Invalid JSON: {e}"})
+
+        # Worker pool: at most SERVICE_WORKERS pipelines run at once
+        if not self.server.slots.acquire(timeout=self.server.queue_timeout):
+            return self._send(503, {"error": "All workers busy, retry later"})
+        try:
+            priority = PRIORITY_BATCH if payload.get("priority") == "batch" else PRIORITY_INTERACTIVE
+            with request_priority(priority):
+                status, result = handler(payload)
+        except Exception as e:
+            status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.server.slots.release()
+        self._send(status, result)
+
+    def _ask(self, payload):
+        if not payload.get("question"):
+            return 400, {"error": "'question' is required"}
+        mode = payload.get("mode", "semantic")
+        if mode not in MODES:
+            return 400, {"error": f"'mode' must be one of {MODES}"}
+        return 200, ask(payload["question"], mode, payload.get("model_choice", "A"), payload.get("llm"),
+                        payload.get("context"), bool(payload.get("profile")))
+
+    def _intent(self, payload):
+        if not payload.get("question"):
+            return 400, {"error": "'question' is required"}
+        return 200, parse_user_intent(payload["question"])
+
+    def _graph(self, payload):
+        if not isinstance(payload.get("intent_data"), dict):
+            return 400, {"error": "'intent_data' object is required"}
+        mode = payload.get("mode", "semantic")
+        if mode not in MODES:
+            return 400, {"error": f"'mode' must be one of {MODES}"}
+        return 200, query_knowledge_graph(payload["intent_data"], retrieval_mode=mode,
+                                          model_choice=payload.get("model_choice", "A"))
+
+    def log_message(self, format, *args):
+        print(f"[{self.log_date_time_string()}] {self.address_string()} {format % args}")
+
+
+class FPLService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, queue_timeout=None, load_columnar=True):
+        super().__init__(address, ServiceHandler)
+        self.workers = workers or Config.SERVICE_WORKERS
+        self.queue_timeout = queue_timeout if queue_timeout is not None else Config.SERVICE_QUEUE_TIMEOUT
+        self.slots = threading.BoundedSemaphore(self.workers)
+        self.warmup = Warmup(load_columnar=load_columnar)
@@ -0,0 +1,55 @@
+"""
+Service Client Module for FPL Graph-RAG Assistant
+Minimal stdlib HTTP client for server.py, used by app.py when
+FPL_BACKEND_URL is set and by batch_questions.py --backend.
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+from .config import Config
+
+
+class BackendError(Exception):
+    pass
+
+
+def _request(path, payload=None, base_url=None, timeout=None):
+    url = (base_url or Config.BACKEND_URL).rstrip("/") + path
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout or Config.BACKEND_TIMEOUT) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            detail = json.loads(e.read()).get("error", e.reason)
+        except ValueError:
+            detail = e.reason
+        raise BackendError(f"{e.code} {detail}") from e
+    except urllib.error.URLError as e:
+        raise BackendError(f"Backend unreachable at {url}: {e.reason}") from e
+
+
+def remote_ask(question, mode, model_choice, llm, context=None, base_url=None, profile=False, priority=None):
+    payload = {"question": question, "mode": mode, "model_choice": model_choice, "llm": llm, "context": context,
+               "profile": profile, "priority": priority}
+    return _request("/ask", payload, base_url)
+
+
+def remote_intent(question, base_url=None, priority=None):
+    return _request("/intent", {"question": question, "priority": priority}, base_url)
+
+
+def remote_graph(intent_data, mode, model_choice, base_url=None, priority=None):
+    payload = {"intent_data": intent_data, "mode": mode, "model_choice": model_choice, "priority": priority}
+    return _request("/graph", payload, base_url)
+
+
+def remote_health(base_url=None):
+    """Returns the /health body, or None if the service is down or not ready."""
+    try:
+        return _request("/health", base_url=base_url, timeout=5)
+    except BackendError:
+        return None
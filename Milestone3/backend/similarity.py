@@ -0,0 +1,158 @@
+"""
+Stat Similarity Module for FPL Graph-RAG Assistant
+Finds similar players from normalised per-90 stat vectors (one row per
+player and season) with a single float32 matrix multiply.
+"""
+
+import threading
+
+import numpy as np
+
+from .columnar import on_store_reload
+
+
+# Per-90 rates (plus minutes per appearance) that describe a player's profile
+FEATURES = (
+    "total_points", "goals_scored", "assists", "bonus", "clean_sheets",
+    "influence", "creativity", "threat", "ict_index"
+)
+
+# Seasons with fewer minutes than this are too noisy to compare per 90
+MIN_MINUTES = 450
+
+
+class SimilarityEngine:
+    """Cosine similarity over z-scored, L2-normalised per-90 feature vectors."""
+
+    def __init__(self, store, min_minutes=MIN_MINUTES):
+        self.store = store
+        n_players = len(store.player_names)
+        n_seasons = len(store.season_names)
+
+        # One group per (player, season) over appearances with minutes > 0
+        played = np.flatnonzero((store.app_season >= 0) & (store.stats["minutes"] > 0))
+        group = store.app_player[played] * n_seasons + store.app_season[played]
+        size = n_players * n_seasons
+
+        def total(col):
+            return np.bincount(group, weights=np.nan_to_num(store.stats[col][played]), minlength=size)
+
+        minutes = total("minutes")
+        apps = np.bincount(group, minlength=size).astype(np.float64)
+        keep = np.flatnonzero(minutes >= min_minutes)
+
+        per90 = [total(col)[keep] / minutes[keep] * 90 for col in FEATURES]
+        per90.append(minutes[keep] / apps[keep] / 90)
+        raw = np.column_stack(per90)
+
+        # z-score each feature so goals and ICT contribute on the same scale
+        mean = raw.mean(axis=0)
+        std = raw.std(axis=0)
+        std[std == 0] = 1.0
+        z = (raw - mean) / std
+        norms = np.linalg.norm(z, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = np.ascontiguousarray(z / norms, dtype=np.float32)
+
+        self.row_player = keep // n_seasons
+        self.row_season = keep % n_seasons
+        self.row_points = total("total_points")[keep]
+        self.row_minutes = minutes[keep]
+
+        # Primary position per player (first PLAYS_AS edge)
+        self.player_position = np.full(n_players, -1, dtype=np.int64)
+        for player, pos in zip(store.pair_player[::-1], store.pair_position[::-1]):
+            self.player_position[player] = pos
+        self.row_position = self.player_position[self.row_player]
+
+        # Lowercase name -> its rows, for exact-name lookups
+        order = np.argsort(self.row_player, kind="stable")
+        players, starts = np.unique(self.row_player[order], return_index=True)
+        self._rows_by_name = {}
+        for player, rows in zip(players, np.split(order, starts[1:])):
+            key = self.store.player_names[player].lower()
+            known = self._rows_by_name.get(key)
+            self._rows_by_name[key] = rows if known is None else np.concatenate([known, rows])
+
+    def find_rows(self, name, season=None):
+        """
+        Best matching row for a player name: exact (case-insensitive) matches
+        win over CONTAINS matches, then the row with the most minutes. Exact
+        names are a dict lookup; CONTAINS scans the distinct names, not rows.
+        """
+        lower = str(name).lower()
+        if season is not None and season not in self.store.season_names:
+            return None
+        code = None if season is None else self.store.season_names.index(season)
+
+        def in_season(rows):
+            return rows if code is None else rows[self.row_season[rows] == code]
+
+        rows = in_season(self._rows_by_name.get(lower, np.array([], dtype=np.int64)))
+        if not len(rows):
+            players = np.flatnonzero(np.char.find(self.store.player_names_lower, lower) >= 0)
+            rows = in_season(np.flatnonzero(np.isin(self.row_player, players)))
+        if not len(rows):
+            return None
+        return int(rows[np.argmax(self.row_minutes[rows])])
+
+    def most_similar(self, names, season=None, aliases=None, k=5):
+        """
+        Top-k similar players for each name. All targets are scored in one
+        (rows x features) @ (features x targets) multiply.
+        """
+        targets = [self.find_rows(n, season) for n in names]
+        found = [t for t in targets if t is not None]
+        if not found:
+            return []
+
+        scores = self.matrix @ self.matrix[found].T
+
+        mask = np.ones(len(self.row_player), dtype=bool)
+        if season is not None:
+            mask &= np.array([s == season for s in self.store.season_names])[self.row_season]
+        if aliases:
+            mask &= np.isin(self.row_position, self.store.positions_matching(aliases))
+
+        results = []
+        for col, target in enumerate(found):
+            col_scores = np.where(mask, scores[:, col], -np.inf)
+            col_scores[self.row_player == self.row_player[target]] = -np.inf
+            k_eff = min(k, int(np.isfinite(col_scores).sum()))
+            if k_eff == 0:
+                continue
+            top = np.argpartition(-col_scores, k_eff - 1)[:k_eff]
+            top = top[np.argsort(-col_scores[top])]
+            target_name = self.store.player_names[self.row_player[target]]
+            for row in top:
+                pos = self.row_position[row]
+                results.append({
+                    "Target": target_name,
+                    "Player": self.store.player_names[self.row_player[row]],
+                    "Position": self.store.position_names[pos] if pos >= 0 else None,
+                    "Season": self.store.season_names[self.row_season[row]],
+                    "Similarity": round(float(col_scores[row]), 3),
+                    "Points": int(self.row_points[row]),
+                    "Minutes": int(self.row_minutes[row]),
+                })
+        return results
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_similarity_engine(store):
+    """Builds the feature matrix once per loaded columnar store."""
+    key = id(store)
+    if key not in _engines:
+        with _engines_lock:
+            if key not in _engines:
+                _engines[key] = SimilarityEngine(store)
+    return _engines[key]
+
+
+@on_store_reload
+def reset_similarity_engines():
+    with _engines_lock:
+        _engines.clear()
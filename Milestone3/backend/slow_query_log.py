@@ -0,0 +1,200 @@
+"""
+Slow-Query Log Module for FPL Graph-RAG Assistant
+Records Cypher queries that exceed a latency threshold together with their
+parameters and the Neo4j PROFILE plan (operators, db hits, rows).
+
+The PROFILE re-run happens on a background thread with its own session, so
+a slow request is not made slower by logging it; each query fingerprint is
+profiled at most once per Config.SLOW_QUERY_PROFILE_INTERVAL.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+from .config import Config
+
+
+_log_lock = threading.Lock()
+
+# Pending (entry, query, params) waiting for PROFILE; full queue -> logged without a plan
+_profile_queue = queue.Queue(maxsize=64)
+_profile_worker = None
+_profile_worker_lock = threading.Lock()
+_last_profiled = {}
+
+
+# =============================================================================
+# PLAN SUMMARIES
+# =============================================================================
+
+def query_fingerprint(query):
+    """Stable short hash of a Cypher text (whitespace-insensitive)."""
+    normalised = " ".join(query.split())
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:12]
+
+
+def summarize_profile(profile):
+    """
+    Flattens a Neo4j PROFILE tree into a comparable summary.
+
+    Returns dict with total db hits, root rows and the operator list
+    (pre-order) with the db hits/rows of each operator.
+    """
+    if not profile:
+        return {"db_hits": 0, "rows": 0, "operators": []}
+
+    operators = []
+
+    def walk(node, depth):
+        operators.append({
+            "operator": node.get("operatorType") or node.get("operator_type"),
+            "depth": depth,
+            "db_hits": node.get("dbHits", node.get("db_hits", 0)) or 0,
+            "rows": node.get("rows", 0) or 0,
+        })
+        for child in node.get("children", []):
+            walk(child, depth + 1)
+
+    walk(profile, 0)
+    return {
+        "db_hits": sum(op["db_hits"] for op in operators),
+        "rows": operators[0]["rows"],
+        "operators": operators,
+    }
+
+
+def profile_query(session, query, params):
+    """Runs the query under PROFILE and returns its plan summary."""
+    result = session.run(f"PROFILE {query}", params)
+    summary = result.consume()
+    return summarize_profile(summary.profile)
+
+
+# =============================================================================
+# SLOW-QUERY LOGGING
+# =============================================================================
+
+def record_if_slow(query, params, duration, intent=None):
+    """
+    Queues the query for the slow-query log when it exceeds the threshold and
+    returns the entry (its plan is filled in by the background profiler).
+    A fingerprint profiled within the last SLOW_QUERY_PROFILE_INTERVAL
+    seconds is logged with its timing only.
+    """
+    if not Config.SLOW_QUERY_LOG_ENABLED:
+        return None
+    duration_ms = duration * 1000
+    if duration_ms < Config.SLOW_QUERY_THRESHOLD_MS:
+        return None
+
+    fingerprint = query_fingerprint(query)
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fingerprint": fingerprint,
+        "intent": intent,
+        "duration_ms": round(duration_ms, 2),
+        "query": query,
+        "params": _json_safe(params),
+        "plan": None,
+    }
+
+    now = time.monotonic()
+    with _log_lock:
+        due = now - _last_profiled.get(fingerprint, -Config.SLOW_QUERY_PROFILE_INTERVAL) \
+            >= Config.SLOW_QUERY_PROFILE_INTERVAL
+        if due:
+            _last_profiled[fingerprint] = now
+    if not due:
+        entry["plan"] = {"skipped": "profiled recently"}
+        _append(entry)
+        return entry
+
+    _start_profile_worker()
+    try:
+        _profile_queue.put_nowait((entry, query, dict(params or {})))
+    except queue.Full:
+        entry["plan"] = {"skipped": "profiler queue full"}
+        _append(entry)
+    return entry
+
+
+def _start_profile_worker():
+    global _profile_worker
+    if _profile_worker is None:
+        with _profile_worker_lock:
+            if _profile_worker is None:
+                _profile_worker = threading.Thread(target=_profile_loop, name="slow-query-profiler", daemon=True)
+                _profile_worker.start()
+                # Short-lived CLIs (batch_questions.py) still write their queued plans
+                atexit.register(flush_slow_query_log, 10)
+
+
+def _profile_loop():
+    # Imported here: knowledge_graph imports this module
+    from .knowledge_graph import get_driver
+    while True:
+        entry, query, params = _profile_queue.get()
+        try:
+            with get_driver().session() as session:
+                entry["plan"] = profile_query(session, query, params)
+        except Exception as e:
+            entry["plan"] = {"error": str(e)}
+        try:
+            _append(entry)
+        except OSError as e:
+            print(f"Slow Query Log Error: {e}")
+        finally:
+            _profile_queue.task_done()
+
+
+def flush_slow_query_log(timeout=None):
+    """Waits until queued PROFILE runs are written (tests, CLIs, shutdown)."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while _profile_queue.unfinished_tasks:
+        if deadline and time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _append(entry):
+    path = Config.SLOW_QUERY_LOG_PATH
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with _log_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+def load_slow_queries(path=None):
+    """Reads the slow-query log, keeping the latest profiled entry per fingerprint."""
+    path = path or Config.SLOW_QUERY_LOG_PATH
+    entries = {}
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                profiled = entry.get("plan") and "skipped" not in entry["plan"]
+                if profiled or entry["fingerprint"] not in entries:
+                    entries[entry["fingerprint"]] = entry
+    return list(entries.values())
+
+
+def _json_safe(params):
+    """Drops embedding vectors and other bulky values from logged params."""
+    safe = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, list) and len(value) > 50:
+            safe[key] = f"<list of {len(value)} values>"
+        else:
+            safe[key] = value
+    return safe
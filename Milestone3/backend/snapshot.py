@@ -0,0 +1,553 @@
+"""
+Graph Snapshot Module for FPL Graph-RAG Assistant
+Exports the whole graph (nodes, relationships, PLAYED_IN stats and both
+embedding sets) to one versioned columnar artifact, and loads it back into
+an empty Neo4j, into the columnar store or into the local vector replica.
+
+Layout of a snapshot directory:
+    data.npz        every column as a plain NumPy array (no pickles)
+    manifest.json   format version, counts, dims, stat column types, models
+                    and the sha256 of data.npz (checked on every load)
+
+Entities are stored as rows of per-kind arrays; relationships reference them
+by row index, so a snapshot does not depend on Neo4j element ids.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from .config import Config
+from .bulk_loader import (
+    DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, PLAYED_IN_QUERY, STRUCTURE_QUERIES,
+    LoadStats, _write, create_constraints
+)
+from .seasons import PARTITION_KEYS
+from .vector_indexes import active_vector_indexes
+from .vector_store import INDEX_FIELDS, write_vector_replica
+
+
+SNAPSHOT_FORMAT = 1
+
+DATA_FILE = "data.npz"
+MANIFEST_FILE = "manifest.json"
+
+# Missing integers (GW_number, fixture_number, player_element) are stored as this
+MISSING_INT = -1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+# =============================================================================
+# EXPORT QUERIES
+# =============================================================================
+
+EXPORT_QUERIES = {
+    "seasons": "MATCH (s:Season) RETURN s.season_name AS name ORDER BY name",
+    "gameweeks": """
+        MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)
+        RETURN s.season_name AS season, gw.GW_number AS gw
+    """,
+    "teams": "MATCH (t:Team) RETURN t.name AS name ORDER BY name",
+    "positions": "MATCH (p:Position) RETURN p.name AS name ORDER BY name",
+    "fixtures": """
+        MATCH (f:Fixture)
+        OPTIONAL MATCH (s:Season)-[:HAS_GW]->(gw:Gameweek)-[:HAS_FIXTURE]->(f)
+        OPTIONAL MATCH (f)-[:HAS_HOME_TEAM]->(h:Team)
+        OPTIONAL MATCH (f)-[:HAS_AWAY_TEAM]->(a:Team)
+        RETURN elementId(f) AS id, f.fixture_number AS number, toString(f.kickoff_time) AS kickoff,
+               head(collect(s.season_name)) AS season, head(collect(gw.GW_number)) AS gw,
+               head(collect(h.name)) AS home, head(collect(a.name)) AS away
+    """,
+    "players": """
+        MATCH (p:Player)
+        RETURN elementId(p) AS id, p.player_name AS name, p.player_element AS element,
+               p.text_representation AS text, p.text_hash AS text_hash,
+               p[$field_a] AS embedding_a, p[$field_b] AS embedding_b
+    """,
+    "plays_as": """
+        MATCH (p:Player)-[:PLAYS_AS]->(pos:Position)
+        RETURN elementId(p) AS player_id, pos.name AS target
+    """,
+    "plays_for": """
+        MATCH (p:Player)-[:PLAYS_FOR]->(t:Team)
+        RETURN elementId(p) AS player_id, t.name AS target
+    """,
+    "played_in": """
+        MATCH (p:Player)-[r:PLAYED_IN]->(f:Fixture)
+        RETURN elementId(p) AS player_id, elementId(f) AS fixture_id, properties(r) AS stats
+    """,
+}
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+def _int_or_missing(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return MISSING_INT
+
+
+def _strings(values):
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+
+def _lookup(names):
+    return {name: i for i, name in enumerate(names)}
+
+
+def _stat_type(values):
+    if all(isinstance(v, bool) for v in values):
+        return "bool"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return "int"
+    return "float"
+
+
+def _embedding_matrix(players, field):
+    dim = next((len(p[field]) for p in players if p[field]), 0)
+    matrix = np.zeros((len(players), dim), dtype=np.float32)
+    present = np.zeros(len(players), dtype=bool)
+    for i, p in enumerate(players):
+        if p[field] and len(p[field]) == dim:
+            matrix[i] = p[field]
+            present[i] = True
+    return matrix, present
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(session, out_dir, compress=False, log=print):
+    """
+    Reads the whole graph and writes a snapshot to out_dir (replaced
+    atomically). compress=True trades load speed for a smaller file.
+    Returns the manifest.
+    """
+    t0 = time.perf_counter()
+    rows = {}
+    # Embeddings come from the properties the live vector indexes cover
+    active = active_vector_indexes(session)
+    params = {"field_a": active["player_idx_a"]["field"], "field_b": active["player_idx_b"]["field"]}
+    for kind, query in EXPORT_QUERIES.items():
+        rows[kind] = [dict(r) for r in session.run(query, params)]
+        log(f"   ...{kind}: {len(rows[kind]):,}")
+
+    seasons = [r["name"] for r in rows["seasons"]]
+    teams = [r["name"] for r in rows["teams"]]
+    positions = [r["name"] for r in rows["positions"]]
+    season_idx, team_idx, position_idx = _lookup(seasons), _lookup(teams), _lookup(positions)
+    fixture_idx = {r["id"]: i for i, r in enumerate(rows["fixtures"])}
+    player_idx = {r["id"]: i for i, r in enumerate(rows["players"])}
+
+    arrays = {
+        "season_name": _strings(seasons),
+        "team_name": _strings(teams),
+        "position_name": _strings(positions),
+        "gameweek_season": np.array([season_idx.get(r["season"], -1) for r in rows["gameweeks"]], dtype=np.int32),
+        "gameweek_number": np.array([_int_or_missing(r["gw"]) for r in rows["gameweeks"]], dtype=np.int32),
+        "fixture_season": np.array([season_idx.get(r["season"], -1) for r in rows["fixtures"]], dtype=np.int32),
+        "fixture_gw": np.array([_int_or_missing(r["gw"]) for r in rows["fixtures"]], dtype=np.int32),
+        "fixture_number": np.array([_int_or_missing(r["number"]) for r in rows["fixtures"]], dtype=np.int32),
+        "fixture_kickoff": _strings(r["kickoff"] for r in rows["fixtures"]),
+        "fixture_home": np.array([team_idx.get(r["home"], -1) for r in rows["fixtures"]], dtype=np.int32),
+        "fixture_away": np.array([team_idx.get(r["away"], -1) for r in rows["fixtures"]], dtype=np.int32),
+        "player_name": _strings(r["name"] for r in rows["players"]),
+        "player_element": np.array([_int_or_missing(r["element"]) for r in rows["players"]], dtype=np.int32),
+        "player_text": _strings(r["text"] for r in rows["players"]),
+        "player_text_hash": _strings(r["text_hash"] for r in rows["players"]),
+    }
+
+    for kind, lookup in (("plays_as", position_idx), ("plays_for", team_idx)):
+        pairs = [(player_idx[r["player_id"]], lookup[r["target"]])
+                 for r in rows[kind] if r["player_id"] in player_idx and r["target"] in lookup]
+        arrays[f"{kind}_player"] = np.array([p for p, _ in pairs], dtype=np.int32)
+        arrays[f"{kind}_target"] = np.array([t for _, t in pairs], dtype=np.int32)
+
+    dims = {}
+    for field in INDEX_FIELDS.values():
+        arrays[field], arrays[f"{field}_present"] = _embedding_matrix(rows["players"], field)
+        dims[field] = int(arrays[field].shape[1])
+
+    # PLAYED_IN: one column per numeric property (NaN = property not set). The
+    # season/gw partition keys are rebuilt from the fixture on import.
+    played_in = [r for r in rows["played_in"] if r["player_id"] in player_idx and r["fixture_id"] in fixture_idx]
+    arrays["played_in_player"] = np.array([player_idx[r["player_id"]] for r in played_in], dtype=np.int32)
+    arrays["played_in_fixture"] = np.array([fixture_idx[r["fixture_id"]] for r in played_in], dtype=np.int32)
+    stat_types = {}
+    columns = sorted({
+        k for r in played_in for k, v in r["stats"].items()
+        if isinstance(v, (int, float)) and k not in PARTITION_KEYS
+    })
+    for col in columns:
+        values = [r["stats"].get(col) for r in played_in]
+        stat_types[col] = _stat_type([v for v in values if v is not None])
+        arrays[f"stat_{col}"] = np.array(
+            [np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    data_path = os.path.join(tmp_dir, DATA_FILE)
+    (np.savez_compressed if compress else np.savez)(data_path, **arrays)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": Config.NEO4J_URI,
+        "compressed": compress,
+        "counts": {
+            "seasons": len(seasons), "gameweeks": len(rows["gameweeks"]), "teams": len(teams),
+            "positions": len(positions), "fixtures": len(rows["fixtures"]), "players": len(rows["players"]),
+            "plays_as": len(arrays["plays_as_player"]), "plays_for": len(arrays["plays_for_player"]),
+            "played_in": len(played_in),
+        },
+        "dims": dims,
+        "stat_columns": stat_types,
+        "models": {"embedding_a": Config.EMBEDDING_MODEL_A, "embedding_b": Config.EMBEDDING_MODEL_B},
+        "sha256": {DATA_FILE: file_sha256(data_path)},
+        "bytes": os.path.getsize(data_path),
+        "export_seconds": round(time.perf_counter() - t0, 2),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+# =============================================================================
+# LOAD
+# =============================================================================
+
+class Snapshot:
+    """A verified, fully loaded snapshot (all arrays in memory)."""
+
+    def __init__(self, directory, manifest, arrays, timings):
+        self.directory = directory
+        self.manifest = manifest
+        self.arrays = arrays
+        self.timings = timings
+
+    @property
+    def stat_columns(self):
+        return self.manifest["stat_columns"]
+
+    def _int(self, value):
+        value = int(value)
+        return None if value == MISSING_INT else value
+
+    # ---------------------------------------------------------
+    # Row views
+    # ---------------------------------------------------------
+    def fixture_rows(self):
+        a = self.arrays
+        seasons, teams = a["season_name"], a["team_name"]
+        rows = []
+        for i in range(len(a["fixture_season"])):
+            season = seasons[a["fixture_season"][i]] if a["fixture_season"][i] >= 0 else None
+            number = self._int(a["fixture_number"][i])
+            rows.append({
+                "id": i,
+                "season": str(season) if season is not None else None,
+                "gw": self._int(a["fixture_gw"][i]),
+                # Fixtures without a number are keyed by their snapshot row
+                "fixture": number if number is not None else i,
+                "kickoff_time": str(a["fixture_kickoff"][i]) or None,
+                "home": str(teams[a["fixture_home"][i]]) if a["fixture_home"][i] >= 0 else None,
+                "away": str(teams[a["fixture_away"][i]]) if a["fixture_away"][i] >= 0 else None,
+            })
+        return rows
+
+    def player_rows(self, embeddings=True):
+        a = self.arrays
+        rows = []
+        for i in range(len(a["player_name"])):
+            row = {
+                "id": i,
+                "name": str(a["player_name"][i]),
+                "element": int(a["player_element"][i]),
+                "text": str(a["player_text"][i]) or None,
+                "text_hash": str(a["player_text_hash"][i]) or None,
+            }
+            if embeddings:
+                for field in INDEX_FIELDS.values():
+                    row[field] = a[field][i] if a[f"{field}_present"][i] else None
+            rows.append(row)
+        return rows
+
+    def played_in_rows(self):
+        a = self.arrays
+        # One tolist() per column instead of per-cell NumPy indexing; NaN = not set
+        casts = {"bool": bool, "int": int, "float": float}
+        columns = [(col, casts[kind], a[f"stat_{col}"].tolist()) for col, kind in self.stat_columns.items()]
+        players = a["played_in_player"].tolist()
+        fixtures = a["played_in_fixture"].tolist()
+        for i, (player, fixture) in enumerate(zip(players, fixtures)):
+            yield player, fixture, {col: cast(values[i]) for col, cast, values in columns if values[i] == values[i]}
+
+    # ---------------------------------------------------------
+    # In-memory targets
+    # ---------------------------------------------------------
+    def columnar_store(self):
+        """
+        Builds the columnar engine's store straight from the snapshot arrays
+        (no row dicts, no Neo4j). Seasons, players and positions are
+        renumbered to the ones actually referenced, as ColumnarStore does
+        for rows read from the graph.
+        """
+        from .columnar import ColumnarStore, STAT_COLUMNS
+
+        a = self.arrays
+        n_appearances = len(a["played_in_player"])
+
+        # Seasons with fixtures (-1 stays -1: fixture outside any season)
+        fixture_season = a["fixture_season"].astype(np.int64)
+        used_seasons, season_codes = np.unique(fixture_season[fixture_season >= 0], return_inverse=True)
+        remapped_season = np.full(len(fixture_season), -1, dtype=np.int32)
+        remapped_season[fixture_season >= 0] = season_codes
+        fixture_gw = a["fixture_gw"].astype(np.float64)
+        fixture_gw[a["fixture_gw"] == MISSING_INT] = np.nan
+        # Index -1 (no team) picks the trailing None
+        teams = np.array([str(t) for t in a["team_name"]] + [None], dtype=object)
+
+        # Players that appear in PLAYED_IN or PLAYS_AS; only named positions form pairs
+        used_players, player_codes = np.unique(
+            np.concatenate([a["played_in_player"], a["plays_as_player"]]).astype(np.int64), return_inverse=True)
+        has_name = np.char.str_len(a["position_name"].astype(str))[a["plays_as_target"]] > 0
+        used_positions, pair_position = np.unique(a["plays_as_target"][has_name], return_inverse=True)
+
+        stats = {}
+        for col in STAT_COLUMNS:
+            key = f"stat_{col}"
+            stats[col] = a[key].astype(np.float64) if key in a else np.full(n_appearances, np.nan)
+
+        return ColumnarStore.from_columns(
+            fixture_ids=list(range(len(fixture_season))),
+            season_names=[str(s) for s in a["season_name"][used_seasons]],
+            fixture_season=remapped_season,
+            fixture_gw=fixture_gw,
+            fixture_home=teams[a["fixture_home"]].tolist(),
+            fixture_away=teams[a["fixture_away"]].tolist(),
+            player_names=[str(n) for n in a["player_name"][used_players]],
+            app_player=player_codes[:n_appearances].astype(np.int64),
+            app_fixture=a["played_in_fixture"].astype(np.int64),
+            stats=stats,
+            position_names=[str(p) for p in a["position_name"][used_positions]],
+            pair_player=player_codes[n_appearances:][has_name].astype(np.int64),
+            pair_position=pair_position.astype(np.int64),
+        )
+
+    def write_vector_replica(self, base_dir=None):
+        """Exports the snapshot's embeddings as a new local replica version."""
+        records = [
+            {"id": f"snapshot:{r['id']}", "name": r["name"],
+             **{field: r[field] for field in INDEX_FIELDS.values()}}
+            for r in self.player_rows()
+        ]
+        return write_vector_replica(records, base_dir)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot read {path}: {e}") from e
+    if manifest.get("format", 0) > SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Snapshot format {manifest['format']} is newer than supported ({SNAPSHOT_FORMAT})")
+    return manifest
+
+
+def verify_snapshot(directory, manifest=None):
+    """Checks data.npz against the manifest checksum. Returns the manifest."""
+    manifest = manifest or read_manifest(directory)
+    expected = manifest["sha256"][DATA_FILE]
+    actual = file_sha256(os.path.join(directory, DATA_FILE))
+    if actual != expected:
+        raise SnapshotError(f"Checksum mismatch for {DATA_FILE}: expected {expected[:12]}, got {actual[:12]}")
+    return manifest
+
+
+def load_snapshot(directory, verify=True):
+    """Reads (and by default checksums) a snapshot; timings are in Snapshot.timings."""
+    timings = {}
+    t0 = time.perf_counter()
+    manifest = read_manifest(directory)
+    if verify:
+        verify_snapshot(directory, manifest)
+        timings["verify_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    t0 = time.perf_counter()
+    with np.load(os.path.join(directory, DATA_FILE), allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    timings["load_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    counts = manifest["counts"]
+    if len(arrays["player_name"]) != counts["players"] or len(arrays["played_in_player"]) != counts["played_in"]:
+        raise SnapshotError("Snapshot arrays do not match the manifest counts")
+    return Snapshot(directory, manifest, arrays, timings)
+
+
+# =============================================================================
+# IMPORT INTO NEO4J
+# =============================================================================
+
+PLAYER_IMPORT_QUERY = """
+UNWIND $rows AS row
+MERGE (p:Player {player_name: row.name, player_element: row.element})
+SET p.text_representation = row.text, p.text_hash = row.text_hash
+"""
+
+PLAYS_AS_IMPORT_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Player {player_name: row.name, player_element: row.element})
+MERGE (pos:Position {name: row.target})
+MERGE (p)-[:PLAYS_AS]->(pos)
+"""
+
+PLAYS_FOR_IMPORT_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Player {player_name: row.name, player_element: row.element})
+MATCH (t:Team {name: row.target})
+MERGE (p)-[:PLAYS_FOR]->(t)
+"""
+
+EMBEDDING_IMPORT_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Player {player_name: row.name, player_element: row.element})
+CALL db.create.setNodeVectorProperty(p, $field, row.vector)
+"""
+
+VECTOR_INDEX_QUERY = (
+    "CREATE VECTOR INDEX {name} IF NOT EXISTS FOR (n:Player) ON (n.{field}) "
+    "OPTIONS {{ indexConfig: {{ `vector.dimensions`: {dims}, `vector.similarity_function`: 'cosine' }} }}"
+)
+
+
+def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _write_embeddings(driver, query, rows, field):
+    def work(tx):
+        tx.run(query, rows=rows, field=field).consume()
+    with driver.session() as session:
+        session.execute_write(work)
+
+
+def import_to_neo4j(driver, snapshot, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, log=print):
+    """
+    Loads a snapshot into an (empty) Neo4j: constraints, structure, players,
+    PLAYED_IN through parallel writers, embeddings, then the vector indexes.
+    Returns {step: seconds}.
+    """
+    timings = {}
+    a = snapshot.arrays
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - t0, 2)
+        log(f"   ...{name}: {timings[name]:.2f}s")
+
+    def write_all(query, rows):
+        for batch in _batches(rows, batch_size):
+            _write(driver, query, batch)
+
+    seasons = [str(s) for s in a["season_name"]]
+    players = snapshot.player_rows(embeddings=False)
+    # Fixtures need a gameweek to hang off; a missing team only drops that link
+    fixtures = [f for f in snapshot.fixture_rows() if f["season"] and f["gw"] is not None]
+    fixture_keys = {f["id"]: (f["season"], f["gw"], f["fixture"]) for f in fixtures}
+
+    def structure():
+        write_all(STRUCTURE_QUERIES["seasons"], [{"season": s} for s in seasons])
+        write_all(STRUCTURE_QUERIES["gameweeks"], [
+            {"season": seasons[s], "gw": int(gw)}
+            for s, gw in zip(a["gameweek_season"], a["gameweek_number"]) if s >= 0 and gw != MISSING_INT
+        ])
+        write_all(STRUCTURE_QUERIES["teams"], [{"name": str(t)} for t in a["team_name"]])
+        write_all(STRUCTURE_QUERIES["fixtures"], fixtures)
+
+    def player_nodes():
+        write_all(PLAYER_IMPORT_QUERY, players)
+        for kind, query, names in (("plays_as", PLAYS_AS_IMPORT_QUERY, a["position_name"]),
+                                   ("plays_for", PLAYS_FOR_IMPORT_QUERY, a["team_name"])):
+            write_all(query, [
+                {"name": players[p]["name"], "element": players[p]["element"], "target": str(names[t])}
+                for p, t in zip(a[f"{kind}_player"], a[f"{kind}_target"])
+            ])
+
+    def played_in():
+        stats = LoadStats()
+        in_flight = set()
+        batch = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def flush(rows):
+                nonlocal in_flight
+                while len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(_write, driver, PLAYED_IN_QUERY, rows, stats))
+
+            for player, fixture, row_stats in snapshot.played_in_rows():
+                if fixture not in fixture_keys:
+                    stats.skip("fixture without season or gameweek")
+                    continue
+                season, gw, number = fixture_keys[fixture]
+                batch.append({"season": season, "gw": gw, "fixture": number, "name": players[player]["name"],
+                              "element": players[player]["element"], "stats": row_stats})
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+            for future in in_flight:
+                future.result()
+        log(f"   ...{stats.rows:,} PLAYED_IN rows ({stats.rows_per_sec:,.0f} rows/s)")
+        if stats.skipped:
+            log(f"   ⚠️  {stats.skipped_summary()}")
+
+    def embeddings():
+        for field in INDEX_FIELDS.values():
+            rows = [
+                {"name": players[i]["name"], "element": players[i]["element"], "vector": a[field][i].tolist()}
+                for i in np.flatnonzero(a[f"{field}_present"])
+            ]
+            for batch in _batches(rows, batch_size):
+                _write_embeddings(driver, EMBEDDING_IMPORT_QUERY, batch, field)
+
+    def indexes():
+        with driver.session() as session:
+            for name, field in INDEX_FIELDS.items():
+                dims = snapshot.manifest["dims"].get(field)
+                if dims:
+                    session.run(VECTOR_INDEX_QUERY.format(name=name, field=field, dims=dims)).consume()
+
+    step("constraints", lambda: create_constraints(driver))
+    step("structure", structure)
+    step("players", player_nodes)
+    step("played_in", played_in)
+    step("embeddings", embeddings)
+    step("vector_indexes", indexes)
+    return timings
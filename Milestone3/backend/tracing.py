@@ -0,0 +1,307 @@
+"""
+Tracing & Metrics Module for FPL Graph-RAG Assistant
+Records span-based traces for every pipeline stage and exports them as
+JSONL (one trace per line) and Prometheus-format counters/histograms.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import Config
+
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+# Label keys copied from span attributes onto metrics (kept low-cardinality)
+METRIC_LABELS = ("intent", "retrieval_mode", "embedding_model", "provider")
+
+# Histogram buckets in seconds (LLM calls can take several seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Raw samples kept per histogram for in-process percentile summaries
+MAX_SAMPLES = 10000
+
+_current_span = ContextVar("fpl_current_span", default=None)
+
+
+class Span:
+    """A single timed unit of work with attributes and child spans."""
+
+    def __init__(self, name, trace_id, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.children = []
+        self.status = "ok"
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+
+    def set(self, key, value):
+        """Attach (or overwrite) an attribute on the span."""
+        self.attributes[key] = value
+
+    def update(self, **attributes):
+        self.attributes.update(attributes)
+
+    def labels(self):
+        """Returns the metric labels for this span, inheriting from parents."""
+        labels = {}
+        node = self
+        while node is not None:
+            for key in METRIC_LABELS:
+                if key not in labels and node.attributes.get(key) is not None:
+                    labels[key] = str(node.attributes[key])
+            node = node.parent
+        return labels
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "start": self.start,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Context manager that times a block of work.
+
+    Nested spans become children of the enclosing span. When the outermost
+    span closes, the whole trace is written to the JSONL trace log.
+    """
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex
+    current = Span(name, trace_id, parent, attributes)
+    token = _current_span.set(current)
+
+    try:
+        yield current
+    except Exception as e:
+        current.status = "error"
+        current.set("error", str(e))
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._t0
+        _current_span.reset(token)
+        if Config.TRACING_ENABLED:
+            METRICS.observe_span(current)
+            if parent:
+                parent.children.append(current)
+            else:
+                _export_trace(current)
+
+
+def current_span():
+    """Returns the active span (or None outside of a trace)."""
+    return _current_span.get()
+
+
+def mark_error(error):
+    """Flags the active span as failed for errors that are handled in place."""
+    active = _current_span.get()
+    if active is not None:
+        active.status = "error"
+        active.set("error", str(error))
+
+
+# =============================================================================
+# METRICS REGISTRY
+# =============================================================================
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0, "values": deque(maxlen=MAX_SAMPLES)}
+                self._histograms[key] = hist
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+            hist["values"].append(value)
+
+    def observe_span(self, s):
+        labels = {"span": s.name, **s.labels()}
+        self.inc("fpl_span_total", labels)
+        if s.status == "error":
+            self.inc("fpl_span_errors_total", labels)
+        self.observe("fpl_span_duration_seconds", s.duration, labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def summary(self, name="fpl_span_duration_seconds"):
+        """Returns p50/p95/p99 per label set for a histogram (seconds)."""
+        with self._lock:
+            items = [(dict(k[1]), list(h["values"])) for k, h in self._histograms.items() if k[0] == name]
+        rows = []
+        for labels, values in items:
+            rows.append({
+                **labels,
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            })
+        return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+    def render_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            # Buckets, count and sum are copied together so one scrape is consistent
+            histograms = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                          for k, v in self._histograms.items()}
+
+        lines = []
+        for metric in sorted({k[0] for k in counters}):
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{name}{_fmt_labels(labels)} {value}")
+
+        for metric in sorted({k[0] for k in histograms}):
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, labels), hist in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(self.buckets, hist["buckets"]):
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {hist['sum']:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape_label(value):
+    """Label value escaping from the exposition format: backslash, quote, newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for empty input)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+METRICS = MetricsRegistry()
+
+
+# =============================================================================
+# EXPORTERS
+# =============================================================================
+
+_export_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics_written = 0.0
+
+
+def _export_trace(root):
+    """Appends a finished trace to the JSONL log; the .prom file is refreshed periodically."""
+    record = json.dumps({"trace_id": root.trace_id, **root.to_dict()}, default=str) + "\n"
+    try:
+        if Config.TRACE_LOG_PATH:
+            with _export_lock:
+                _ensure_parent(Config.TRACE_LOG_PATH)
+                with open(Config.TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                    f.write(record)
+        if Config.METRICS_PATH:
+            flush_metrics()
+    except OSError as e:
+        print(f"Tracing Export Error: {e}")
+
+
+def flush_metrics(force=False):
+    """
+    Rewrites Config.METRICS_PATH if it is older than Config.METRICS_INTERVAL
+    (or when forced). A trace that finds another thread writing skips it
+    rather than waiting.
+    """
+    global _metrics_written
+    if not Config.METRICS_PATH:
+        return
+    if not force and time.monotonic() - _metrics_written < Config.METRICS_INTERVAL:
+        return
+    if not _metrics_lock.acquire(blocking=force):
+        return
+    try:
+        if force or time.monotonic() - _metrics_written >= Config.METRICS_INTERVAL:
+            write_prometheus(Config.METRICS_PATH)
+            _metrics_written = time.monotonic()
+    finally:
+        _metrics_lock.release()
+
+
+def write_prometheus(path):
+    """Writes the current metrics snapshot to a Prometheus textfile."""
+    _ensure_parent(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(METRICS.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _flush_at_exit():
+    try:
+        flush_metrics(force=True)
+    except OSError as e:
+        print(f"Tracing Export Error: {e}")
+
+
+atexit.register(_flush_at_exit)
+
+
+def _ensure_parent(path):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
@@ -0,0 +1,89 @@
+"""
+Typo Corpus Module for FPL Graph-RAG Assistant
+Generates a reproducible typo/alias test set from the graph's own player
+names (truncations, transpositions, accent stripping, surname-only, ...).
+"""
+
+import json
+import os
+import random
+import unicodedata
+
+
+CORRUPTIONS = ("surname_only", "truncation", "transposition", "deletion", "accent_strip", "lowercase")
+
+
+def strip_accents(text):
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def corrupt(name, kind, rng):
+    """Applies one corruption to a name; returns None if it does not apply."""
+    parts = name.split()
+    if kind == "surname_only":
+        return parts[-1] if len(parts) > 1 else None
+    if kind == "truncation":
+        target = parts[-1]
+        return target[:max(3, len(target) - 2)] if len(target) > 4 else None
+    if kind == "transposition":
+        if len(name) < 4:
+            return None
+        i = rng.randrange(1, len(name) - 2)
+        if name[i] == " " or name[i + 1] == " ":
+            return None
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == "deletion":
+        if len(name) < 5:
+            return None
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:] if name[i] != " " else None
+    if kind == "accent_strip":
+        stripped = strip_accents(name)
+        return stripped if stripped != name else None
+    if kind == "lowercase":
+        return name.lower()
+    raise ValueError(f"Unknown corruption: {kind}")
+
+
+def build_typo_corpus(player_names, size=500, seed=42):
+    """
+    Returns a list of {"query", "expected", "kind"} items.
+    Queries that collapse onto more than one player (e.g. a shared surname)
+    are dropped so the expected answer is unambiguous.
+    """
+    rng = random.Random(seed)
+    names = sorted({n for n in player_names if n})
+    lower_names = [n.lower() for n in names]
+    items = []
+    seen = set()
+    attempts = 0
+
+    while len(items) < size and names and attempts < size * 20:
+        attempts += 1
+        name = rng.choice(names)
+        kind = rng.choice(CORRUPTIONS)
+        query = corrupt(name, kind, rng)
+        if not query or query == name or (query, name) in seen:
+            continue
+        if kind == "surname_only" and sum(query.lower() in n for n in lower_names) > 1:
+            continue
+        seen.add((query, name))
+        items.append({"query": query, "expected": name, "kind": kind})
+    return items
+
+
+def save_typo_corpus(items, path):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def load_typo_corpus(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,51 @@
+"""
+Vector Indexes Module for FPL Graph-RAG Assistant
+The app refers to the player vector indexes by logical name (player_idx_a,
+player_idx_b). Each logical name points at one physical index and the
+Player property it covers through a (:VectorIndex {name}) node, so
+initialize_vectors.py can build a new generation (player_idx_a_<version>
+on embedding_a_<version>) next to the live one and switch the pointers
+once it is online. Graphs without pointer nodes use the plain names.
+"""
+
+
+# Logical index -> embedding property of the first generation
+INDEX_FIELDS = {"player_idx_a": "embedding_a", "player_idx_b": "embedding_b"}
+
+POINTER_QUERY = """
+MATCH (v:VectorIndex)
+RETURN v.name AS name, v.index AS index, v.field AS field, v.model AS model
+"""
+
+SWITCH_QUERY = """
+UNWIND $rows AS row
+MERGE (v:VectorIndex {name: row.name})
+SET v.index = row.index, v.field = row.field, v.model = row.model, v.dims = row.dims,
+    v.switched_at = datetime()
+"""
+
+AWAIT_INDEXES_QUERY = "CALL db.awaitIndexes($timeout)"
+
+
+def default_vector_indexes():
+    return {name: {"index": name, "field": field, "model": None} for name, field in INDEX_FIELDS.items()}
+
+
+def active_vector_indexes(session):
+    """Logical name -> {"index", "field", "model"} currently served (model None if unrecorded)."""
+    active = default_vector_indexes()
+    for r in session.run(POINTER_QUERY):
+        if r["name"] in active and r["index"] and r["field"]:
+            active[r["name"]] = {"index": r["index"], "field": r["field"], "model": r["model"]}
+    return active
+
+
+def switch_vector_indexes(session, generation, dims, timeout=300):
+    """
+    Waits until every index is online, then points each logical name at its
+    index in `generation` ({name: {"index", "field", "model"}}) in one
+    transaction.
+    """
+    session.run(AWAIT_INDEXES_QUERY, timeout=timeout).consume()
+    rows = [{"name": name, **entry, "dims": dims.get(name)} for name, entry in generation.items()]
+    session.execute_write(lambda tx: tx.run(SWITCH_QUERY, rows=rows).consume())
@@ -0,0 +1,313 @@
+"""
+Local Vector Store Module for FPL Graph-RAG Assistant
+Keeps a versioned, memory-mapped replica of the Player embeddings on disk so
+semantic name resolution is a local matrix-vector product instead of a
+Neo4j vector-index round trip. Worker processes share the pages via mmap.
+
+Each version also stores float16 and int8 (per-row scaled) copies; with
+FPL_VECTOR_PRECISION set, candidates are scanned in the smaller format and
+only the top few are re-scored against the float32 rows.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .config import Config
+from .tracing import percentile
+from .vector_indexes import INDEX_FIELDS, active_vector_indexes
+
+# Read from the properties the live indexes cover, written under the logical field names
+EXPORT_QUERY = """
+MATCH (p:Player)
+RETURN elementId(p) AS id, p.player_name AS name,
+       p[$field_a] AS embedding_a, p[$field_b] AS embedding_b
+"""
+
+FORMAT_VERSION = 2
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows converted to float32 at a time during a quantised scan
+SCAN_CHUNK_ROWS = 4096
+
+
+def neo4j_cosine_score(cosine):
+    """Neo4j's cosine vector index reports (1 + cos) / 2, in [0, 1]."""
+    return (1.0 + cosine) / 2.0
+
+
+def quantize_int8(matrix):
+    """Symmetric per-row int8 quantisation. Returns (codes, scales)."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+def export_vector_replica(session, base_dir=None):
+    """
+    Writes embedding_a/embedding_b (L2-normalised float32), ids and names to
+    a new version directory and atomically points CURRENT at it.
+    """
+    active = active_vector_indexes(session)
+    params = {"field_a": active["player_idx_a"]["field"], "field_b": active["player_idx_b"]["field"]}
+    return write_vector_replica([dict(r) for r in session.run(EXPORT_QUERY, params)], base_dir)
+
+
+def write_vector_replica(records, base_dir=None):
+    """
+    Writes a replica version from records with id, name, embedding_a and
+    embedding_b (lists or arrays; None when missing). Used by the Neo4j
+    export above and by graph snapshots (snapshot.py).
+    """
+    base_dir = base_dir or Config.VECTOR_REPLICA_DIR
+    version = time.strftime("v%Y%m%d_%H%M%S")
+    out_dir = os.path.join(base_dir, version)
+    os.makedirs(out_dir, exist_ok=True)
+
+    dims = {}
+    for field in INDEX_FIELDS.values():
+        dim = next((len(r[field]) for r in records if r[field] is not None and len(r[field])), 0)
+        matrix = np.zeros((len(records), dim), dtype=np.float32)
+        for i, r in enumerate(records):
+            if r[field] is not None and len(r[field]) == dim:
+                matrix[i] = r[field]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = (matrix / norms).astype(np.float32)
+        np.save(os.path.join(out_dir, f"{field}.npy"), matrix)
+        np.save(os.path.join(out_dir, f"{field}.f16.npy"), matrix.astype(np.float16))
+        codes, scales = quantize_int8(matrix)
+        np.save(os.path.join(out_dir, f"{field}.i8.npy"), codes)
+        np.save(os.path.join(out_dir, f"{field}.i8_scale.npy"), scales)
+        dims[field] = dim
+
+    with open(os.path.join(out_dir, "players.json"), "w", encoding="utf-8") as f:
+        json.dump({"ids": [r["id"] for r in records], "names": [r["name"] for r in records]}, f)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "count": len(records),
+        "dims": dims,
+        "precisions": list(PRECISIONS),
+        "models": {"embedding_a": Config.EMBEDDING_MODEL_A, "embedding_b": Config.EMBEDDING_MODEL_B},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    _write_current(base_dir, version)
+    return out_dir
+
+
+def _write_current(base_dir, version):
+    tmp_path = os.path.join(base_dir, "CURRENT.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(base_dir, "CURRENT"))
+
+
+# =============================================================================
+# LOCAL INDEX
+# =============================================================================
+
+class LocalVectorIndex:
+    """Read-only, memory-mapped embeddings of one replica version."""
+
+    def __init__(self, directory, precision=None):
+        self.directory = directory
+        self.precision = precision or Config.VECTOR_PRECISION
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown vector precision: {self.precision}")
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(directory, "players.json"), encoding="utf-8") as f:
+            players = json.load(f)
+        self.ids = players["ids"]
+        self.names = players["names"]
+        self.matrices = {
+            field: self._load(field, "")
+            for field in INDEX_FIELDS.values()
+            if os.path.exists(os.path.join(directory, f"{field}.npy"))
+        }
+
+        # Quantised scan copies (replicas from before FORMAT_VERSION 2 have none)
+        self.scan = {}
+        self.scales = {}
+        for field in self.matrices:
+            if self.precision == "float16" and self._exists(field, ".f16"):
+                self.scan[field] = self._load(field, ".f16")
+            elif self.precision == "int8" and self._exists(field, ".i8"):
+                self.scan[field] = self._load(field, ".i8")
+                self.scales[field] = self._load(field, ".i8_scale")
+
+    def _exists(self, field, suffix):
+        return os.path.exists(os.path.join(self.directory, f"{field}{suffix}.npy"))
+
+    def _load(self, field, suffix):
+        return np.load(os.path.join(self.directory, f"{field}{suffix}.npy"), mmap_mode="r")
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def has(self, field):
+        matrix = self.matrices.get(field)
+        return matrix is not None and matrix.shape[1] > 0
+
+    def memory_bytes(self, field):
+        """Size of the matrix scanned per query (plus int8 scales)."""
+        if field in self.scan:
+            return self.scan[field].nbytes + (self.scales[field].nbytes if field in self.scales else 0)
+        return self.matrices[field].nbytes
+
+    def _approx_scores(self, field, query):
+        """Cosine against the quantised copy, converted in float32 chunks."""
+        scan = self.scan[field]
+        scores = np.empty(scan.shape[0], dtype=np.float32)
+        for start in range(0, scan.shape[0], SCAN_CHUNK_ROWS):
+            block = np.asarray(scan[start:start + SCAN_CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        if field in self.scales:
+            scores *= self.scales[field]
+        return scores
+
+    def search(self, vector, field, k=10):
+        """Cosine top-k. Returns [(name, neo4j_score)] best first."""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+        matrix = self.matrices[field]
+
+        if field in self.scan:
+            # Quantised candidates, exact float32 re-scoring of the shortlist
+            approx = self._approx_scores(field, query)
+            n_cand = min(max(k, Config.VECTOR_RESCORE_CANDIDATES), len(approx))
+            rows = np.sort(np.argpartition(-approx, n_cand - 1)[:n_cand])
+            cosine = np.asarray(matrix[rows]) @ query
+        else:
+            rows = np.arange(matrix.shape[0])
+            cosine = matrix @ query
+
+        k = min(k, len(cosine))
+        top = np.argpartition(-cosine, k - 1)[:k]
+        top = top[np.argsort(-cosine[top])]
+        return [(self.names[rows[i]], neo4j_cosine_score(float(cosine[i]))) for i in top]
+
+    def resolve(self, vector, field, threshold=0.70):
+        """Top-1 name above the threshold (same rule as the Neo4j query)."""
+        for name, score in self.search(vector, field, k=1):
+            if score > threshold and name:
+                return name
+        return None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_local_index():
+    """
+    Returns the index for the CURRENT replica version, reopening it when a
+    new version has been exported. None when disabled or not yet exported.
+    """
+    global _index
+    if not Config.LOCAL_VECTOR_SEARCH:
+        return None
+    current_path = os.path.join(Config.VECTOR_REPLICA_DIR, "CURRENT")
+    try:
+        with open(current_path, encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                try:
+                    _index = LocalVectorIndex(os.path.join(Config.VECTOR_REPLICA_DIR, version))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Local Vector Index Error: {e}")
+                    return None
+    return _index
+
+
+# =============================================================================
+# VERIFICATION
+# =============================================================================
+
+def compare_with_neo4j(session, index, embedder, index_name, queries, threshold=0.70):
+    """
+    Resolves each query locally and through the Neo4j vector index.
+    Returns (agreements, mismatches) where mismatches lists (query, local, neo4j).
+    """
+    field = INDEX_FIELDS[index_name]
+    cypher = f"""
+    CALL db.index.vector.queryNodes('{active_vector_indexes(session)[index_name]["index"]}', 10, $vec)
+    YIELD node, score
+    WHERE score > $threshold
+    RETURN node.player_name AS Name
+    ORDER BY score DESC
+    LIMIT 1
+    """
+    agreements = 0
+    mismatches = []
+    for query in queries:
+        vector = embedder.embed_query(query)
+        local = index.resolve(vector, field, threshold)
+        record = session.run(cypher, {"vec": vector, "threshold": threshold}).single()
+        remote = record["Name"] if record else None
+        if local == remote:
+            agreements += 1
+        else:
+            mismatches.append((query, local, remote))
+    return agreements, mismatches
+
+
+def quantisation_report(directory, vectors, field, expected=None, k=10):
+    """
+    Searches pre-embedded query vectors at every precision and compares the
+    results with float32. Returns one row per precision with recall@1/@k
+    (overlap with the float32 top-k), scan memory and search latency.
+    """
+    indexes = {p: LocalVectorIndex(directory, precision=p) for p in PRECISIONS}
+    results = {}
+    for precision, index in indexes.items():
+        latencies = []
+        hits = []
+        for vector in vectors:
+            t0 = time.perf_counter()
+            hits.append([name for name, _ in index.search(vector, field, k)])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        results[precision] = (hits, latencies)
+
+    exact_hits = results["float32"][0]
+    base_bytes = indexes["float32"].memory_bytes(field)
+    report = []
+    for precision in PRECISIONS:
+        hits, latencies = results[precision]
+        pairs = list(zip(hits, exact_hits))
+        row = {
+            "precision": precision,
+            "recall@1": sum(h[:1] == e[:1] for h, e in pairs) / max(1, len(pairs)),
+            f"recall@{k}": sum(len(set(h) & set(e)) / max(1, len(e)) for h, e in pairs) / max(1, len(pairs)),
+            "memory_bytes": indexes[precision].memory_bytes(field),
+            "memory_ratio": indexes[precision].memory_bytes(field) / max(1, base_bytes),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        }
+        if expected:
+            row["accuracy@1"] = sum(h[:1] == [x] for h, x in zip(hits, expected)) / max(1, len(expected))
+        report.append(row)
+    return report
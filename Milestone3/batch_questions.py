@@ -0,0 +1,220 @@
+"""
+Runs many questions through the full pipeline (intent -> graph -> answer)
+with bounded concurrency. LLM calls go through the rate-limit scheduler
+(backend/rate_limits.py) at batch priority.
+
+The scheduler's buckets live in one process. With --backend (default
+FPL_BACKEND_URL) questions go to server.py, whose scheduler the app shares,
+so batch calls queue behind chat against one quota. Without a backend the
+pipeline runs in this process and gets FPL_LLM_BATCH_SHARE of each limit,
+leaving the rest to the app; --rpm / --tpm set the limits explicitly.
+
+Input is JSONL, one question per line. Only "question" is required:
+    {"id": "q1", "question": "Salah stats 2022-23", "mode": "semantic", "embedding_model": "B", "llm": "gemini"}
+
+Usage:
+    python batch_questions.py questions.jsonl --out results.jsonl
+    python batch_questions.py questions.jsonl --out results.jsonl --concurrency 16 --rpm groq=15 --tpm groq=6000
+    python batch_questions.py questions.jsonl --out results.jsonl --backend http://localhost:8000
+    python batch_questions.py questions.jsonl --out warm.jsonl --skip-answer     # cache warming
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config import Config, get_provider_name
+from backend.intent_parser import parse_user_intent
+from backend.knowledge_graph import query_knowledge_graph
+from backend.response_generator import generate_natural_language_answer
+from backend.tracing import span, percentile
+from backend.rate_limits import PRIORITY_BATCH, SCHEDULER, parse_limits, request_priority, track_waits
+from backend.service_client import remote_ask, remote_graph, remote_intent
+
+PROVIDER_MODELS = {
+    "groq": Config.MODEL_GROQ,
+    "openai": Config.MODEL_OPENAI,
+    "gemini": Config.MODEL_GEMINI,
+    "cerebras": Config.MODEL_CEREBRAS,
+}
+
+STAGES = ("intent", "graph", "answer", "total")
+
+
+def resolve_llm(value):
+    """Accepts a provider name ("gemini") or a model name."""
+    if not value:
+        return Config.MODEL_GROQ
+    return PROVIDER_MODELS.get(str(value).lower(), value)
+
+
+def run_remote(question, mode, model_choice, llm, args):
+    """The same stages through server.py, at batch priority in the service's scheduler."""
+    if args.skip_answer:
+        t0 = time.perf_counter()
+        intent_data = remote_intent(question, args.backend, priority="batch")
+        t_intent = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        kg_result = remote_graph(intent_data, mode, model_choice, args.backend, priority="batch")
+        return intent_data, kg_result, None, {"intent": t_intent, "graph": time.perf_counter() - t0}
+    response = remote_ask(question, mode, model_choice, llm, base_url=args.backend, priority="batch")
+    timings = response["timings"]
+    return response["intent_data"], response, response["answer"], {
+        "intent": timings["intent"], "graph": timings["graph"], "answer": timings["llm"]}
+
+
+def run_question(index, item, args):
+    question = item["question"]
+    mode = item.get("mode", args.mode)
+    model_choice = item.get("embedding_model", args.embedding_model)
+    llm = resolve_llm(item.get("llm", args.llm))
+    timings = {}
+    waited = {}
+    result = {"index": index, "id": item.get("id", index), "question": question,
+              "mode": mode, "embedding_model": model_choice, "llm": llm}
+
+    t_start = time.perf_counter()
+    # Batch calls queue behind interactive chat in the shared rate-limit scheduler
+    with span("batch_question", retrieval_mode=mode, provider=get_provider_name(llm)) as s, \
+            request_priority(PRIORITY_BATCH):
+        try:
+            if args.backend:
+                # Rate-limit waits happen in the service and are part of its stage timings
+                intent_data, kg_result, answer, stage_timings = run_remote(question, mode, model_choice, llm, args)
+                timings.update(stage_timings)
+            else:
+                t0 = time.perf_counter()
+                with track_waits() as w:
+                    intent_data = parse_user_intent(question)
+                waited["intent"] = w.seconds
+                timings["intent"] = time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                kg_result = query_knowledge_graph(intent_data, retrieval_mode=mode, model_choice=model_choice)
+                timings["graph"] = time.perf_counter() - t0
+
+                answer = None
+                if not args.skip_answer:
+                    t0 = time.perf_counter()
+                    with track_waits() as w:
+                        answer = generate_natural_language_answer(question, intent_data, kg_result.get("data", "[]"), model_name=llm)
+                    waited["answer"] = w.seconds
+                    timings["answer"] = time.perf_counter() - t0
+            s.set("intent", intent_data["intent"])
+
+            result.update({
+                "intent": intent_data["intent"],
+                "entities": intent_data.get("entities", {}),
+                "cypher": kg_result.get("cypher"),
+                "data": kg_result.get("data") if args.include_data else None,
+                "answer": answer,
+                "error": None,
+            })
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        timings["total"] = time.perf_counter() - t_start
+
+    result["timings_ms"] = {k: round(v * 1000, 1) for k, v in timings.items()}
+    result["rate_limit_wait_ms"] = {k: round(v * 1000, 1) for k, v in waited.items()}
+    return result
+
+
+def read_questions(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if isinstance(item, str):
+                    item = {"question": item}
+                yield item
+
+
+def print_summary(results, elapsed):
+    ok = [r for r in results if not r["error"]]
+    print(f"\n📊 {len(results)} questions in {elapsed:.1f}s "
+          f"({len(results) / max(elapsed, 1e-9):.2f} q/s), {len(results) - len(ok)} errors")
+    print(f"   {'stage':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in STAGES:
+        values = [r["timings_ms"][stage] for r in ok if stage in r["timings_ms"]]
+        if values:
+            print(f"   {stage:<8} {percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f} {percentile(values, 99):>9.1f}")
+    intents = {}
+    for r in ok:
+        intents[r["intent"]] = intents.get(r["intent"], 0) + 1
+    if intents:
+        print("   intents: " + ", ".join(f"{k}={v}" for k, v in sorted(intents.items(), key=lambda x: -x[1])))
+
+
+def apply_batch_share(share):
+    """Scales every provider's Config limits to this process's share (the app keeps the rest)."""
+    for provider in PROVIDER_MODELS:
+        limiter = SCHEDULER.limiter(provider)
+        SCHEDULER.configure(provider, rpm=limiter.requests.per_minute * share,
+                            tpm=limiter.tokens.per_minute * share if limiter.tokens else None)
+
+
+def apply_limit_overrides(values, kind):
+    """--rpm groq=30 / --tpm groq=12000 -> SCHEDULER.configure (other providers keep Config limits)."""
+    for provider, limit in parse_limits(",".join(values or [])).items():
+        SCHEDULER.configure(provider, **{kind: limit})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch questions through the FPL pipeline")
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("--out", required=True, help="JSONL results (written as questions finish)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", default="baseline", choices=["baseline", "semantic", "columnar"])
+    parser.add_argument("--embedding-model", default="A", choices=["A", "B"])
+    parser.add_argument("--llm", default="groq", help="Default provider or model for answers")
+    parser.add_argument("--backend", default=Config.BACKEND_URL,
+                        help="server.py URL to send questions to (default FPL_BACKEND_URL; '' runs in-process)")
+    parser.add_argument("--rpm", action="append", help="In-process requests/min limit, e.g. groq=15 (repeatable)")
+    parser.add_argument("--tpm", action="append", help="In-process tokens/min limit, e.g. groq=6000 (repeatable)")
+    parser.add_argument("--share", type=float, default=Config.LLM_BATCH_SHARE,
+                        help="In-process share of each Config limit (default FPL_LLM_BATCH_SHARE)")
+    parser.add_argument("--skip-answer", action="store_true", help="Stop after graph retrieval")
+    parser.add_argument("--include-data", action="store_true", help="Include raw graph rows in results")
+    args = parser.parse_args()
+
+    if args.backend:
+        if args.rpm or args.tpm:
+            print("⚠️  --rpm / --tpm are ignored with --backend: the service's limits apply")
+        limits = f"shared with {args.backend}"
+    else:
+        apply_batch_share(args.share)
+        apply_limit_overrides(args.rpm, "rpm")
+        apply_limit_overrides(args.tpm, "tpm")
+        limits = ", ".join(f"{p}={SCHEDULER.limiter(p).requests.per_minute:g}/min" if SCHEDULER.limiter(p).requests.limited
+                           else f"{p}=unlimited" for p in PROVIDER_MODELS)
+        limits += " (this process only)"
+    questions = list(read_questions(args.input))
+    print(f"\n🚀 {len(questions)} questions, concurrency {args.concurrency}, limits: {limits}")
+
+    results = []
+    write_lock = threading.Lock()
+    t0 = time.perf_counter()
+    with open(args.out, "w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        def handle(index, item):
+            result = run_question(index, item, args)
+            with write_lock:
+                out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                results.append(result)
+                if len(results) % 25 == 0:
+                    print(f"   ...{len(results)}/{len(questions)} done")
+            return result
+
+        futures = [pool.submit(handle, i, item) for i, item in enumerate(questions)]
+        for future in futures:
+            future.result()
+
+    print_summary(results, time.perf_counter() - t0)
+    sys.exit(1 if any(r["error"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmarks player-name resolution on a typo/alias corpus built from the
+graph's own player names: baseline CONTAINS matching vs semantic resolution
+with Model A / Model B, through the Neo4j vector index and the local replica.
+Each path runs the production lookup (catalogue templates through
+run_resolver, LocalVectorIndex.resolve) against the vector indexes being served.
+
+Usage:
+    python benchmark_name_resolution.py run                      # writes reports/name_resolution_<ts>.json
+    python benchmark_name_resolution.py run --limit 200 --regenerate
+    python benchmark_name_resolution.py diff reports/old.json reports/new.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.embeddings import embedder_backend, get_embedder
+from backend.knowledge_graph import run_resolver
+from backend.seasons import get_season_registry
+from backend.tracing import percentile
+from backend.typo_corpus import build_typo_corpus, load_typo_corpus, save_typo_corpus
+from backend.vector_store import INDEX_FIELDS, get_local_index
+
+REPORT_VERSION = 1
+REPORT_DIR = "reports"
+
+MODELS = {"A": (Config.EMBEDDING_MODEL_A, "player_idx_a"), "B": (Config.EMBEDDING_MODEL_B, "player_idx_b")}
+
+
+# --------------------------------------------------------------------------
+# RESOLVER PATHS
+# --------------------------------------------------------------------------
+def baseline_resolver(session):
+    """Baseline mode: the raw name is used in a CONTAINS match. Resolved only if unambiguous."""
+    def resolve(name):
+        matches = [r["Name"] for r in run_resolver(session, "resolve_player_contains", {"name": name})]
+        return matches[0] if len(matches) == 1 else None
+    return resolve
+
+
+def neo4j_vector_resolver(session, embedder, index_name):
+    """The semantic resolver's Neo4j branch, on the physical index the logical name points at."""
+    physical_index = get_season_registry().vector_indexes[index_name]["index"]
+
+    def resolve(name):
+        rows = run_resolver(session, "resolve_player_vector", {"index": physical_index, "vec": embedder.embed_query(name)})
+        return rows[0]["Name"] if rows and rows[0]["Name"] else None
+    return resolve
+
+
+def local_vector_resolver(local_index, embedder, index_name):
+    field = INDEX_FIELDS[index_name]
+
+    def resolve(name):
+        return local_index.resolve(embedder.embed_query(name), field)
+    return resolve
+
+
+def measure(resolve, corpus):
+    """Runs one path over the corpus; returns recall@1, latency percentiles, throughput, per-kind recall."""
+    latencies = []
+    hits = 0
+    by_kind = {}
+    t_start = time.perf_counter()
+    for item in corpus:
+        t0 = time.perf_counter()
+        resolved = resolve(item["query"])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hit = resolved == item["expected"]
+        hits += hit
+        kind = by_kind.setdefault(item["kind"], [0, 0])
+        kind[0] += hit
+        kind[1] += 1
+    elapsed = time.perf_counter() - t_start
+    return {
+        "queries": len(corpus),
+        "recall@1": round(hits / max(1, len(corpus)), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "throughput_qps": round(len(corpus) / max(elapsed, 1e-9), 1),
+        "recall_by_kind": {k: round(h / n, 4) for k, (h, n) in sorted(by_kind.items())},
+    }
+
+
+# --------------------------------------------------------------------------
+# RUN
+# --------------------------------------------------------------------------
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    Config.validate()
+    driver = GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+    try:
+        with driver.session() as session:
+            corpus = [] if args.regenerate else load_typo_corpus(args.corpus)
+            if not corpus:
+                names = [r["name"] for r in session.run("MATCH (p:Player) RETURN p.player_name AS name")]
+                corpus = build_typo_corpus(names, size=args.size, seed=args.seed)
+                save_typo_corpus(corpus, args.corpus)
+                print(f"   ...Generated {len(corpus)} queries from {len(names)} player names -> {args.corpus}")
+            corpus = corpus[:args.limit] if args.limit else corpus
+
+            print(f"\n🏁 Benchmarking {len(corpus)} queries...")
+            paths = {"baseline": baseline_resolver(session)}
+            local_index = get_local_index()
+            backends = {}
+            for choice, (model_name, index_name) in MODELS.items():
+                embedder = get_embedder(model_name)
+                if embedder is None:
+                    print(f"   ⚠️  No embedding backend for {model_name}, skipping Model {choice}.")
+                    continue
+                embedder.embed_query("warm up")
+                backends[choice] = embedder_backend(embedder)
+                paths[f"semantic_{choice}_neo4j"] = neo4j_vector_resolver(session, embedder, index_name)
+                if local_index and local_index.has(INDEX_FIELDS[index_name]):
+                    paths[f"semantic_{choice}_local"] = local_vector_resolver(local_index, embedder, index_name)
+
+            results = {}
+            for path, resolve in paths.items():
+                results[path] = measure(resolve, corpus)
+                r = results[path]
+                print(f"   {path:<20} R@1 {r['recall@1']:.3f}  p50 {r['p50_ms']:>7.2f}ms  "
+                      f"p95 {r['p95_ms']:>7.2f}ms  {r['throughput_qps']:>7.1f} q/s")
+    finally:
+        driver.close()
+
+    created = time.strftime("%Y%m%d_%H%M%S")
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": created,
+        "git_revision": git_revision(),
+        "embedding_backend": Config.EMBEDDING_BACKEND,
+        # What actually encoded each model (ONNX falls back to torch when unavailable)
+        "embedding_backends": backends,
+        "vector_indexes": {name: entry["index"] for name, entry in get_season_registry().vector_indexes.items()},
+        "vector_precision": Config.VECTOR_PRECISION,
+        "replica_version": local_index.version if local_index else None,
+        "corpus": {"path": args.corpus, "queries": len(corpus)},
+        "paths": results,
+    }
+    out = args.out or os.path.join(REPORT_DIR, f"name_resolution_{created}.json")
+    parent = os.path.dirname(out)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report saved to {out}")
+
+
+# --------------------------------------------------------------------------
+# DIFF
+# --------------------------------------------------------------------------
+def diff(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"\n🔍 {old.get('git_revision')} ({old['created_at']}) -> {new.get('git_revision')} ({new['created_at']})")
+    print(f"   {'path':<20} {'R@1':>15} {'p50 ms':>19} {'p95 ms':>19}")
+    for path in sorted(set(old["paths"]) | set(new["paths"])):
+        a, b = old["paths"].get(path), new["paths"].get(path)
+        if not a or not b:
+            print(f"   {path:<20} {'only in ' + ('new' if b else 'old')}")
+            continue
+        print(f"   {path:<20} {a['recall@1']:.3f} -> {b['recall@1']:.3f} "
+              f"{a['p50_ms']:>7.2f} -> {b['p50_ms']:<7.2f} {a['p95_ms']:>7.2f} -> {b['p95_ms']:<7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Name-resolution benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run every resolver path over the typo corpus")
+    p_run.add_argument("--corpus", default=Config.TYPO_CORPUS_PATH)
+    p_run.add_argument("--regenerate", action="store_true", help="Rebuild the corpus from the graph")
+    p_run.add_argument("--size", type=int, default=500)
+    p_run.add_argument("--seed", type=int, default=42)
+    p_run.add_argument("--limit", type=int, help="Use only the first N queries")
+    p_run.add_argument("--out", help="Report path (default reports/name_resolution_<timestamp>.json)")
+
+    p_diff = sub.add_parser("diff", help="Compare two reports")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        diff(args.old, args.new)
+
+
+if __name__ == "__main__":
+    main()
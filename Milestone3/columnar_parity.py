@@ -0,0 +1,153 @@
+"""
+Checks that COLUMNAR mode returns the same rows as the Cypher templates for
+every intent it serves. Sample questions are generated from the loaded data
+(top scorers, partial names, every position x metric; whole season, one
+gameweek and a gameweek range), run through the template and through the
+columnar store, and the rows compared key by key.
+
+Usage:
+    python columnar_parity.py                    # every season in the graph
+    python columnar_parity.py --season 2022-23 --show-diff
+
+Exit code 1 when any case differs. Rows that only differ in the order of
+tied sort keys count as equal (Cypher does not order ties).
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.columnar import ColumnarStore
+from backend.cypher_templates import gameweek_range, get_template
+from backend.knowledge_graph import query_columnar, resolve_position, resolve_sort_metric
+
+# Metric wording as the intent parser returns it, one per Top_Ranked sort column
+METRICS = ("total points", "goals", "assists", "clean sheets", "saves")
+POSITIONS = (None, "goalkeeper", "defender", "midfielder", "forward")
+
+
+def _driver():
+    Config.validate()
+    return GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+
+
+# --------------------------------------------------------------------------
+# CASES
+# --------------------------------------------------------------------------
+def sample_cases(store, season):
+    """(intent, names, position, metric, gw) tuples with data behind them."""
+    top = store.top_ranked([], "Points", season, None, limit=3)
+    names = [r["Player"] for r in top]
+    if not names:
+        return []
+    partial = names[0].split()[-1].lower()
+    code = store.season_names.index(season)
+    gws = sorted({int(g) for g in store.app_gw[store.app_season == code] if g == g})
+    gw = gws[len(gws) // 2] if gws else None
+    gw_span = f"{gws[0]}-{gw}" if gws else None
+
+    cases = []
+    for g in (None, gw, gw_span):
+        cases += [
+            ("Player_Stats", [names[0]], None, None, g),
+            ("Player_Stats", [partial], None, None, g),
+            ("Compare_Players", names[:2], None, None, g),
+            ("Underlying_Stats", names, None, None, g),
+            ("Bonus_Points", [], None, None, g),
+        ]
+        cases += [("Top_Ranked", [], pos, metric, g) for pos in POSITIONS for metric in METRICS]
+    return cases
+
+
+def cypher_rows(session, intent, names, position, metric, season, gw):
+    """The rows knowledge_graph.py's Cypher branch returns for the same entities."""
+    gw_start, gw_end = gameweek_range(gw) or (None, None)
+    params = {"season": season, "gw_start": gw_start, "gw_end": gw_end, "names": names,
+              "team_names": [], "aliases": resolve_position(session, position)}
+    if intent == "Top_Ranked":
+        template = f"top_ranked:{resolve_sort_metric(metric, params['aliases'])}"
+    else:
+        template = intent.lower()
+    return [dict(r) for r in session.run(get_template(template), params)]
+
+
+# --------------------------------------------------------------------------
+# COMPARISON
+# --------------------------------------------------------------------------
+def _same_value(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def _same_row(a, b):
+    return a.keys() == b.keys() and all(_same_value(a[k], b[k]) for k in a)
+
+
+def compare(expected, actual):
+    """'equal', 'tie order' (same rows, tied keys reordered) or 'differs'."""
+    if len(expected) == len(actual) and all(_same_row(e, a) for e, a in zip(expected, actual)):
+        return "equal"
+    remaining = list(actual)
+    for row in expected:
+        match = next((i for i, a in enumerate(remaining) if _same_row(row, a)), None)
+        if match is None:
+            return "differs"
+        remaining.pop(match)
+    return "tie order" if not remaining else "differs"
+
+
+# --------------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Columnar vs Cypher result parity")
+    parser.add_argument("--season", action="append", help="Season(s) to check (default: all)")
+    parser.add_argument("--show-diff", action="store_true", help="Print both row sets for failing cases")
+    args = parser.parse_args()
+
+    driver = _driver()
+    failures = 0
+    totals = {}
+    try:
+        with driver.session() as session:
+            t0 = time.perf_counter()
+            store = ColumnarStore.from_session(session)
+            print(f"\n🧮 Loaded {store.num_appearances:,} appearances in {time.perf_counter() - t0:.1f}s")
+            for season in args.season or store.season_names:
+                for intent, names, position, metric, gw in sample_cases(store, season):
+                    expected = cypher_rows(session, intent, names, position, metric, season, gw)
+                    aliases = resolve_position(None, position, db_positions=store.position_names)
+                    actual = query_columnar(store, intent, names, position, metric, season, gw)
+                    verdict = compare(expected, actual)
+                    counts = totals.setdefault(intent, {"equal": 0, "tie order": 0, "differs": 0})
+                    counts[verdict] += 1
+                    if verdict == "differs":
+                        failures += 1
+                        print(f"   ❌ {intent} season={season} gw={gw} names={names} "
+                              f"position={position} ({aliases}) metric={metric}")
+                        if args.show_diff:
+                            print(f"      cypher:   {expected}")
+                            print(f"      columnar: {actual}")
+    finally:
+        driver.close()
+
+    print(f"\n   {'intent':<18} {'equal':>6} {'tie order':>10} {'differs':>8}")
+    for intent, counts in sorted(totals.items()):
+        print(f"   {intent:<18} {counts['equal']:>6} {counts['tie order']:>10} {counts['differs']:>8}")
+    if failures:
+        print(f"\n❌ {failures} case(s) differ between Cypher and columnar mode.")
+        sys.exit(1)
+    print("\n✅ Columnar results match the Cypher templates.")
+
+
+if __name__ == "__main__":
+    main()
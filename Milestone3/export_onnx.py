@@ -0,0 +1,95 @@
+"""
+Exports the two embedding models to ONNX (plus int8-quantised copies) and
+checks that ONNX Runtime vectors stay within tolerance of the torch ones.
+
+Usage:
+    python export_onnx.py                 # export + check both models
+    python export_onnx.py --no-quantize
+    python export_onnx.py --check-only --threads 2
+
+Then set FPL_EMBEDDING_BACKEND=onnx (or onnx-int8) in .env.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+from backend.config import Config
+from backend.embeddings import TOLERANCE, OnnxEmbeddings, compare_embedders, export_onnx, get_embedder
+from backend.tracing import percentile
+from backend.typo_corpus import load_typo_corpus
+
+MODELS = [Config.EMBEDDING_MODEL_A, Config.EMBEDDING_MODEL_B]
+
+SAMPLE_TEXTS = [
+    "Player: Mohamed Salah. Position: MID. Total Fantasy Points: 234.",
+    "Haaland",
+    "Bruno Fernandez",
+    "trent alexander arnold",
+    "Son Heung-min",
+]
+
+
+def time_import(module):
+    """Seconds to import a module in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(result.stdout.strip()) if result.returncode == 0 else None
+
+
+def encode_latency(embedder, texts):
+    latencies = []
+    for text in texts:
+        t0 = time.perf_counter()
+        embedder.embed_query(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return percentile(latencies, 50), percentile(latencies, 95)
+
+
+def check_model(model_name, backends, texts, threads):
+    print(f"\n🔎 {model_name}")
+    reference = get_embedder(model_name, backend="torch")
+    encode_latency(reference, texts[:3])  # warm up
+    p50, p95 = encode_latency(reference, texts)
+    print(f"   torch      : p50 {p50:.2f}ms, p95 {p95:.2f}ms")
+
+    passed = True
+    for backend in backends:
+        candidate = OnnxEmbeddings(model_name, backend, threads=threads)
+        encode_latency(candidate, texts[:3])
+        p50, p95 = encode_latency(candidate, texts)
+        min_cos, max_diff = compare_embedders(reference, candidate, texts)
+        ok = min_cos >= TOLERANCE[backend]
+        passed &= ok
+        status = "✅" if ok else "❌"
+        print(f"   {backend:<11}: p50 {p50:.2f}ms, p95 {p95:.2f}ms, "
+              f"min cos {min_cos:.5f} (>= {TOLERANCE[backend]}), max |diff| {max_diff:.4f} {status}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export embedding models to ONNX")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    parser.add_argument("--check-only", action="store_true", help="Only compare existing exports")
+    parser.add_argument("--threads", type=int, default=Config.ONNX_INTRA_OP_THREADS)
+    parser.add_argument("--samples", type=int, default=100, help="Typo-corpus queries to compare")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        for model_name in MODELS:
+            print(f"\n📦 Exporting {model_name}...")
+            directory = export_onnx(model_name, quantize=not args.no_quantize)
+            print(f"   ✅ Saved to {directory}")
+
+    texts = SAMPLE_TEXTS + [item["query"] for item in load_typo_corpus(Config.TYPO_CORPUS_PATH)[:args.samples]]
+    backends = ["onnx"] if args.no_quantize else ["onnx", "onnx-int8"]
+
+    print(f"\n⏱️  Import cost: torch {time_import('torch') or float('nan'):.2f}s, "
+          f"onnxruntime {time_import('onnxruntime') or float('nan'):.2f}s")
+    passed = all([check_model(m, backends, texts, args.threads) for m in MODELS])
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
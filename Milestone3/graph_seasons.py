@@ -0,0 +1,102 @@
+"""
+Lists the season partitions of the FPL graph and upgrades graphs loaded
+before fixtures and PLAYED_IN appearances carried their season/gw keys
+(see backend/seasons.py).
+
+Usage:
+    python graph_seasons.py list                       # seasons, fixtures, appearances per partition
+    python graph_seasons.py resolve "last season" 22/23
+    python graph_seasons.py partition                  # backfill keys + create indexes (idempotent)
+    python graph_seasons.py partition --batch-size 200
+
+load_graph.py and graph_snapshot.py import already write the keys; run
+`partition` once on older graphs and after a neo4j-admin import.
+"""
+
+import argparse
+import sys
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.seasons import SeasonRegistry, partition_counts, partition_graph
+
+
+def _driver():
+    Config.validate()
+    return GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+
+
+def _print_partitions(rows):
+    print(f"\n   {'season':<10} {'gameweeks':>9} {'fixtures':>9} {'appearances':>12} {'keyed':>8}")
+    for r in rows:
+        keyed = r["keyed"] / r["appearances"] if r["appearances"] else 1.0
+        print(f"   {str(r['season']):<10} {r['gameweeks']:>9} {r['fixtures']:>9,} {r['appearances']:>12,} {keyed:>8.0%}")
+
+
+# --------------------------------------------------------------------------
+# COMMANDS
+# --------------------------------------------------------------------------
+def list_seasons(args):
+    driver = _driver()
+    try:
+        with driver.session() as session:
+            registry = SeasonRegistry.from_session(session)
+        rows = partition_counts(driver)
+    finally:
+        driver.close()
+    print(f"\n📅 {len(registry.names)} seasons in {Config.NEO4J_URI} (latest {registry.latest})")
+    _print_partitions(rows)
+    if not registry.partitioned:
+        print("\n⚠️  Appearances have no season/gw keys yet; run `python graph_seasons.py partition`.")
+
+
+def resolve(args):
+    driver = _driver()
+    try:
+        with driver.session() as session:
+            registry = SeasonRegistry.from_session(session)
+    finally:
+        driver.close()
+    for text in args.text or [""]:
+        print(f"   {text!r:<20} -> {registry.resolve(text)}")
+
+
+def partition(args):
+    print(f"\n🗂️  Partitioning {Config.NEO4J_URI} by season ({args.batch_size} fixtures per transaction)...")
+    driver = _driver()
+    t0 = time.perf_counter()
+    try:
+        rows = partition_graph(driver, batch_size=args.batch_size)
+    except RuntimeError as e:
+        _print_partitions(partition_counts(driver))
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    finally:
+        driver.close()
+    _print_partitions(rows)
+    print(f"\n✅ Done in {time.perf_counter() - t0:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL graph season partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Seasons in the graph and the size of each partition")
+
+    p_resolve = sub.add_parser("resolve", help="Show how free-text seasons resolve")
+    p_resolve.add_argument("text", nargs="*")
+
+    p_partition = sub.add_parser("partition", help="Backfill season/gw keys and create the partition indexes")
+    p_partition.add_argument("--batch-size", type=int, default=100, help="Fixtures per transaction")
+
+    args = parser.parse_args()
+    commands = {"list": list_seasons, "resolve": resolve, "partition": partition}
+    commands[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
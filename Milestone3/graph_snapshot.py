@@ -0,0 +1,125 @@
+"""
+Exports the FPL graph to a portable snapshot and loads it back
+(see backend/snapshot.py), so a new replica starts from a known-good
+dataset instead of load_graph.py + initialize_vectors.py.
+
+Usage:
+    python graph_snapshot.py export --out snapshots/fpl                # from the configured Neo4j
+    python graph_snapshot.py verify snapshots/fpl                      # checksum + counts
+    python graph_snapshot.py load snapshots/fpl --replica              # in-memory stores (+ vector replica)
+    python graph_snapshot.py import snapshots/fpl --workers 8          # into an empty Neo4j
+
+Set FPL_SNAPSHOT_DIR=snapshots/fpl to have the app and server.py build the
+columnar store from the snapshot at start-up.
+"""
+
+import argparse
+import sys
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.bulk_loader import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
+from backend.snapshot import SnapshotError, export_snapshot, import_to_neo4j, load_snapshot, verify_snapshot
+
+
+def _driver():
+    Config.validate()
+    return GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+
+
+def _print_counts(manifest):
+    counts = ", ".join(f"{k}={v:,}" for k, v in manifest["counts"].items())
+    print(f"   {counts}")
+    print(f"   dims: {manifest['dims']}  |  {manifest['bytes'] / 1e6:.1f} MB  |  created {manifest['created_at']}")
+
+
+# --------------------------------------------------------------------------
+# COMMANDS
+# --------------------------------------------------------------------------
+def export(args):
+    print(f"\n📤 Exporting graph from {Config.NEO4J_URI} to {args.out}...")
+    driver = _driver()
+    try:
+        with driver.session() as session:
+            manifest = export_snapshot(session, args.out, compress=args.compress)
+    finally:
+        driver.close()
+    _print_counts(manifest)
+    print(f"\n✅ Snapshot written in {manifest['export_seconds']:.1f}s (sha256 {manifest['sha256']['data.npz'][:12]})")
+
+
+def verify(args):
+    t0 = time.perf_counter()
+    manifest = verify_snapshot(args.snapshot)
+    print(f"\n✅ Checksum OK ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+    _print_counts(manifest)
+
+
+def load(args):
+    print(f"\n📥 Loading {args.snapshot}...")
+    snapshot = load_snapshot(args.snapshot, verify=not args.no_verify)
+    print(f"   ...verify {snapshot.timings.get('verify_ms', 0):.0f}ms, read {snapshot.timings['load_ms']:.0f}ms")
+
+    t0 = time.perf_counter()
+    store = snapshot.columnar_store()
+    print(f"   ...columnar store: {store.num_appearances:,} appearances in {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    if args.replica:
+        t0 = time.perf_counter()
+        out_dir = snapshot.write_vector_replica()
+        print(f"   ...vector replica: {out_dir} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+    print("\n✅ Snapshot loaded.")
+
+
+def import_graph(args):
+    snapshot = load_snapshot(args.snapshot, verify=not args.no_verify)
+    print(f"\n📥 Importing {args.snapshot} into {Config.NEO4J_URI} "
+          f"(batch {args.batch_size}, {args.workers} writers)...")
+    _print_counts(snapshot.manifest)
+    driver = _driver()
+    t0 = time.perf_counter()
+    try:
+        import_to_neo4j(driver, snapshot, batch_size=args.batch_size, workers=args.workers)
+    finally:
+        driver.close()
+    print(f"\n✅ Imported in {time.perf_counter() - t0:.1f}s. initialize_vectors.py will only rebuild the "
+          "leaderboards and vector replica (embedding hashes already match).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL graph snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Write a snapshot of the configured Neo4j")
+    p_export.add_argument("--out", required=True, help="Snapshot directory (replaced atomically)")
+    p_export.add_argument("--compress", action="store_true", help="Smaller file, slower load")
+
+    p_verify = sub.add_parser("verify", help="Check a snapshot's checksum")
+    p_verify.add_argument("snapshot")
+
+    p_load = sub.add_parser("load", help="Load a snapshot into the in-memory stores and time it")
+    p_load.add_argument("snapshot")
+    p_load.add_argument("--replica", action="store_true", help="Also write a local vector replica version")
+    p_load.add_argument("--no-verify", action="store_true")
+
+    p_import = sub.add_parser("import", help="Load a snapshot into an empty Neo4j")
+    p_import.add_argument("snapshot")
+    p_import.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    p_import.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    p_import.add_argument("--no-verify", action="store_true")
+
+    args = parser.parse_args()
+    commands = {"export": export, "verify": verify, "load": load, "import": import_graph}
+    try:
+        commands[args.command](args)
+    except SnapshotError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
+import argparse
+import hashlib
 import time
 from difflib import SequenceMatcher
 from neo4j import GraphDatabase
 from langchain_huggingface import HuggingFaceEmbeddings
 from backend.config import Config
+from backend.columnar import ColumnarStore
+from backend.knowledge_graph import get_search_aliases
+from backend.leaderboards import build_leaderboards, save_leaderboards
+from backend.typo_corpus import build_typo_corpus, save_typo_corpus, load_typo_corpus
+from backend.vector_indexes import INDEX_FIELDS, active_vector_indexes, switch_vector_indexes
+from backend.vector_store import export_vector_replica, LocalVectorIndex, compare_with_neo4j
+from backend.pipeline import Checkpoint, run_pipeline
 
 # --------------------------------------------------------------------------
 # CONFIGURATION
@@ -10,6 +19,14 @@ from backend.config import Config
 MODEL_NAME_A = Config.EMBEDDING_MODEL_A
 MODEL_NAME_B = Config.EMBEDDING_MODEL_B
 BATCH_SIZE = 500
+VERIFY_SAMPLE = 100
+QUEUE_SIZE = 4  # Batches buffered between pipeline stages
+
+
+def content_hash(text):
+    """Hash of the embedded text and both model names (a model change re-embeds)."""
+    return hashlib.sha1(f"{MODEL_NAME_A}|{MODEL_NAME_B}|{text}".encode("utf-8")).hexdigest()
+
 
 class GraphInitializer:
     def __init__(self):
@@ -180,69 +197,287 @@ class GraphInitializer:
     # ----------------------------------------------------------------------
     # STEP 3: EMBEDDING GENERATION
     # ----------------------------------------------------------------------
-    def generate_embeddings(self):
-        print("\n🧠 STEP 3: Generating Embeddings...")
-        hf_a = HuggingFaceEmbeddings(model_name=MODEL_NAME_A)
-        dim_a = len(hf_a.embed_query("test"))
-        hf_b = HuggingFaceEmbeddings(model_name=MODEL_NAME_B)
-        dim_b = len(hf_b.embed_query("test"))
+    def generate_embeddings(self, checkpoint, full=False):
+        """
+        Incremental by default: each player's text_representation is hashed
+        (together with both model names) and only players whose hash changed
+        or who lack vectors are re-embedded, in place. The live indexes stay
+        online and pick up the updated vectors.
+
+        full=True, or models that no longer match the live indexes, builds a
+        new generation instead: everyone is embedded into versioned
+        properties, new indexes are built next to the live ones, and the
+        pointers switch once they are online (backend/vector_indexes.py).
+
+        The players to embed are read up front (names and hashes only, no
+        vectors), so no read cursor stays open while batches are embedded.
+        Embedding and writes run as a pipeline (bounded queues), and every
+        committed batch is recorded in `checkpoint` so an interrupted run
+        resumes. The caller owns the checkpoint (main() builds it from the
+        run's fingerprint).
+        """
+        print(f"\n🧠 STEP 3: Generating Embeddings ({'full rebuild' if full else 'incremental'})...")
+        committed = checkpoint.items("embeddings")
+        if committed:
+            print(f"   ...Resuming: {len(committed)} players already committed.")
 
-        self._setup_indexes(dim_a, dim_b)
+        models = {}
+        # The target generation is part of the checkpoint: a resumed run keeps writing into it
+        plan = checkpoint.get("generation")
+        if plan is None:
+            plan = self._plan_generation(full, models)
+            checkpoint.set("generation", plan)
+        target, rebuild = plan["target"], plan["rebuild"]
+        if rebuild:
+            print(f"   ...Building {', '.join(t['index'] for t in target.values())} next to the live indexes.")
 
-        print("   ...Fetching Player Data...")
         query = """
         MATCH (p:Player)
         OPTIONAL MATCH (p)-[:PLAYS_AS]->(pos:Position)
         OPTIONAL MATCH (p)-[r:PLAYED_IN]->()
         WITH p, pos.name AS position, sum(r.total_points) AS total_points
-        RETURN elementId(p) AS internal_id, p.player_name AS name, position, total_points
+        RETURN elementId(p) AS internal_id, p.player_name AS name, position, total_points,
+               p.text_hash AS text_hash,
+               p[$field_a] IS NOT NULL AND p[$field_b] IS NOT NULL AS has_vectors
         """
-        players = self.run_cypher(query)
-        total = len(players)
-        print(f"   ...Found {total} unique players.")
+        fields = {"field_a": target["player_idx_a"]["field"], "field_b": target["player_idx_b"]["field"]}
+        summary = {"skipped": 0, "updated": 0, "new": 0}
 
-        batch = []
-        with self.driver.session() as session:
-            for record in players:
-                text = f"Player: {record['name']}. Position: {record['position'] or 'Unknown'}. Total Fantasy Points: {int(record['total_points'] or 0)}."
-                batch.append({
-                    "id": record["internal_id"],
-                    "text": text,
-                    "vec_a": hf_a.embed_query(text),
-                    "vec_b": hf_b.embed_query(text)
-                })
-
-                if len(batch) >= BATCH_SIZE:
-                    self._write_batch(session, batch)
-                    batch = []
-            if batch:
-                self._write_batch(session, batch)
-        
+        pending = []
+        for record in self.run_cypher(query, fields):
+            text = f"Player: {record['name']}. Position: {record['position'] or 'Unknown'}. Total Fantasy Points: {int(record['total_points'] or 0)}."
+            text_hash = content_hash(text)
+            up_to_date = record["has_vectors"] and record["text_hash"] == text_hash
+            if record["internal_id"] in committed or (up_to_date and not full):
+                summary["skipped"] += 1
+                continue
+            summary["updated" if record["has_vectors"] else "new"] += 1
+            pending.append({"id": record["internal_id"], "text": text, "hash": text_hash})
+
+        def fetch_batches():
+            """Yields the players that need (re-)embedding, BATCH_SIZE at a time."""
+            for i in range(0, len(pending), BATCH_SIZE):
+                yield pending[i:i + BATCH_SIZE]
+
+        def embed(batch):
+            self._load_models(models)
+            texts = [row["text"] for row in batch]
+            for row, vec_a, vec_b in zip(batch, models["a"].embed_documents(texts), models["b"].embed_documents(texts)):
+                row["vec_a"] = vec_a
+                row["vec_b"] = vec_b
+            return batch
+
+        write_session = self.driver.session()
+
+        def write(batch):
+            self._write_batch(write_session, batch, fields)
+            checkpoint.add_items("embeddings", [row["id"] for row in batch])
+            return batch
+
+        try:
+            run_pipeline(
+                fetch_batches(),
+                [("embed", embed, len), ("write", write, len)],
+                queue_size=QUEUE_SIZE
+            )
+        finally:
+            write_session.close()
+
+        if rebuild:
+            self._switch_generation(target, plan["previous"], models)
+        else:
+            self._ensure_indexes(target, models)
+        print(f"   ✅ {summary['skipped']} skipped, {summary['updated']} updated, {summary['new']} new.")
         print("\n✅ SUCCESS: Knowledge Graph is fully initialized and vector-ready.")
+        return summary
+
+    def _load_models(self, models):
+        if not models:
+            models["a"] = HuggingFaceEmbeddings(model_name=MODEL_NAME_A)
+            models["b"] = HuggingFaceEmbeddings(model_name=MODEL_NAME_B)
+        return models
+
+    def _model_dimensions(self, models):
+        self._load_models(models)
+        return {
+            "player_idx_a": len(models["a"].embed_query("test")),
+            "player_idx_b": len(models["b"].embed_query("test")),
+        }
 
-    def _setup_indexes(self, dim_a, dim_b):
-        print("   ...Refreshing Indexes...")
+    def _plan_generation(self, full, models):
+        """
+        Where this run writes: the live generation (in place) or a new one.
+        A new generation is built for --full, and when the configured models
+        differ from the ones recorded on the pointers (or, on graphs without
+        pointers, when their dimensions no longer match the live indexes).
+        """
+        configured = {"player_idx_a": MODEL_NAME_A, "player_idx_b": MODEL_NAME_B}
         with self.driver.session() as session:
-            for idx in ["player_idx_a", "player_idx_b", "player_embeddings", "team_embeddings"]:
-                session.run(f"DROP INDEX {idx} IF EXISTS")
-            session.run(f"CREATE VECTOR INDEX player_idx_a IF NOT EXISTS FOR (n:Player) ON (n.embedding_a) OPTIONS {{ indexConfig: {{ `vector.dimensions`: {dim_a}, `vector.similarity_function`: 'cosine' }} }}")
-            session.run(f"CREATE VECTOR INDEX player_idx_b IF NOT EXISTS FOR (n:Player) ON (n.embedding_b) OPTIONS {{ indexConfig: {{ `vector.dimensions`: {dim_b}, `vector.similarity_function`: 'cosine' }} }}")
+            active = active_vector_indexes(session)
+        existing = self._index_dimensions([entry["index"] for entry in active.values()])
+
+        changed = False
+        if existing:
+            recorded = {name: entry["model"] for name, entry in active.items()}
+            if all(recorded.values()):
+                changed = recorded != configured
+            else:
+                dims = self._model_dimensions(models)
+                changed = any(existing.get(entry["index"]) not in (None, dims[name]) for name, entry in active.items())
 
-    def _write_batch(self, session, batch):
+        if not existing or not (full or changed):
+            # Nothing served yet, or an incremental run: write where the indexes already look
+            return {"target": {name: {**entry, "model": configured[name]} for name, entry in active.items()},
+                    "rebuild": False}
+        if changed:
+            print("   ⚠️  Embedding models changed, building a new index generation.")
+        version = time.strftime("v%Y%m%d_%H%M%S")
+        target = {
+            name: {"index": f"{name}_{version}", "field": f"{field}_{version}", "model": configured[name]}
+            for name, field in INDEX_FIELDS.items()
+        }
+        return {"target": target, "rebuild": True, "previous": active}
+
+    def _ensure_indexes(self, target, models):
+        """Creates the target indexes if they are missing and records the models on the pointers."""
+        existing = self._index_dimensions([entry["index"] for entry in target.values()])
+        if len(existing) == len(target):
+            dims = {name: existing[entry["index"]] for name, entry in target.items()}
+        else:
+            dims = self._model_dimensions(models)
+            self._setup_indexes(target, dims)
+        with self.driver.session() as session:
+            switch_vector_indexes(session, target, dims)
+
+    def _switch_generation(self, target, previous, models):
+        """
+        Builds the new indexes, waits until they are online, points the
+        logical names at them, and drops the previous generation once every
+        process has re-read the pointers (Config.SEASON_REGISTRY_TTL).
+        """
+        dims = self._model_dimensions(models)
+        self._setup_indexes(target, dims)
+        print("   ...Waiting for the new indexes to come online...")
+        with self.driver.session() as session:
+            switch_vector_indexes(session, target, dims)
+        print(f"   ...Serving {', '.join(entry['index'] for entry in target.values())}.")
+        retired = [entry for name, entry in previous.items() if entry["index"] != target[name]["index"]]
+        if retired:
+            print(f"   ...Keeping the previous indexes for {Config.SEASON_REGISTRY_TTL:.0f}s while services re-read the pointers.")
+            time.sleep(Config.SEASON_REGISTRY_TTL)
+            self._drop_generation(retired)
+
+    def _index_dimensions(self, names):
+        """Existing vector indexes among `names` -> configured dimensions."""
+        records = self.run_cypher("""
+        SHOW VECTOR INDEXES YIELD name, options
+        WHERE name IN $names
+        RETURN name, options.indexConfig['vector.dimensions'] AS dims
+        """, {"names": names})
+        return {r["name"]: r["dims"] for r in records}
+
+    def _drop_generation(self, retired):
+        print("   ...Dropping the previous indexes and their properties...")
+        with self.driver.session() as session:
+            for entry in retired:
+                session.run(f"DROP INDEX `{entry['index']}` IF EXISTS").consume()
+                session.run(f"""
+                MATCH (p:Player) WHERE p.`{entry['field']}` IS NOT NULL
+                CALL (p) {{ REMOVE p.`{entry['field']}` }} IN TRANSACTIONS OF {BATCH_SIZE} ROWS
+                """).consume()
+            for idx in ["player_embeddings", "team_embeddings"]:
+                session.run(f"DROP INDEX {idx} IF EXISTS").consume()
+
+    def _setup_indexes(self, target, dims):
+        print("   ...Creating Indexes...")
+        with self.driver.session() as session:
+            for name, entry in target.items():
+                session.run(f"CREATE VECTOR INDEX `{entry['index']}` IF NOT EXISTS FOR (n:Player) ON (n.`{entry['field']}`) OPTIONS {{ indexConfig: {{ `vector.dimensions`: {dims[name]}, `vector.similarity_function`: 'cosine' }} }}").consume()
+
+    def _write_batch(self, session, batch, fields):
         query = """
         UNWIND $batch AS row
         MATCH (p) WHERE elementId(p) = row.id
-        SET p.text_representation = row.text, p.embedding_a = row.vec_a, p.embedding_b = row.vec_b
+        SET p.text_representation = row.text, p.text_hash = row.hash
+        WITH p, row
+        CALL db.create.setNodeVectorProperty(p, $field_a, row.vec_a)
+        CALL db.create.setNodeVectorProperty(p, $field_b, row.vec_b)
         """
-        session.run(query, batch=batch)
+        # consume() inside the transaction: the batch is committed (or raises) before it is checkpointed
+        session.execute_write(lambda tx: tx.run(query, batch=batch, **fields).consume())
+
+    # ----------------------------------------------------------------------
+    # STEP 4: PRECOMPUTED LEADERBOARDS
+    # ----------------------------------------------------------------------
+    def precompute_leaderboards(self):
+        print("\n🏆 STEP 4: Precomputing Leaderboards...")
+        with self.driver.session() as session:
+            store = ColumnarStore.from_session(session)
+        print(f"   ...Loaded {store.num_appearances} appearances.")
+
+        artifact = build_leaderboards(store, get_search_aliases)
+        save_leaderboards(artifact)
+        print(f"   ✅ Saved {len(artifact['boards'])} leaderboards to {Config.LEADERBOARDS_PATH}")
+
+    # ----------------------------------------------------------------------
+    # STEP 5: LOCAL VECTOR REPLICA (mmap .npy export + top-1 check)
+    # ----------------------------------------------------------------------
+    def export_local_replica(self):
+        print("\n📦 STEP 5: Exporting Local Vector Replica...")
+        with self.driver.session() as session:
+            out_dir = export_vector_replica(session)
+        index = LocalVectorIndex(out_dir)
+        print(f"   ...Wrote {len(index.names)} players to {out_dir}")
+
+        corpus = load_typo_corpus(Config.TYPO_CORPUS_PATH)
+        if not corpus:
+            corpus = build_typo_corpus(index.names)
+            save_typo_corpus(corpus, Config.TYPO_CORPUS_PATH)
+            print(f"   ...Recorded {len(corpus)} typo queries to {Config.TYPO_CORPUS_PATH}")
+
+        queries = [item["query"] for item in corpus[:VERIFY_SAMPLE]]
+        with self.driver.session() as session:
+            for model_name, index_name in [(MODEL_NAME_A, "player_idx_a"), (MODEL_NAME_B, "player_idx_b")]:
+                embedder = HuggingFaceEmbeddings(model_name=model_name)
+                agree, mismatches = compare_with_neo4j(session, index, embedder, index_name, queries)
+                print(f"   ...{index_name}: local top-1 matches Neo4j on {agree}/{len(queries)} queries")
+                for query, local, remote in mismatches[:5]:
+                    print(f"      ⚠️  '{query}': local={local} neo4j={remote}")
+        print("   ✅ Vector replica ready.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Initialize the FPL graph for vector search")
+    parser.add_argument("--full", action="store_true", help="Re-embed every player into a new index generation")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint from an interrupted run")
+    args = parser.parse_args()
+
     Config.validate()
+    checkpoint = Checkpoint(
+        Config.INIT_CHECKPOINT_PATH,
+        {"models": [MODEL_NAME_A, MODEL_NAME_B], "full": args.full}
+    )
+    if args.restart:
+        checkpoint.clear()
+        checkpoint = Checkpoint(Config.INIT_CHECKPOINT_PATH, checkpoint.fingerprint)
+    elif checkpoint.resumed:
+        print(f"\n↩️  Resuming from {Config.INIT_CHECKPOINT_PATH} (use --restart to start over)")
+
     init = GraphInitializer()
+    steps = [
+        ("repair_exact_duplicates", init.repair_exact_duplicates),  # Step 1
+        ("repair_aliases_safely", init.repair_aliases_safely),      # Step 2
+        ("generate_embeddings", lambda: init.generate_embeddings(checkpoint, full=args.full)),  # Step 3
+        ("precompute_leaderboards", init.precompute_leaderboards),  # Step 4
+        ("export_local_replica", init.export_local_replica),        # Step 5
+    ]
     try:
-        init.repair_exact_duplicates()  # Step 1
-        init.repair_aliases_safely()    # Step 2
-        init.generate_embeddings()      # Step 3
+        for name, step in steps:
+            if checkpoint.step_done(name):
+                print(f"\n⏭️  {name}: done in a previous run, skipping.")
+                continue
+            step()
+            checkpoint.mark_step(name)
+        checkpoint.clear()
     finally:
         init.close()
 
@@ -0,0 +1,84 @@
+"""
+Builds the FPL knowledge graph from the public per-gameweek CSVs
+(vaastav/Fantasy-Premier-League layout: data/<season>/gws/merged_gw.csv
+and data/<season>/teams.csv).
+
+Usage:
+    python load_graph.py --data-dir data                      # load into Neo4j
+    python load_graph.py --data-dir data --batch-size 10000 --workers 8
+    python load_graph.py --data-dir data --admin-csv import/  # neo4j-admin CSVs
+
+Run initialize_vectors.py afterwards to repair duplicates and add embeddings.
+"""
+
+import argparse
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.bulk_loader import (
+    DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, EntityTracker,
+    create_constraints, load_season, write_admin_csvs
+)
+from backend.seasons import DEFAULT_SEASONS
+
+
+def load_online(args):
+    Config.validate()
+    driver = GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+    try:
+        print("\n🔧 Creating constraints and season indexes...")
+        create_constraints(driver)
+
+        tracker = EntityTracker()
+        total_rows = 0
+        t0 = time.perf_counter()
+        for season in args.seasons:
+            print(f"\n📥 Loading {season} (batch {args.batch_size}, {args.workers} writers)...")
+            stats = load_season(
+                driver, args.data_dir, season,
+                batch_size=args.batch_size, workers=args.workers,
+                encoding=args.encoding, tracker=tracker
+            )
+            total_rows += stats.rows
+            print(f"   ✅ {stats.rows:,} PLAYED_IN rows in {stats.elapsed:.1f}s ({stats.rows_per_sec:,.0f} rows/s)")
+
+        elapsed = time.perf_counter() - t0
+        print(f"\n✅ Loaded {total_rows:,} rows in {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s overall)")
+    finally:
+        driver.close()
+
+
+def export_admin(args):
+    print(f"\n📝 Writing neo4j-admin import CSVs to {args.admin_csv}...")
+    stats, command = write_admin_csvs(
+        args.data_dir, args.seasons, args.admin_csv,
+        batch_size=args.batch_size, encoding=args.encoding
+    )
+    print(f"   ✅ {stats.rows:,} rows in {stats.elapsed:.1f}s ({stats.rows_per_sec:,.0f} rows/s)")
+    print("\nStop Neo4j, then run:\n")
+    print(f"   {command}\n")
+    print("Then start Neo4j and create the season indexes with `python graph_seasons.py partition`.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FPL graph from gameweek CSVs")
+    parser.add_argument("--data-dir", required=True, help="Directory containing <season>/gws/merged_gw.csv")
+    parser.add_argument("--seasons", nargs="+", default=list(DEFAULT_SEASONS))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel PLAYED_IN writers")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--admin-csv", help="Write neo4j-admin import CSVs here instead of loading")
+    args = parser.parse_args()
+
+    if args.admin_csv:
+        export_admin(args)
+    else:
+        load_online(args)
+
+
+if __name__ == "__main__":
+    main()
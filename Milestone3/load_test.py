@@ -0,0 +1,220 @@
+"""
+Ramped load test of the chat pipeline: N concurrent users replay a
+question mix (backend/loadgen.py) with stubbed LLMs against a local Neo4j,
+stepping concurrency up and reporting throughput, latency percentiles,
+error rates and CPU/memory per step, plus where throughput saturates.
+
+Usage:
+    python load_test.py run                                        # in-process, steps 1,2,4,8,16
+    python load_test.py run --steps 1,4,16,32 --duration 60 --mode columnar
+    python load_test.py run --target http://localhost:8000         # against `server.py --stub-llm`
+    python load_test.py diff reports/capacity_old.json reports/capacity_new.json
+
+Reports are written to reports/capacity_<timestamp>.json; rerun after each
+change and diff them.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from backend.config import Config
+from backend.loadgen import (
+    DEFAULT_ANSWER_LATENCY_MS, DEFAULT_INTENT_LATENCY_MS, find_knee, install_llm_stubs,
+    load_question_mix, process_usage, run_step,
+)
+from backend.service_client import BackendError, remote_ask, remote_health
+
+REPORT_VERSION = 1
+REPORT_DIR = "reports"
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --------------------------------------------------------------------------
+# TARGETS
+# --------------------------------------------------------------------------
+def local_target(args, mix):
+    """Calls service.ask in this process, with the LLM providers stubbed."""
+    if not args.real_llm:
+        install_llm_stubs(mix, args.intent_latency_ms, args.answer_latency_ms, seed=args.seed)
+    from backend.service import Warmup, ask
+
+    print("   ...Warming up (driver, plan cache, embedders, stores)")
+    warmup = Warmup(load_columnar=args.mode == "columnar")
+    warmup.run()
+    for name, component in warmup.components.items():
+        print(f"      {name:<20} {component['status']} ({component['ms']:.0f}ms)")
+    if warmup.failed:
+        raise RuntimeError("Warm-up failed (is Neo4j running?)")
+
+    def call(item):
+        return ask(item["question"], args.mode, args.embedding_model, Config.MODEL_GROQ)
+    return call, process_usage
+
+
+def remote_target(args):
+    """Calls POST /ask on a running server.py; CPU/memory come from its /health."""
+    health = remote_health(args.target)
+    if not health or not health.get("ready"):
+        raise RuntimeError(f"Service at {args.target} is down or still warming up")
+    if not health.get("llm_stub") and not args.real_llm:
+        raise RuntimeError("Service is calling real LLMs; start it with --stub-llm (or pass --real-llm)")
+
+    def call(item):
+        return remote_ask(item["question"], args.mode, args.embedding_model, Config.MODEL_GROQ,
+                          base_url=args.target)
+
+    def usage():
+        return (remote_health(args.target) or {}).get("process")
+    return call, usage
+
+
+# --------------------------------------------------------------------------
+# RUN
+# --------------------------------------------------------------------------
+def _llm_settings(args):
+    if args.real_llm:
+        return "real"
+    if args.target:
+        return {"stub": True, "latency": "set by server.py"}
+    return {"stub": True, "intent_latency_ms": args.intent_latency_ms, "answer_latency_ms": args.answer_latency_ms}
+
+
+def run(args):
+    mix = load_question_mix(args.mix)
+    steps = [int(s) for s in args.steps.split(",") if s.strip()]
+    target = args.target or "in-process"
+    print(f"\n🏋️  Load test: {target}, mode {args.mode}, Model {args.embedding_model}, "
+          f"{len(mix)} questions, steps {steps} x {args.duration}s")
+
+    call, usage_fn = remote_target(args) if args.target else local_target(args, mix)
+
+    # One pass over the mix so first-request costs do not land in step 1
+    for item in mix:
+        try:
+            call(item)
+        except BackendError as e:
+            print(f"   ⚠️  Warm-up request failed: {e}")
+
+    results = []
+    print(f"\n   {'users':>5} {'q/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'err':>6} {'cores':>6} {'RSS MB':>8} {'graph p95':>10}")
+    for i, users in enumerate(steps):
+        step = run_step(call, mix, users, args.duration, think_time=args.think_time, seed=args.seed + i,
+                        usage_fn=usage_fn)
+        results.append(step)
+        graph_p95 = step["stages"].get("graph", {}).get("p95_ms", 0.0)
+        cores = f"{step['cpu_cores']:.2f}" if step["cpu_cores"] is not None else "-"
+        print(f"   {users:>5} {step['throughput_qps']:>8.2f} {step['p50_ms']:>9.1f} {step['p95_ms']:>9.1f} "
+              f"{step['p99_ms']:>9.1f} {step['error_rate'] + step['rejected_rate']:>6.1%} {cores:>6} "
+              f"{step['peak_rss_mb'] or 0:>8.0f} {graph_p95:>10.1f}")
+
+    knee, reason = find_knee(results)
+    best = max(results, key=lambda s: s["throughput_qps"])
+    if knee:
+        print(f"\n📉 Saturates after {knee['users']} users ({reason})")
+    else:
+        print("\n📈 No saturation within the ramp; add larger steps.")
+    print(f"   Peak throughput {best['throughput_qps']:.2f} q/s at {best['users']} users")
+
+    created = time.strftime("%Y%m%d_%H%M%S")
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": created,
+        "git_revision": git_revision(),
+        "target": target,
+        "mode": args.mode,
+        "embedding_model": args.embedding_model,
+        "embedding_backend": Config.EMBEDDING_BACKEND,
+        "llm": _llm_settings(args),
+        "mix": {"path": args.mix, "questions": len(mix)},
+        "duration_seconds": args.duration,
+        "think_time_seconds": args.think_time,
+        "cpu_count": os.cpu_count(),
+        "steps": results,
+        "saturation": {"users": knee["users"], "throughput_qps": knee["throughput_qps"], "reason": reason}
+        if knee else None,
+        "peak": {"users": best["users"], "throughput_qps": best["throughput_qps"]},
+    }
+    out = args.out or os.path.join(REPORT_DIR, f"capacity_{created}.json")
+    parent = os.path.dirname(out)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report saved to {out}")
+
+
+# --------------------------------------------------------------------------
+# DIFF
+# --------------------------------------------------------------------------
+def diff(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"\n🔍 {old.get('git_revision')} ({old['created_at']}) -> {new.get('git_revision')} ({new['created_at']})")
+    print(f"   {'users':>5} {'q/s':>19} {'p95 ms':>21} {'errors':>17}")
+    old_steps = {s["users"]: s for s in old["steps"]}
+    new_steps = {s["users"]: s for s in new["steps"]}
+    for users in sorted(set(old_steps) | set(new_steps)):
+        a, b = old_steps.get(users), new_steps.get(users)
+        if not a or not b:
+            print(f"   {users:>5} {'only in ' + ('new' if b else 'old')}")
+            continue
+        print(f"   {users:>5} {a['throughput_qps']:>8.2f} -> {b['throughput_qps']:<8.2f} "
+              f"{a['p95_ms']:>9.1f} -> {b['p95_ms']:<9.1f} "
+              f"{a['error_rate']:>6.1%} -> {b['error_rate']:<6.1%}")
+    for report in (old, new):
+        sat = report.get("saturation")
+        label = f"{sat['users']} users, {sat['throughput_qps']:.2f} q/s" if sat else "not reached"
+        print(f"   saturation ({report['created_at']}): {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-user load test")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Ramp concurrency and write a capacity report")
+    p_run.add_argument("--steps", default="1,2,4,8,16", help="Comma-separated concurrent users per step")
+    p_run.add_argument("--duration", type=float, default=30, help="Seconds per step")
+    p_run.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a user waits between questions")
+    p_run.add_argument("--mode", choices=["baseline", "semantic", "columnar"], default="semantic")
+    p_run.add_argument("--embedding-model", choices=["A", "B"], default="A")
+    p_run.add_argument("--mix", help="Question mix JSONL (default: built-in mix)")
+    p_run.add_argument("--target", help="Service URL, e.g. http://localhost:8000 (default: in-process)")
+    p_run.add_argument("--intent-latency-ms", type=float, default=DEFAULT_INTENT_LATENCY_MS)
+    p_run.add_argument("--answer-latency-ms", type=float, default=DEFAULT_ANSWER_LATENCY_MS)
+    p_run.add_argument("--real-llm", action="store_true", help="Call the real providers (rate limits apply)")
+    p_run.add_argument("--seed", type=int, default=42)
+    p_run.add_argument("--out", help="Report path (default reports/capacity_<timestamp>.json)")
+
+    p_diff = sub.add_parser("diff", help="Compare two capacity reports")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        try:
+            run(args)
+        except (RuntimeError, BackendError) as e:
+            print(f"\n❌ {e}")
+            sys.exit(1)
+    else:
+        diff(args.old, args.new)
+
+
+if __name__ == "__main__":
+    main()
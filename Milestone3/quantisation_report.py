@@ -0,0 +1,72 @@
+"""
+Compares float16 / int8 local vector search against float32 on the typo corpus.
+
+Usage:
+    python quantisation_report.py
+    python quantisation_report.py --limit 200 --out reports/quantisation.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from backend.config import Config
+from backend.embeddings import get_embedder
+from backend.typo_corpus import load_typo_corpus
+from backend.vector_store import get_local_index, quantisation_report
+
+MODELS = {"embedding_a": Config.EMBEDDING_MODEL_A, "embedding_b": Config.EMBEDDING_MODEL_B}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantised vector search report")
+    parser.add_argument("--corpus", default=Config.TYPO_CORPUS_PATH)
+    parser.add_argument("--limit", type=int, default=500, help="Max queries to embed")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    index = get_local_index()
+    if index is None:
+        print("⚠️  No local vector replica. Run initialize_vectors.py first.")
+        return
+    corpus = load_typo_corpus(args.corpus)[:args.limit]
+    if not corpus:
+        print(f"⚠️  Typo corpus not found at {args.corpus}.")
+        return
+
+    queries = [item["query"] for item in corpus]
+    expected = [item["expected"] for item in corpus]
+    print(f"\n📏 Replica {index.version}: {len(index.names)} players, {len(queries)} queries")
+
+    output = {"version": index.version, "queries": len(queries), "k": args.k, "fields": {}}
+    for field, model_name in MODELS.items():
+        if not index.has(field):
+            continue
+        embedder = get_embedder(model_name)
+        vectors = embedder.embed_documents(queries)
+        report = quantisation_report(index.directory, vectors, field, expected, k=args.k)
+        output["fields"][field] = report
+
+        print(f"\n   {field} ({model_name})")
+        print(f"   {'precision':<9} {'R@1':>6} {'R@' + str(args.k):>6} {'acc@1':>6} {'MiB':>8} {'mem':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for row in report:
+            print(
+                f"   {row['precision']:<9} {row['recall@1']:>6.3f} {row[f'recall@{args.k}']:>6.3f} "
+                f"{row['accuracy@1']:>6.3f} {row['memory_bytes'] / 2**20:>8.2f} {row['memory_ratio']:>6.0%} "
+                f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f}"
+            )
+
+    if args.out:
+        output["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        parent = os.path.dirname(args.out)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print(f"\n✅ Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
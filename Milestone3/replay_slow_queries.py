@@ -0,0 +1,155 @@
+"""
+Replays the slow-query log under PROFILE and diffs plans against a previous run.
+
+Usage:
+    python replay_slow_queries.py replay --out reports/plans_new.json
+    python replay_slow_queries.py replay --out reports/plans_new.json --baseline reports/plans_old.json
+    python replay_slow_queries.py diff reports/plans_old.json reports/plans_new.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from neo4j import GraphDatabase
+from backend.config import Config
+from backend.slow_query_log import load_slow_queries, profile_query
+
+# A query regresses when its db hits grow by more than this fraction
+DEFAULT_TOLERANCE = 0.10
+
+
+# --------------------------------------------------------------------------
+# REPLAY
+# --------------------------------------------------------------------------
+def replay(log_path, out_path):
+    entries = load_slow_queries(log_path)
+    if not entries:
+        print(f"⚠️  No slow queries found in {log_path or Config.SLOW_QUERY_LOG_PATH}.")
+        return {}
+
+    print(f"\n🔁 Replaying {len(entries)} logged queries...")
+    driver = GraphDatabase.driver(
+        Config.NEO4J_URI,
+        auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+    )
+    run = {}
+    try:
+        with driver.session() as session:
+            for entry in entries:
+                params = entry["params"]
+                if any(isinstance(v, str) and v.startswith("<list of") for v in params.values()):
+                    print(f"   ⏭️  {entry['fingerprint']}: params were truncated, skipping.")
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    plan = profile_query(session, entry["query"], params)
+                except Exception as e:
+                    plan = {"error": str(e)}
+                elapsed = (time.perf_counter() - t0) * 1000
+                run[entry["fingerprint"]] = {
+                    "intent": entry.get("intent"),
+                    "query": entry["query"],
+                    "params": params,
+                    "duration_ms": round(elapsed, 2),
+                    "plan": plan,
+                }
+                hits = plan.get("db_hits", "ERR")
+                print(f"   {entry['fingerprint']} [{entry.get('intent')}] {elapsed:.1f}ms, {hits} db hits")
+    finally:
+        driver.close()
+
+    parent = os.path.dirname(out_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2, default=str)
+    print(f"✅ Saved {len(run)} plans to {out_path}")
+    return run
+
+
+# --------------------------------------------------------------------------
+# DIFF
+# --------------------------------------------------------------------------
+def diff_runs(old, new, tolerance=DEFAULT_TOLERANCE):
+    """Compares two replay runs. Returns list of regression descriptions."""
+    regressions = []
+    print(f"\n📊 Comparing {len(new)} queries against {len(old)} baseline queries...")
+
+    for fp, current in sorted(new.items(), key=lambda kv: str(kv[1].get("intent"))):
+        previous = old.get(fp)
+        label = f"{fp} [{current.get('intent')}]"
+        if previous is None:
+            print(f"   🆕 {label}: no baseline")
+            continue
+        if "error" in current["plan"]:
+            regressions.append(f"{label}: PROFILE failed ({current['plan']['error']})")
+            continue
+        if "error" in previous["plan"]:
+            continue
+
+        old_hits = previous["plan"]["db_hits"]
+        new_hits = current["plan"]["db_hits"]
+        old_ops = [op["operator"] for op in previous["plan"]["operators"]]
+        new_ops = [op["operator"] for op in current["plan"]["operators"]]
+
+        change = (new_hits - old_hits) / old_hits if old_hits else (1.0 if new_hits else 0.0)
+        plan_changed = old_ops != new_ops
+        line = f"{label}: db hits {old_hits} → {new_hits} ({change:+.1%})"
+        if plan_changed:
+            line += f"\n      plan: {' > '.join(old_ops)}\n         → {' > '.join(new_ops)}"
+
+        if change > tolerance:
+            regressions.append(line)
+            print(f"   ❌ {line}")
+        elif plan_changed:
+            print(f"   🔀 {line}")
+        else:
+            print(f"   ✅ {line}")
+
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and diff slow Cypher queries.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_replay = sub.add_parser("replay", help="PROFILE every logged query and save the plans")
+    p_replay.add_argument("--log", default=None, help="Slow-query log (default: Config.SLOW_QUERY_LOG_PATH)")
+    p_replay.add_argument("--out", default=f"reports/plans_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    p_replay.add_argument("--baseline", default=None, help="Previous replay to diff against")
+    p_replay.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    p_diff = sub.add_parser("diff", help="Diff two saved replay runs")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+    p_diff.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        Config.validate()
+        new = replay(args.log, args.out)
+        if not args.baseline:
+            return 0
+        old = _load(args.baseline)
+    else:
+        old, new = _load(args.old), _load(args.new)
+
+    regressions = diff_runs(old, new, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%} db-hit tolerance.")
+        return 1
+    print("\n✅ No plan regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Runs the FPL backend as a long-lived HTTP service (see backend/service.py).
+
+Usage:
+    python server.py                           # 127.0.0.1:8000, 8 workers
+    python server.py --host 0.0.0.0 --port 8000 --workers 16
+    python server.py --stub-llm                # offline LLM stubs, for load_test.py
+
+Point the UI at it with FPL_BACKEND_URL=http://localhost:8000 in .env.
+Run several instances behind a load balancer to scale the backend
+independently of Streamlit; /health is the readiness probe.
+"""
+
+import argparse
+
+from backend.config import Config
+from backend.knowledge_graph import close_driver
+from backend.service import FPLService
+from backend.loadgen import install_llm_stubs, load_question_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL backend HTTP service")
+    parser.add_argument("--host", default=Config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVICE_WORKERS)
+    parser.add_argument("--no-columnar", action="store_true", help="Skip loading the columnar store at start-up")
+    parser.add_argument("--stub-llm", action="store_true", help="Answer with offline LLM stubs (load testing only)")
+    parser.add_argument("--stub-mix", help="Question mix JSONL whose intents the stub returns (default: built-in mix)")
+    args = parser.parse_args()
+
+    if args.stub_llm:
+        install_llm_stubs(load_question_mix(args.stub_mix))
+        print("⚠️  LLM providers replaced by stubs - answers are not real.")
+
+    server = FPLService((args.host, args.port), workers=args.workers, load_columnar=not args.no_columnar)
+    server.warmup.start()
+    print(f"\n🚀 FPL backend on http://{args.host}:{args.port} ({args.workers} workers), warming up...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down...")
+    finally:
+        server.server_close()
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()